@@ -0,0 +1,280 @@
+from __future__ import annotations
+
+import atexit
+import copy
+import hashlib
+import logging
+import re
+import threading
+import time
+from collections import OrderedDict
+from collections.abc import Callable
+from datetime import datetime, timezone
+from types import TracebackType
+from typing import Any
+
+from raygun4py import raygunmsgs
+
+_VARIABLE_PARTS = re.compile(
+    r"0x[0-9a-fA-F]+"
+    r"|[0-9a-fA-F]{8}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{12}"
+    r"|\d+(?:\.\d+)?"
+)
+
+
+def message_template(message: str) -> str:
+    """Replace numbers, addresses and UUIDs in an exception message so similar messages compare equal."""
+    return _VARIABLE_PARTS.sub("#", message)
+
+
+def fingerprint(
+    exc_type: type[BaseException],
+    exc_value: BaseException | None,
+    exc_traceback: TracebackType | None,
+) -> str:
+    """
+    Identify an exception by its type, message template and the code locations in its traceback.
+
+    Only attributes of the traceback objects are read, so this is much cheaper than a capture.
+    """
+    try:
+        message = str(exc_value) if exc_value is not None else ""
+    except Exception:
+        message = ""
+
+    parts = [
+        f"{exc_type.__module__}.{exc_type.__qualname__}",
+        message_template(message),
+    ]
+
+    tb = exc_traceback
+    while tb is not None:
+        code = tb.tb_frame.f_code
+        parts.append(f"{code.co_filename}:{code.co_name}:{tb.tb_lineno}")
+        tb = tb.tb_next
+
+    return hashlib.sha1("\n".join(parts).encode("utf-8", "replace")).hexdigest()
+
+
+class AggregateEntry:
+    def __init__(self, now: float) -> None:
+        self.first_seen = now
+        self.last_seen = now
+        self.occurrences = 1
+        self.template: raygunmsgs.RaygunMessage | None = None
+
+
+class ErrorAggregator:
+    """
+    Collapses repeats of the same exception into one summary report per window.
+
+    The first occurrence of a fingerprint is sent in full. Repeats within `window` seconds
+    are only counted, and once the window has passed a single summary report carrying the
+    count and the first and last occurrence times is produced. At most `max_entries`
+    fingerprints are tracked; the oldest windows are closed early to make room.
+
+    Summaries are returned by `collect`. After `start`, they are also passed to a send
+    function from a background thread as windows end, and every open window is ended and
+    sent at interpreter exit, so a summary doesn't wait for the next error to be reported.
+    """
+
+    log: logging.Logger = logging.getLogger(__name__)
+
+    def __init__(self, window: float = 60.0, max_entries: int = 1000) -> None:
+        """
+        Initialize an ErrorAggregator.
+
+        Parameters:
+            window (float, optional): Seconds over which repeats of an exception are collapsed. Defaults to 60.0.
+            max_entries (int, optional): Maximum number of fingerprints tracked. Defaults to 1000.
+        """
+        self.window = window
+        self.max_entries = max(1, int(max_entries))
+
+        self.aggregated = 0
+
+        self._lock = threading.Lock()
+        self._entries: OrderedDict[str, AggregateEntry] = OrderedDict()
+        self._ready: list[AggregateEntry] = []
+
+        self._send: Callable[[raygunmsgs.RaygunMessage], Any] | None = None
+        self._thread: threading.Thread | None = None
+        self._wakeup = threading.Event()
+        self._stopped = threading.Event()
+
+    def start(self, send: Callable[[raygunmsgs.RaygunMessage], Any]) -> None:
+        """
+        Send summaries from a background thread as their windows end, and at interpreter exit.
+
+        Parameters:
+            send (callable): Called with each summary report.
+        """
+        self._send = send
+        atexit.register(self._shutdown)
+
+    def close(self) -> None:
+        """Stop sending summaries in the background. Call `collect(flush=True)` for the open windows."""
+        self._stopped.set()
+        self._wakeup.set()
+        # The exit hook would otherwise keep this aggregator, and its send function, alive
+        atexit.unregister(self._shutdown)
+
+    def observe(self, key: str) -> bool:
+        """
+        Record an occurrence of the exception identified by `key`.
+
+        Returns:
+            bool: True if this occurrence should be captured and sent in full.
+        """
+        now = time.time()
+
+        with self._lock:
+            self._expire(now)
+
+            entry = self._entries.get(key)
+            if entry is not None:
+                entry.occurrences += 1
+                entry.last_seen = now
+                self.aggregated += 1
+                # Only windows with repeats produce a summary to wait for
+                self._ensure_worker()
+                return False
+
+            self._entries[key] = AggregateEntry(now)
+            while len(self._entries) > self.max_entries:
+                _, evicted = self._entries.popitem(last=False)
+                self._retire(evicted)
+            return True
+
+    def remember(self, key: str, message: raygunmsgs.RaygunMessage) -> None:
+        """Keep a lightweight copy of the fully sent report, used to build the summary for `key`."""
+        template = summary_template(message)
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                entry.template = template
+
+    def collect(self, flush: bool = False) -> list[raygunmsgs.RaygunMessage]:
+        """
+        Return summary reports for windows that have ended.
+
+        Parameters:
+            flush (bool, optional): End every open window now, for example at shutdown. Defaults to False.
+        """
+        with self._lock:
+            if flush:
+                for entry in self._entries.values():
+                    self._retire(entry)
+                self._entries.clear()
+            else:
+                self._expire(time.time())
+
+            ready, self._ready = self._ready, []
+
+        return [build_summary(entry) for entry in ready if entry.template is not None]
+
+    def _ensure_worker(self) -> None:
+        if self._send is None or self._stopped.is_set():
+            return
+
+        # Also restarts the thread in a child process after a fork
+        if self._thread is None or not self._thread.is_alive():
+            self._thread = threading.Thread(
+                target=self._run, name="raygun4py-aggregation", daemon=True
+            )
+            self._thread.start()
+
+    def _run(self) -> None:
+        while not self._stopped.is_set():
+            self._wakeup.wait(self._next_expiry())
+            self._wakeup.clear()
+
+            if self._stopped.is_set():
+                return
+
+            self._send_ready(self.collect())
+
+    def _next_expiry(self) -> float:
+        with self._lock:
+            if not self._entries:
+                return self.window
+            first_seen = next(iter(self._entries.values())).first_seen
+        return max(first_seen + self.window - time.time(), 0.0)
+
+    def _send_ready(self, summaries: list[raygunmsgs.RaygunMessage]) -> None:
+        assert self._send is not None
+        for summary in summaries:
+            try:
+                self._send(summary)
+            except Exception as e:
+                self.log.error(e)
+
+    def _shutdown(self) -> None:
+        self._stopped.set()
+        self._wakeup.set()
+        self._send_ready(self.collect(flush=True))
+
+    def _expire(self, now: float) -> None:
+        # Entries are kept in the order their windows opened, so expired ones are at the front
+        while self._entries:
+            key, entry = next(iter(self._entries.items()))
+            if now - entry.first_seen < self.window:
+                break
+            del self._entries[key]
+            self._retire(entry)
+
+    def _retire(self, entry: AggregateEntry) -> None:
+        if entry.occurrences > 1:
+            self._ready.append(entry)
+
+
+def summary_template(message: raygunmsgs.RaygunMessage) -> raygunmsgs.RaygunMessage:
+    template = message.copy()
+    details = dict(template.get_details())
+
+    if details.get("error") is not None:
+        details["error"] = _without_variables(details["error"])
+
+    template.set_details(details)
+    return template
+
+
+def _without_variables(error: Any) -> Any:
+    # Summaries only need to identify the error, so the captured variables are not kept alive
+    if not hasattr(error, "stackTrace"):
+        return error
+
+    error = copy.copy(error)
+    error.stackTrace = [dict(frame, localVariables=None) for frame in error.stackTrace]
+    if hasattr(error, "globalVariables"):
+        error.globalVariables = None
+    if getattr(error, "innerError", None) is not None:
+        error.innerError = _without_variables(error.innerError)
+    if getattr(error, "innerErrors", None) is not None:
+        error.innerErrors = [_without_variables(inner) for inner in error.innerErrors]
+    return error
+
+
+def build_summary(entry: AggregateEntry) -> raygunmsgs.RaygunMessage:
+    assert entry.template is not None
+
+    summary = entry.template.copy()
+    summary.occurredOn = datetime.fromtimestamp(entry.last_seen, timezone.utc)
+
+    details = dict(summary.get_details())
+    custom_data: dict[str, Any] = dict(details.get("userCustomData") or {})
+    custom_data.update(
+        {
+            "occurrenceCount": entry.occurrences,
+            "firstOccurredOn": datetime.fromtimestamp(
+                entry.first_seen, timezone.utc
+            ).isoformat(),
+            "lastOccurredOn": datetime.fromtimestamp(
+                entry.last_seen, timezone.utc
+            ).isoformat(),
+        }
+    )
+    details["userCustomData"] = custom_data
+    summary.set_details(details)
+    return summary
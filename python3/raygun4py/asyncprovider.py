@@ -0,0 +1,106 @@
+from __future__ import annotations
+
+import asyncio
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any
+
+from raygun4py import raygunmsgs
+from raygun4py.raygunprovider import ExcInfo, RaygunSender, SendResult, UserInfo
+
+
+class AsyncRaygunSender(RaygunSender):
+    """
+    A sender for reporting errors to Raygun from asyncio code.
+
+    Reports are captured on the event loop, where the exception's frames are still
+    available, then encoded and transmitted on other threads sharing the sender's pooled
+    HTTP connections, so the loop is never blocked on the network.
+
+    `send_exception` behaves as it does with `async_send`, which is always on for this
+    sender: it queues the report on the bounded background worker and returns a
+    `concurrent.futures.Future`, so the sender can be used anywhere a `RaygunSender` can,
+    such as `RaygunHandler`. Await `asend_exception` for the result instead.
+    """
+
+    def __init__(
+        self, api_key: str | None, config: dict[str, Any] | None = None
+    ) -> None:
+        """
+        Initialize an AsyncRaygunSender.
+
+        Parameters:
+            api_key (str): The API key for Raygun.
+            config (dict, optional): Configuration options. Defaults to an empty dictionary.
+        """
+        super().__init__(api_key, dict(config or {}, async_send=True))
+        self._executor = ThreadPoolExecutor(
+            max_workers=self.http_pool_size, thread_name_prefix="raygun4py-async"
+        )
+
+    async def asend_exception(
+        self,
+        exception: BaseException | None = None,
+        exc_info: ExcInfo | tuple[None, None, None] | None = None,
+        user_override: UserInfo = None,
+        **kwargs: Any,
+    ) -> SendResult | None:
+        """
+        Send an exception report to Raygun and wait for the result.
+
+        Accepts the same parameters as `RaygunSender.send_exception`.
+
+        Returns:
+            The result of the post request, or None if the report was ignored or cancelled.
+        """
+        self._send_summaries()
+        message = self._capture(exception, exc_info, user_override, kwargs)
+        if message is None:
+            return None
+
+        if self.batch_send:
+            # Batching goes through the shared background worker
+            return await asyncio.wrap_future(self._submit(message))
+
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, self._post, message)
+
+    def send_exception_nowait(
+        self,
+        exception: BaseException | None = None,
+        exc_info: ExcInfo | tuple[None, None, None] | None = None,
+        user_override: UserInfo = None,
+        **kwargs: Any,
+    ) -> asyncio.Future[SendResult] | None:
+        """
+        Capture an exception report now and transmit it in the background.
+
+        Must be called from a coroutine running on an event loop. Reports are queued on the
+        background worker, bounded by `async_queue_size` and `async_overflow_policy`.
+        Accepts the same parameters as `RaygunSender.send_exception`.
+
+        Returns:
+            asyncio.Future: Resolves to the result of the post request, and may be ignored. None if the report was ignored or cancelled.
+        """
+        # Fail before capturing when there is no running loop to resolve the result on
+        asyncio.get_running_loop()
+        self._send_summaries()
+        message = self._capture(exception, exc_info, user_override, kwargs)
+        if message is None:
+            return None
+        return asyncio.wrap_future(self._submit(message))
+
+    async def aflush(self, timeout: float | None = None) -> bool:
+        """Wait for every queued report to be transmitted, without blocking the event loop."""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, self.flush, timeout)
+
+    async def aclose(self, timeout: float | None = None) -> bool:
+        """Transmit any queued reports, then release the threads and pooled connections."""
+        loop = asyncio.get_running_loop()
+        drained = await loop.run_in_executor(self._executor, self.close, timeout)
+        self._executor.shutdown(wait=False)
+        return drained
+
+    def _submit(self, message: raygunmsgs.RaygunMessage) -> Future[SendResult]:
+        assert self._dispatcher is not None
+        return self._dispatcher.submit(message)
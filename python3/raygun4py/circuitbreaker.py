@@ -0,0 +1,91 @@
+from __future__ import annotations
+
+import threading
+import time
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class CircuitBreaker:
+    """
+    Stops sending to an endpoint after repeated failures.
+
+    The breaker opens after `failure_threshold` consecutive failures. While open, requests
+    are refused until `reset_timeout` seconds have passed, after which up to
+    `half_open_requests` trial requests are let through. A successful trial closes the
+    breaker again; a failed one re-opens it for another `reset_timeout`.
+    """
+
+    def __init__(
+        self,
+        failure_threshold: int = 5,
+        reset_timeout: float = 30.0,
+        half_open_requests: int = 1,
+    ) -> None:
+        """
+        Initialize a CircuitBreaker.
+
+        Parameters:
+            failure_threshold (int, optional): Consecutive failures that open the breaker. Defaults to 5.
+            reset_timeout (float, optional): Seconds to stay open before allowing trial requests. Defaults to 30.0.
+            half_open_requests (int, optional): Concurrent trial requests allowed while half-open. Defaults to 1.
+        """
+        self.failure_threshold = max(1, int(failure_threshold))
+        self.reset_timeout = reset_timeout
+        self.half_open_requests = max(1, int(half_open_requests))
+
+        self.short_circuited = 0
+
+        self._lock = threading.Lock()
+        self._state = CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._trials = 0
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            if self._state == OPEN and self._reset_elapsed():
+                return HALF_OPEN
+            return self._state
+
+    def allow_request(self) -> bool:
+        """
+        Check whether a request may be sent now.
+
+        Returns:
+            bool: False if the breaker is open, in which case the refusal is counted in `short_circuited`.
+        """
+        with self._lock:
+            if self._state == CLOSED:
+                return True
+
+            if self._state == OPEN and self._reset_elapsed():
+                self._state = HALF_OPEN
+                self._trials = 0
+
+            if self._state == HALF_OPEN and self._trials < self.half_open_requests:
+                self._trials += 1
+                return True
+
+            self.short_circuited += 1
+            return False
+
+    def record_success(self) -> None:
+        with self._lock:
+            self._state = CLOSED
+            self._failures = 0
+            self._trials = 0
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self._failures += 1
+            if self._state == HALF_OPEN or self._failures >= self.failure_threshold:
+                self._state = OPEN
+                self._opened_at = time.monotonic()
+                self._trials = 0
+
+    def _reset_elapsed(self) -> bool:
+        return time.monotonic() - self._opened_at >= self.reset_timeout
@@ -1,3 +1,4 @@
+from concurrent.futures import Future
 from optparse import OptionParser
 
 from raygun4py import raygunprovider
@@ -6,27 +7,38 @@ from raygun4py import raygunprovider
 def main():
     usage = "\n  raygun4py test <apikey>"
     parser = OptionParser(usage=usage)
+    parser.add_option(
+        "--async",
+        action="store_true",
+        dest="async_send",
+        default=False,
+        help="send the test exception from the background dispatch queue",
+    )
 
-    _, args = parser.parse_args()
+    options, args = parser.parse_args()
 
     if len(args) < 2 or not isinstance(args[1], str):
         print("Please provide your API key")
         parser.print_help()
     elif args[0] == "test":
-        send_test_exception(args[1])
+        send_test_exception(args[1], config={"async_send": options.async_send})
     else:
         print(f"Invalid command '{args[0]}'")
         parser.print_help()
 
 
-def send_test_exception(apikey):
-    client = raygunprovider.RaygunSender(apikey)
+def send_test_exception(apikey, config=None):
+    client = raygunprovider.RaygunSender(apikey, config=config)
 
     try:
         raise Exception("Test exception from Raygun4py (Python3)")
     except Exception:
         response = client.send_exception()
 
+        if isinstance(response, Future):
+            response = response.result()
+            client.close()
+
         if response[0] == 202:
             print("Success! Now check your Raygun dashboard at https://app.raygun.com")
         else:
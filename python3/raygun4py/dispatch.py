@@ -0,0 +1,380 @@
+from __future__ import annotations
+
+import atexit
+import logging
+import os
+import threading
+import time
+import weakref
+from collections import deque
+from collections.abc import Callable
+from concurrent.futures import Future
+from typing import Any
+
+OVERFLOW_DROP_NEWEST = "drop_newest"
+OVERFLOW_DROP_OLDEST = "drop_oldest"
+OVERFLOW_BLOCK = "block"
+
+OVERFLOW_POLICIES = (OVERFLOW_DROP_NEWEST, OVERFLOW_DROP_OLDEST, OVERFLOW_BLOCK)
+
+DROPPED_RESULT: tuple[int, str] = (429, "Dropped: dispatch queue full")
+
+SendResult = tuple[int, str]
+BatchHandler = Callable[[list[Any]], list[SendResult]]
+
+
+class BackgroundDispatcher:
+    """
+    A bounded queue drained by a single daemon worker thread.
+
+    Items are handed to `handler` on the worker thread and the value it returns
+    (or the exception it raises) is published on the `Future` returned by `submit`.
+
+    When a `batch_handler` is given, each item is first passed through `prepare` and the
+    prepared values are accumulated until `batch_max_entries`, `batch_max_bytes` or
+    `batch_max_latency` is reached, then handed to `batch_handler` together. It must
+    return one result per entry so that each Future is resolved individually.
+    """
+
+    log: logging.Logger = logging.getLogger(__name__)
+
+    def __init__(
+        self,
+        handler: Callable[[Any], SendResult],
+        queue_size: int = 1000,
+        overflow_policy: str = OVERFLOW_DROP_NEWEST,
+        block_timeout: float = 1.0,
+        shutdown_timeout: float = 5.0,
+        batch_handler: BatchHandler | None = None,
+        prepare: Callable[[Any], Any] | None = None,
+        batch_max_entries: int = 100,
+        batch_max_bytes: int | None = None,
+        batch_max_latency: float = 1.0,
+    ) -> None:
+        """
+        Initialize a BackgroundDispatcher.
+
+        Parameters:
+            handler (callable): Called on the worker thread for each queued item.
+            queue_size (int, optional): Maximum number of queued items. Defaults to 1000.
+            overflow_policy (str, optional): One of "drop_newest", "drop_oldest" or "block". Defaults to "drop_newest".
+            block_timeout (float, optional): Seconds to wait for space under the "block" policy. Defaults to 1.0.
+            shutdown_timeout (float, optional): Seconds to wait for the queue to drain at interpreter exit. Defaults to 5.0.
+            batch_handler (callable, optional): Called on the worker thread with a list of prepared items. Enables batching.
+            prepare (callable, optional): Converts each item before batching. The len() of its result counts towards batch_max_bytes.
+            batch_max_entries (int, optional): Maximum number of entries per batch. Defaults to 100.
+            batch_max_bytes (int, optional): Maximum size of a batch, counting the prepared entries as a JSON array. An entry that would not fit is sent in the next batch, and one larger than this on its own. Defaults to None (no limit).
+            batch_max_latency (float, optional): Maximum seconds an entry waits for its batch to fill. Defaults to 1.0.
+        """
+        if overflow_policy not in OVERFLOW_POLICIES:
+            raise ValueError(
+                f"Unknown overflow policy '{overflow_policy}', expected one of {', '.join(OVERFLOW_POLICIES)}"
+            )
+
+        self.handler = handler
+        self.queue_size = max(1, int(queue_size))
+        self.overflow_policy = overflow_policy
+        self.block_timeout = block_timeout
+        self.shutdown_timeout = shutdown_timeout
+        self.batch_handler = batch_handler
+        self.prepare = prepare
+        self.batch_max_entries = max(1, int(batch_max_entries))
+        self.batch_max_bytes = batch_max_bytes
+        self.batch_max_latency = batch_max_latency
+
+        self.sent = 0
+        self.failed = 0
+        self.dropped = 0
+
+        self._queue: deque[tuple[Any, Future[SendResult]]] = deque()
+        self._unfinished = 0
+        self._condition = threading.Condition()
+        self._thread: threading.Thread | None = None
+        self._pid = os.getpid()
+        self._closed = False
+        self._flush_requested = False
+
+        atexit.register(self._shutdown)
+        _dispatchers.add(self)
+
+    def submit(self, item: Any) -> Future[SendResult]:
+        """
+        Queue an item for the worker thread.
+
+        Parameters:
+            item: The item to pass to the handler.
+
+        Returns:
+            Future: Resolved with the handler's result, or with a dropped result if the queue overflowed.
+        """
+        future: Future[SendResult] = Future()
+
+        with self._condition:
+            if self._closed:
+                self._drop(future)
+                return future
+
+            self._check_fork()
+            self._ensure_worker()
+
+            if len(self._queue) >= self.queue_size:
+                if self.overflow_policy == OVERFLOW_DROP_OLDEST:
+                    _, oldest = self._queue.popleft()
+                    self._unfinished -= 1
+                    self._drop(oldest)
+                elif self.overflow_policy == OVERFLOW_BLOCK:
+                    deadline = time.monotonic() + self.block_timeout
+                    while len(self._queue) >= self.queue_size:
+                        remaining = deadline - time.monotonic()
+                        if remaining <= 0:
+                            break
+                        self._condition.wait(remaining)
+
+            if len(self._queue) >= self.queue_size:
+                self._drop(future)
+                return future
+
+            self._queue.append((item, future))
+            self._unfinished += 1
+            self._condition.notify_all()
+
+        return future
+
+    def flush(self, timeout: float | None = None) -> bool:
+        """
+        Block until every queued item has been handled.
+
+        Parameters:
+            timeout (float, optional): Maximum seconds to wait. Waits indefinitely if None.
+
+        Returns:
+            bool: True if the queue drained, False if the timeout expired first.
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+
+        with self._condition:
+            self._check_fork()
+            # Ask the worker to send a partially filled batch straight away
+            self._flush_requested = True
+            self._condition.notify_all()
+
+            while self._unfinished > 0:
+                if deadline is None:
+                    self._condition.wait()
+                    continue
+
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return False
+                self._condition.wait(remaining)
+
+        return True
+
+    def close(self, timeout: float | None = None) -> bool:
+        """
+        Stop accepting new items and wait for the queue to drain.
+
+        Parameters:
+            timeout (float, optional): Maximum seconds to wait. Waits indefinitely if None.
+
+        Returns:
+            bool: True if the queue drained, False if the timeout expired first.
+        """
+        drained = self.flush(timeout)
+
+        with self._condition:
+            self._closed = True
+            self._condition.notify_all()
+
+        # The exit hook would otherwise keep this dispatcher, and its handler's sender, alive
+        atexit.unregister(self._shutdown)
+        return drained
+
+    def pending(self) -> int:
+        with self._condition:
+            self._check_fork()
+            return self._unfinished
+
+    def _drop(self, future: Future[SendResult]) -> None:
+        self.dropped += 1
+        future.set_result(DROPPED_RESULT)
+
+    def _after_fork(self) -> None:
+        # Threads do not survive a fork, so a child process needs its own worker. Items
+        # the parent had queued are the parent's to send; sending them from the child too
+        # would report them twice. The lock is replaced too, since the fork may have
+        # happened while another thread held it.
+        self._condition = threading.Condition()
+        self._pid = os.getpid()
+        self._thread = None
+        self._queue.clear()
+        self._unfinished = 0
+        self._flush_requested = False
+
+    def _check_fork(self) -> None:
+        # A fork may not have run the register_at_fork hook, such as one made through
+        # os.fork in C code, so the pid is checked too
+        if self._pid != os.getpid():
+            self._pid = os.getpid()
+            self._thread = None
+            self._queue.clear()
+            self._unfinished = 0
+
+    def _ensure_worker(self) -> None:
+        if self._thread is None or not self._thread.is_alive():
+            self._thread = threading.Thread(
+                target=self._run, name="raygun4py-dispatcher", daemon=True
+            )
+            self._thread.start()
+
+    def _run(self) -> None:
+        if self.batch_handler is not None:
+            self._run_batches()
+            return
+
+        while True:
+            with self._condition:
+                while not self._queue and not self._closed:
+                    self._condition.wait()
+
+                if not self._queue:
+                    return
+
+                item, future = self._queue.popleft()
+                self._condition.notify_all()
+
+            self._handle(item, future)
+            self._finish(1)
+
+    def _handle(self, item: Any, future: Future[SendResult]) -> None:
+        if not future.set_running_or_notify_cancel():
+            return
+
+        try:
+            result = self.handler(item)
+        except Exception as e:
+            self._fail(future, e)
+        else:
+            self._resolve(future, result)
+
+    def _run_batches(self) -> None:
+        batch: list[tuple[Any, Future[SendResult]]] = []
+        batch_bytes = 0
+        deadline = 0.0
+
+        while True:
+            item: Any = None
+            future: Future[SendResult] | None = None
+            send_now = False
+
+            with self._condition:
+                while not self._queue and not self._closed:
+                    if batch and self._flush_requested:
+                        break
+                    if batch:
+                        remaining = deadline - time.monotonic()
+                        if remaining <= 0:
+                            break
+                        self._condition.wait(remaining)
+                    else:
+                        self._flush_requested = False
+                        self._condition.wait()
+
+                if self._queue:
+                    item, future = self._queue.popleft()
+                    self._condition.notify_all()
+                elif not batch:
+                    return
+                else:
+                    send_now = True
+
+            if future is not None:
+                if not future.set_running_or_notify_cancel():
+                    self._finish(1)
+                    continue
+
+                try:
+                    prepared = item if self.prepare is None else self.prepare(item)
+                except Exception as e:
+                    # A payload that cannot be prepared fails on its own without spoiling the batch
+                    self._fail(future, e)
+                    self._finish(1)
+                    continue
+
+                # Batches are measured as JSON arrays: each entry is preceded by a comma
+                # or the opening bracket, and the closing bracket adds one more byte
+                size = len(prepared) + 1
+                if (
+                    batch
+                    and self.batch_max_bytes is not None
+                    and batch_bytes + size + 1 > self.batch_max_bytes
+                ):
+                    # Send what has accumulated rather than let this entry overshoot the cap
+                    self._handle_batch(batch)
+                    self._finish(len(batch))
+                    batch = []
+                    batch_bytes = 0
+
+                if not batch:
+                    deadline = time.monotonic() + self.batch_max_latency
+                batch.append((prepared, future))
+                batch_bytes += size
+
+                # An entry too large for any batch is sent on its own straight away
+                send_now = len(batch) >= self.batch_max_entries or (
+                    self.batch_max_bytes is not None
+                    and batch_bytes + 1 >= self.batch_max_bytes
+                )
+
+            if send_now:
+                self._handle_batch(batch)
+                self._finish(len(batch))
+                batch = []
+                batch_bytes = 0
+
+    def _handle_batch(self, batch: list[tuple[Any, Future[SendResult]]]) -> None:
+        assert self.batch_handler is not None
+
+        try:
+            results = self.batch_handler([prepared for prepared, _ in batch])
+        except Exception as e:
+            for _, future in batch:
+                self._fail(future, e)
+            return
+
+        for (_, future), result in zip(batch, results):
+            self._resolve(future, result)
+
+    def _finish(self, count: int) -> None:
+        with self._condition:
+            self._unfinished -= count
+            self._condition.notify_all()
+
+    def _resolve(self, future: Future[SendResult], result: SendResult) -> None:
+        if 200 <= result[0] < 300:
+            self.sent += 1
+        else:
+            self.failed += 1
+        future.set_result(result)
+
+    def _fail(self, future: Future[SendResult], e: Exception) -> None:
+        self.failed += 1
+        self.log.error(e)
+        future.set_exception(e)
+
+    def _shutdown(self) -> None:
+        if not self._closed:
+            self.close(self.shutdown_timeout)
+
+
+# Dispatchers that may need resetting in a forked child
+_dispatchers: weakref.WeakSet[BackgroundDispatcher] = weakref.WeakSet()
+
+
+def _reset_after_fork() -> None:
+    for dispatcher in list(_dispatchers):
+        dispatcher._after_fork()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reset_after_fork)
@@ -0,0 +1,162 @@
+from __future__ import annotations
+
+import json
+import threading
+from collections.abc import Iterator
+from typing import Any
+
+import jsonpickle
+
+try:
+    import orjson
+
+    USE_ORJSON = True
+except ImportError:
+    USE_ORJSON = False
+
+
+def encode(document: Any) -> str:
+    """
+    Encode a report to JSON.
+
+    Reports are converted to plain dicts and lists with `to_dict` and encoded by orjson
+    when it is installed, otherwise by the stdlib json C encoder. Objects neither knows
+    about, such as arbitrary values in userCustomData, are flattened by jsonpickle.
+
+    Parameters:
+        document: A RaygunMessage, or anything else with a `to_dict` method, or plain JSON data.
+
+    Returns:
+        str: The JSON document.
+    """
+    if hasattr(document, "to_dict"):
+        document = document.to_dict()
+
+    if USE_ORJSON:
+        try:
+            return orjson.dumps(
+                document, default=flatten, option=orjson.OPT_NON_STR_KEYS
+            ).decode("utf-8")
+        except TypeError:
+            pass
+
+    return _dumps(document)
+
+
+def encode_bytes(document: Any, budget: int | None = None) -> bytes:
+    """
+    Encode a report to UTF-8 JSON bytes, checking its size as it is written.
+
+    The document is written a section at a time (each stack frame, each custom data entry
+    and so on, encoded by the same encoders as `encode`) into a buffer reused by the
+    calling thread. As soon as the output grows past `budget` bytes encoding stops, so an
+    oversized report costs no more than the budget to discover.
+
+    Parameters:
+        document: A RaygunMessage, or anything else with a `to_dict` method, or plain JSON data.
+        budget (int, optional): Maximum size of the payload in bytes. Defaults to None (unlimited).
+
+    Returns:
+        bytes: The JSON document.
+
+    Raises:
+        PayloadTooLarge: If the payload is larger than `budget`.
+    """
+    buffer = _buffer()
+    size = 0
+    for chunk in _sections(document, 0):
+        end = size + len(chunk)
+        buffer[size:end] = chunk
+        size = end
+        if budget is not None and size > budget:
+            raise PayloadTooLarge(size, budget)
+
+    payload = memoryview(buffer)[:size].tobytes()
+    if len(buffer) > MAX_RETAINED_BUFFER:
+        # Don't keep a buffer the size of an unusually large report alive per thread
+        _local.buffer = bytearray()
+    return payload
+
+
+def encoded_size(document: Any) -> int:
+    """Return the size in bytes of the encoded document, without keeping the encoded payload."""
+    return sum(len(chunk) for chunk in _sections(document, 0))
+
+
+class PayloadTooLarge(Exception):
+    """Raised by `encode_bytes` once a payload has grown past its budget."""
+
+    def __init__(self, size: int, budget: int) -> None:
+        super().__init__(f"Payload exceeded {budget} bytes")
+        self.size = size
+        self.budget = budget
+
+
+# Containers nested up to this deep are written a member at a time; anything deeper is
+# encoded in one call. Depth 4 is a single stack frame or custom data entry.
+STREAM_DEPTH = 4
+MAX_RETAINED_BUFFER = 1024 * 1024
+
+_local = threading.local()
+
+
+def _buffer() -> bytearray:
+    buffer: bytearray | None = getattr(_local, "buffer", None)
+    if buffer is None:
+        buffer = _local.buffer = bytearray()
+    return buffer
+
+
+def _sections(value: Any, depth: int) -> Iterator[bytes]:
+    if hasattr(value, "to_dict"):
+        value = value.to_dict()
+
+    if depth < STREAM_DEPTH and type(value) is dict:
+        if all(type(key) is str for key in value):
+            separator = b"{"
+            for key, item in value.items():
+                yield separator + _dumps_bytes(key) + b":"
+                yield from _sections(item, depth + 1)
+                separator = b","
+            yield b"}" if separator == b"," else b"{}"
+            return
+    elif depth < STREAM_DEPTH and type(value) in (list, tuple):
+        separator = b"["
+        for item in value:
+            yield separator
+            yield from _sections(item, depth + 1)
+            separator = b","
+        yield b"]" if separator == b"," else b"[]"
+        return
+
+    yield _dumps_bytes(value)
+
+
+def _dumps_bytes(value: Any) -> bytes:
+    if USE_ORJSON:
+        try:
+            return orjson.dumps(value, default=flatten, option=orjson.OPT_NON_STR_KEYS)
+        except TypeError:
+            pass
+    # Lone surrogates, such as those os.environ decodes undecodable bytes to, are written
+    # as \udcxx escapes, the way json writes them with ensure_ascii; they only occur
+    # inside JSON strings, where the escape is valid
+    return _dumps(value).encode("utf-8", "backslashreplace")
+
+
+def _dumps(document: Any) -> str:
+    try:
+        return json.dumps(
+            document, default=flatten, ensure_ascii=False, separators=(",", ":")
+        )
+    except (TypeError, ValueError):
+        # Keys json cannot represent, such as tuples; jsonpickle stringifies them
+        payload: str = jsonpickle.encode(document, unpicklable=False)
+        return payload
+
+
+def flatten(value: Any) -> Any:
+    """Convert an object the JSON encoders do not support into plain data, the way jsonpickle does."""
+    if hasattr(value, "to_dict"):
+        return value.to_dict()
+    return jsonpickle.Pickler(unpicklable=False).flatten(value)
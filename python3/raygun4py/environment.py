@@ -0,0 +1,115 @@
+from __future__ import annotations
+
+import os
+import platform
+import socket
+import sys
+import threading
+from collections.abc import Mapping
+from types import MappingProxyType
+from typing import Any
+
+try:
+    import multiprocessing
+
+    USE_MULTIPROCESSING = True
+except ImportError:
+    USE_MULTIPROCESSING = False
+
+_lock = threading.Lock()
+_snapshot: Mapping[str, Any] | None = None
+_hostname: str | None = None
+_pid: int | None = None
+
+
+def snapshot() -> Mapping[str, Any]:
+    """
+    Return the details of the machine and process sent with every report.
+
+    The details are gathered once per process, since some of them are slow to look up:
+    `platform.architecture()` can run the `file` command. They are gathered again in a
+    child process after a fork, or after `invalidate` is called.
+
+    Returns:
+        Mapping: A read-only mapping; environmentVariables is a read-only copy of os.environ.
+    """
+    global _snapshot
+    _check_pid()
+    current = _snapshot
+    if current is None:
+        current = MappingProxyType(_collect())
+        with _lock:
+            _snapshot = current
+    return current
+
+
+def hostname() -> str:
+    """Return the machine name, looked up once per process like `snapshot`."""
+    global _hostname
+    _check_pid()
+    current = _hostname
+    if current is None:
+        current = socket.gethostname()
+        with _lock:
+            _hostname = current
+    return current
+
+
+def invalidate() -> None:
+    """
+    Forget the cached details, so they are gathered again for the next report.
+
+    Call this after changing os.environ, or anything else sent as part of the environment,
+    when reports should reflect the change.
+    """
+    global _snapshot, _hostname
+    with _lock:
+        _snapshot = None
+        _hostname = None
+
+
+def _check_pid() -> None:
+    # A fork may not have run the register_at_fork hook, such as one made through
+    # os.fork in C code, so the pid is checked too
+    global _pid
+    pid = os.getpid()
+    if _pid != pid:
+        invalidate()
+        _pid = pid
+
+
+def _collect() -> dict[str, Any]:
+    environment: dict[str, Any] = {
+        "environmentVariables": MappingProxyType(dict(os.environ)),
+        "runtimeLocation": sys.executable,
+        "runtimeVersion": "Python " + sys.version,
+    }
+
+    # Wrap these so we gracefully fail if we cannot access the system details for any reason
+    try:
+        environment["processorCount"] = (
+            multiprocessing.cpu_count() if USE_MULTIPROCESSING else "n/a"
+        )
+    except Exception:  # pragma: no cover
+        pass
+
+    try:
+        environment["architecture"] = platform.architecture()[0]
+    except Exception:  # pragma: no cover
+        pass
+
+    try:
+        environment["cpu"] = platform.processor()
+    except Exception:  # pragma: no cover
+        pass
+
+    try:
+        environment["oSVersion"] = "%s %s" % (platform.system(), platform.release())
+    except Exception:  # pragma: no cover
+        pass
+
+    return environment
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=invalidate)
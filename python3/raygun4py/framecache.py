@@ -0,0 +1,130 @@
+from __future__ import annotations
+
+import threading
+import time
+from collections import OrderedDict
+from collections.abc import Hashable, Sequence
+from types import CodeType, FrameType
+from typing import Any
+
+from raygun4py import sourcecache
+
+MAX_CACHED_FRAMES = 4096
+MAX_CACHED_TRACEBACKS = 1024
+
+
+class LRUCache:
+    """A thread-safe mapping holding at most `maxsize` items, evicting the least recently used."""
+
+    def __init__(self, maxsize: int) -> None:
+        self.maxsize = maxsize
+        self._data: OrderedDict[Hashable, Any] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable) -> Any:
+        with self._lock:
+            try:
+                self._data.move_to_end(key)
+            except KeyError:
+                return None
+            return self._data[key]
+
+    def put(self, key: Hashable, value: Any) -> None:
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            if len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+
+# Keys use id() of code objects, which is cheaper to hash than the code object itself.
+# Each cached value holds a reference to its code objects, so an id can't be reused by
+# another code object while its entries are cached.
+_frames = LRUCache(MAX_CACHED_FRAMES)
+_tracebacks = LRUCache(MAX_CACHED_TRACEBACKS)
+
+
+class _Traceback:
+    __slots__ = ("entries", "filenames", "generation", "checked")
+
+    def __init__(
+        self, entries: tuple[tuple[CodeType, dict[str, Any]], ...], generation: int
+    ) -> None:
+        self.entries = entries
+        self.filenames = {entry["fileName"] for _code, entry in entries}
+        self.generation = generation
+        self.checked = time.monotonic()
+
+
+def stack_entries(
+    frames: Sequence[tuple[FrameType, str, int, str]], context_lines: int = 0
+) -> list[dict[str, Any]]:
+    """
+    Return the parts of stack trace entries that are the same every time a line runs.
+
+    Entries hold the line number, function name, file name and source line of each frame,
+    and with `context_lines` the lines around it as preContext and postContext. A
+    traceback seen before, frame for frame and line for line, is answered with a single
+    cache lookup; otherwise entries are built per frame, reusing those of lines seen in
+    other tracebacks. Entries are rebuilt once `sourcecache` sees their files change.
+
+    Parameters:
+        frames (list): (frame, filename, line number, function name) tuples, outermost first.
+        context_lines (int, optional): Lines of source to include before and after each line. Defaults to 0.
+
+    Returns:
+        list: New dicts, one per frame, that the caller may add per-occurrence data to.
+    """
+    key = (context_lines, tuple((id(frame[0].f_code), frame[2]) for frame in frames))
+    cached = _tracebacks.get(key)
+    if cached is None or not _is_current(cached):
+        generation = sourcecache.generation
+        cached = _Traceback(
+            tuple(_entry(*frame, context_lines) for frame in frames), generation
+        )
+        _tracebacks.put(key, cached)
+    return [dict(entry) for _code, entry in cached.entries]
+
+
+def clear_cache() -> None:
+    """Forget every cached stack entry and source file, for example after source files have changed."""
+    _frames.clear()
+    _tracebacks.clear()
+    sourcecache.clear_cache()
+
+
+def _is_current(cached: _Traceback) -> bool:
+    now = time.monotonic()
+    if now - cached.checked >= sourcecache.CHECK_INTERVAL:
+        cached.checked = now
+        sourcecache.refresh(cached.filenames)
+    return cached.generation == sourcecache.generation
+
+
+def _entry(
+    frame: FrameType, filename: str, lineno: int, name: str, context_lines: int
+) -> tuple[CodeType, dict[str, Any]]:
+    code = frame.f_code
+    key = (id(code), lineno, context_lines)
+    cached = _frames.get(key)
+    if cached is None or cached[2] != sourcecache.generation:
+        entry = {
+            "lineNumber": lineno,
+            "className": name,
+            "fileName": filename,
+            "methodName": sourcecache.getline(filename, lineno, frame.f_globals),
+        }
+        if context_lines:
+            entry["preContext"], entry["postContext"] = sourcecache.get_context(
+                filename, lineno, context_lines, frame.f_globals
+            )
+        cached = (code, entry, sourcecache.generation)
+        _frames.put(key, cached)
+    return cached[0], cached[1]
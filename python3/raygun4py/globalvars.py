@@ -0,0 +1,83 @@
+from __future__ import annotations
+
+import fnmatch
+import types
+from collections.abc import Callable
+from typing import Any
+
+# Objects that are part of a module's code rather than its state
+_EXCLUDED_TYPES = (
+    types.ModuleType,
+    types.FunctionType,
+    types.BuiltinFunctionType,
+    types.MethodType,
+    type,
+)
+
+
+class GlobalsCapture:
+    """
+    Selects and renders the global variables of the module an error was raised in.
+
+    Modules, functions, classes and names starting with a double underscore are left out.
+    `include` and `exclude` are lists of name globs: when `include` is set only matching
+    names are captured (whatever their type), and names matching `exclude` never are.
+    Rendered values are added in the module's own order until `max_size` characters of
+    names and values have been captured.
+    """
+
+    def __init__(
+        self,
+        include: list[str] | None = None,
+        exclude: list[str] | None = None,
+        max_size: int | None = 16384,
+    ) -> None:
+        """
+        Initialize a GlobalsCapture.
+
+        Parameters:
+            include (list, optional): Name globs of the only globals captured. Defaults to None (all).
+            exclude (list, optional): Name globs of globals that are never captured. Defaults to None.
+            max_size (int, optional): Characters of names and values captured per error. Defaults to 16384.
+        """
+        self.include = list(include or [])
+        self.exclude = list(exclude or [])
+        self.max_size = max_size
+
+    def capture(
+        self, variables: dict[str, Any], render: Callable[[str, Any], str]
+    ) -> dict[str, str]:
+        """
+        Render the wanted globals from a module's globals dict.
+
+        Parameters:
+            variables (dict): The globals of a frame.
+            render (callable): Converts a name and value to the string sent in the report.
+
+        Returns:
+            dict: The rendered globals.
+        """
+        result: dict[str, str] = {}
+        size = 0
+
+        for name, value in list(dict.items(variables)):
+            if not self._wanted(name, value):
+                continue
+
+            text = render(name, value)
+            size += len(name) + len(text)
+            if self.max_size is not None and size > self.max_size:
+                break
+
+            result[name] = text
+        return result
+
+    def _wanted(self, name: str, value: Any) -> bool:
+        if any(fnmatch.fnmatchcase(name, pattern) for pattern in self.exclude):
+            return False
+        if self.include:
+            return any(fnmatch.fnmatchcase(name, pattern) for pattern in self.include)
+        return not name.startswith("__") and not isinstance(value, _EXCLUDED_TYPES)
+
+
+default_capture = GlobalsCapture()
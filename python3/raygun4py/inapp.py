@@ -0,0 +1,129 @@
+from __future__ import annotations
+
+import fnmatch
+import os
+import site
+import sysconfig
+import threading
+from types import CodeType, FrameType
+
+MAX_CACHED_CODE = 4096
+
+
+def _normalize(path: str) -> str:
+    return os.path.normcase(os.path.abspath(path))
+
+
+def _library_paths() -> tuple[tuple[str, ...], tuple[str, ...]]:
+    paths = sysconfig.get_paths()
+    stdlib = {paths[key] for key in ("stdlib", "platstdlib") if key in paths}
+
+    packages = {paths[key] for key in ("purelib", "platlib") if key in paths}
+    try:
+        packages.update(site.getsitepackages())
+        packages.add(site.getusersitepackages())
+    except AttributeError:  # pragma: no cover
+        # Some virtualenv versions ship a site module without these
+        pass
+
+    def as_prefixes(directories: set[str]) -> tuple[str, ...]:
+        return tuple(_normalize(d).rstrip(os.sep) + os.sep for d in directories if d)
+
+    return as_prefixes(stdlib), as_prefixes(packages)
+
+
+_STDLIB_PREFIXES, _PACKAGE_PREFIXES = _library_paths()
+_PACKAGE_SEGMENTS = (
+    os.sep + "site-packages" + os.sep,
+    os.sep + "dist-packages" + os.sep,
+)
+
+
+class FrameClassifier:
+    """
+    Decides whether a stack frame belongs to the application or to a library.
+
+    Frames are in-app unless their file is part of the standard library or an installed
+    package (under site-packages or dist-packages). `include` and `exclude` override this:
+    entries containing a path separator are file path prefixes, anything else is a module
+    name or glob, where "myapp" also matches its submodules. `include` wins over `exclude`.
+    Results are cached per code object.
+    """
+
+    def __init__(
+        self, include: list[str] | None = None, exclude: list[str] | None = None
+    ) -> None:
+        """
+        Initialize a FrameClassifier.
+
+        Parameters:
+            include (list, optional): Paths or module patterns that are always in-app. Defaults to None.
+            exclude (list, optional): Paths or module patterns that are never in-app. Defaults to None.
+        """
+        self.include = self._compile(include or [])
+        self.exclude = self._compile(exclude or [])
+
+        self._lock = threading.Lock()
+        self._cache: dict[CodeType, bool] = {}
+
+    def is_in_app(self, frame: FrameType) -> bool:
+        code = frame.f_code
+        in_app = self._cache.get(code)
+        if in_app is not None:
+            return in_app
+
+        module = frame.f_globals.get("__name__")
+        in_app = self.classify(
+            code.co_filename, module if isinstance(module, str) else ""
+        )
+
+        with self._lock:
+            if len(self._cache) >= MAX_CACHED_CODE:
+                self._cache.clear()
+            self._cache[code] = in_app
+        return in_app
+
+    def classify(self, filename: str, module: str) -> bool:
+        if self._matches(self.include, filename, module):
+            return True
+        if self._matches(self.exclude, filename, module):
+            return False
+
+        if filename.startswith("<"):
+            # Frozen modules are part of the interpreter; other pseudo files such as
+            # "<string>" hold code the application compiled itself
+            return not filename.startswith("<frozen")
+
+        path = _normalize(filename)
+        if any(segment in path for segment in _PACKAGE_SEGMENTS):
+            return False
+        if path.startswith(_PACKAGE_PREFIXES) or path.startswith(_STDLIB_PREFIXES):
+            return False
+        return True
+
+    def _compile(self, patterns: list[str]) -> list[tuple[bool, str]]:
+        compiled = []
+        for pattern in patterns:
+            if os.sep in pattern or "/" in pattern:
+                compiled.append((True, _normalize(pattern)))
+            else:
+                compiled.append((False, pattern))
+        return compiled
+
+    def _matches(
+        self, patterns: list[tuple[bool, str]], filename: str, module: str
+    ) -> bool:
+        for is_path, pattern in patterns:
+            if is_path:
+                if _normalize(filename).startswith(pattern):
+                    return True
+            elif (
+                module == pattern
+                or module.startswith(pattern + ".")
+                or fnmatch.fnmatchcase(module, pattern)
+            ):
+                return True
+        return False
+
+
+default_classifier = FrameClassifier()
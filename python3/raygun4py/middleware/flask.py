@@ -52,7 +52,7 @@ class Provider(object):
         else:
             kwargs["extra_environment_data"] = env
 
-        self.sender.send_exception(
+        return self.sender.send_exception(
             exception=exception, exc_info=exc_info, user_override=user, **kwargs
         )
 
@@ -0,0 +1,110 @@
+from __future__ import annotations
+
+import threading
+import time
+from collections import OrderedDict
+
+
+class TokenBucket:
+    """A token bucket refilled continuously at `rate` tokens per second, holding at most `burst` tokens."""
+
+    def __init__(self, rate: float, burst: float) -> None:
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self.updated = time.monotonic()
+
+    def consume(self, now: float) -> bool:
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+        if self.tokens < 1:
+            return False
+
+        self.tokens -= 1
+        return True
+
+
+class RateLimiter:
+    """
+    Limits how many reports are captured, both overall and per key (such as the exception class).
+
+    Suppressed reports are counted in `suppressed` and, per key, in `suppressed_by_key`.
+    At most `max_keys` per-key buckets are kept; the least recently used are evicted.
+    """
+
+    def __init__(
+        self,
+        rate: float | None = None,
+        burst: float | None = None,
+        per_key_rate: float | None = None,
+        per_key_burst: float | None = None,
+        max_keys: int = 1000,
+    ) -> None:
+        """
+        Initialize a RateLimiter.
+
+        Parameters:
+            rate (float, optional): Reports per second allowed overall. Defaults to None (unlimited).
+            burst (float, optional): Reports allowed at once overall. Defaults to max(1, rate).
+            per_key_rate (float, optional): Reports per second allowed for each key. Defaults to None (unlimited).
+            per_key_burst (float, optional): Reports allowed at once for each key. Defaults to max(1, per_key_rate).
+            max_keys (int, optional): Maximum number of keys tracked. Defaults to 1000.
+        """
+        self.per_key_rate = per_key_rate
+        self.per_key_burst = (
+            per_key_burst
+            if per_key_burst is not None
+            else max(1.0, per_key_rate or 0.0)
+        )
+        self.max_keys = max_keys
+
+        self.suppressed = 0
+        self.suppressed_by_key: OrderedDict[str, int] = OrderedDict()
+
+        self._lock = threading.Lock()
+        self._bucket: TokenBucket | None = None
+        if rate is not None:
+            self._bucket = TokenBucket(
+                rate, burst if burst is not None else max(1.0, rate)
+            )
+        self._key_buckets: OrderedDict[str, TokenBucket] = OrderedDict()
+
+    def allow(self, key: str) -> bool:
+        """
+        Take a token for `key`, and from the overall bucket.
+
+        Parameters:
+            key (str): The grouping key, such as the exception's class name.
+
+        Returns:
+            bool: False if the report should be suppressed.
+        """
+        now = time.monotonic()
+
+        with self._lock:
+            allowed = self._allow_key(key, now) and (
+                self._bucket is None or self._bucket.consume(now)
+            )
+
+            if not allowed:
+                self.suppressed += 1
+                self.suppressed_by_key[key] = self.suppressed_by_key.pop(key, 0) + 1
+                if len(self.suppressed_by_key) > self.max_keys:
+                    self.suppressed_by_key.popitem(last=False)
+
+            return allowed
+
+    def _allow_key(self, key: str, now: float) -> bool:
+        if self.per_key_rate is None:
+            return True
+
+        bucket = self._key_buckets.pop(key, None)
+        if bucket is None:
+            bucket = TokenBucket(self.per_key_rate, self.per_key_burst)
+        self._key_buckets[key] = bucket
+
+        if len(self._key_buckets) > self.max_keys:
+            self._key_buckets.popitem(last=False)
+
+        return bucket.consume(now)
@@ -1,27 +1,31 @@
 from __future__ import annotations
 
-import inspect
+import heapq
 import logging
-import os
-import sys
+from collections.abc import Iterator
+from datetime import datetime, timezone
 from types import FrameType, TracebackType
 from typing import Any
 
-import jsonpickle
-
-from raygun4py import __version__
+from raygun4py import (
+    __version__,
+    encoding,
+    environment,
+    framecache,
+    globalvars,
+    http_utilities,
+    inapp,
+    saferepr,
+)
 
-try:
-    import multiprocessing
+REMOVED = "Removed"
+REMOVED_SIZE = encoding.encoded_size(REMOVED)
 
-    USE_MULTIPROCESSING = True
-except ImportError:
-    USE_MULTIPROCESSING = False
-
-import platform
-from datetime import datetime, timezone
-
-from raygun4py import http_utilities
+# Recursion is collapsed when a cycle of up to this many frames repeats
+MAX_RECURSION_CYCLE = 10
+MIN_RECURSION_REPEATS = 4
+# Errors captured for one report, across chained errors and exception groups
+MAX_CHAINED_ERRORS = 100
 
 
 class RaygunMessageBuilder:
@@ -44,42 +48,13 @@ class RaygunMessageBuilder:
     def set_environment_details(
         self, extra_environment_data: dict[str, Any] | None
     ) -> RaygunMessageBuilder:
-        self.raygunMessage.details["environment"] = {
-            "environmentVariables": dict(os.environ),
-            "runtimeLocation": sys.executable,
-            "runtimeVersion": "Python " + sys.version,
-        }
-
+        # The cached snapshot is shared, so each report gets its own copy
+        details = dict(environment.snapshot())
         if self.options.get("transmit_environment_variables", True) is False:
-            self.raygunMessage.details["environment"]["environmentVariables"] = None
-
-        # Wrap these so we gracefully fail if we cannot access the system details for any reason
-        try:
-            self.raygunMessage.details["environment"]["processorCount"] = (
-                multiprocessing.cpu_count() if USE_MULTIPROCESSING else "n/a"
-            )
-        except Exception:  # pragma: no cover
-            pass
-
-        try:
-            self.raygunMessage.details["environment"]["architecture"] = (
-                platform.architecture()[0]
-            )
-        except Exception:  # pragma: no cover
-            pass
-
-        try:
-            self.raygunMessage.details["environment"]["cpu"] = platform.processor()
-        except Exception:  # pragma: no cover
-            pass
-
-        try:
-            self.raygunMessage.details["environment"]["oSVersion"] = "%s %s" % (
-                platform.system(),
-                platform.release(),
-            )
-        except Exception:  # pragma: no cover
-            pass
+            details["environmentVariables"] = None
+        else:
+            details["environmentVariables"] = dict(details["environmentVariables"])
+        self.raygunMessage.details["environment"] = details
 
         if extra_environment_data is not None:
             merged = extra_environment_data.copy()
@@ -109,7 +84,9 @@ class RaygunMessageBuilder:
         if type(user_custom_data) is dict:
             if not self.raygunMessage.details.get("userCustomData"):
                 self.raygunMessage.details["userCustomData"] = dict()
-            self.raygunMessage.details["userCustomData"].update(user_custom_data)
+            self.raygunMessage.details["userCustomData"].update(
+                saferepr.sanitize(user_custom_data, self._safe_repr())
+            )
         return self
 
     def set_tags(self, tags: list[str] | None) -> RaygunMessageBuilder:
@@ -139,6 +116,14 @@ class RaygunMessageBuilder:
             self.raygunMessage.details["user"] = user
         return self
 
+    def _safe_repr(self) -> saferepr.SafeRepr:
+        return saferepr.SafeRepr(
+            max_depth=self.options.get("max_value_depth", 5),
+            max_width=self.options.get("max_value_width", 100),
+            max_length=self.options.get("max_value_length"),
+            time_limit=self.options.get("value_time_limit", 0.1),
+        )
+
 
 class RaygunMessage:
     """Represents a message to be sent to Raygun."""
@@ -170,6 +155,15 @@ class RaygunMessage:
     ) -> None:
         self.details["error"] = error
 
+    def to_dict(self) -> dict[str, Any]:
+        """Return the message as plain data ready for JSON encoding, in the Raygun API schema."""
+        details = self.details
+        error = details.get("error")
+        if error is not None and hasattr(error, "to_dict"):
+            details = dict(details, error=error.to_dict())
+
+        return {"occurredOn": self.occurredOn.isoformat(), "details": details}
+
 
 class RaygunErrorMessage:
     """Represents an error message with stack trace information."""
@@ -182,6 +176,7 @@ class RaygunErrorMessage:
     globalVariables: dict[str, Any] | None
     data: str
     innerError: RaygunErrorMessage | None
+    innerErrors: list[RaygunErrorMessage] | None
 
     def __init__(
         self,
@@ -190,6 +185,9 @@ class RaygunErrorMessage:
         exc_traceback: TracebackType | None = None,
         options: dict[str, Any] | None = None,
         custom_message: str | None = None,
+        *,
+        _chain: _ChainCapture | None = None,
+        _depth: int = 0,
     ) -> None:
         self.className = exc_type.__name__ if exc_type is not None else None
         self.message = (
@@ -200,36 +198,83 @@ class RaygunErrorMessage:
         self.stackTrace = []
         self.globalVariables = None
         self.innerError = None
+        self.innerErrors = None
+
+        limits = options or {}
+        chain = _chain if _chain is not None else _ChainCapture()
+        if exc_value is not None:
+            chain.seen.add(id(exc_value))
+        safe_repr = saferepr.SafeRepr(
+            max_depth=limits.get("max_value_depth", 5),
+            max_width=limits.get("max_value_width", 100),
+            max_length=limits.get("max_value_length"),
+            time_limit=limits.get("value_time_limit", 0.1),
+        )
 
         try:
-            frames = inspect.getinnerframes(exc_traceback)  # type: ignore[arg-type]
+            frames = self._walk_traceback(
+                self._skip_outer_frames(exc_traceback, limits.get("max_frames"))
+            )
+            repeats: dict[int, tuple[int, int]] = {}
+            if limits.get("collapse_recursion", True):
+                frames, repeats = self._collapse_recursion(frames)
 
             if frames:
-                for frame in frames:
+                classifier = limits.get("frame_classifier") or inapp.default_classifier
+                in_app = [self._is_in_app(classifier, frame[0]) for frame in frames]
+
+                with_locals = [False] * len(frames)
+                if (
+                    options is not None
+                    and "transmitLocalVariables" in options
+                    and options["transmitLocalVariables"] is True
+                ):
+                    # Locals are captured for the innermost frames, which are the most useful
+                    remaining = limits.get("max_frames_with_locals")
+                    for index in reversed(range(len(frames))):
+                        if remaining is not None and remaining <= 0:
+                            break
+                        if limits.get("in_app_locals_only") and not in_app[index]:
+                            continue
+                        with_locals[index] = True
+                        if remaining is not None:
+                            remaining -= 1
+
+                # Only the variables are captured afresh for a traceback seen before
+                entries = framecache.stack_entries(
+                    frames, limits.get("source_context_lines") or 0
+                )
+                for index, entry in enumerate(entries):
+                    if index in repeats:
+                        self.stackTrace.append(
+                            self._repeat_entry(frames, index, *repeats[index], in_app)
+                        )
+
                     localVariables: dict[str, str] | None = None
-                    if (
-                        options is not None
-                        and "transmitLocalVariables" in options
-                        and options["transmitLocalVariables"] is True
-                    ):
-                        localVariables = self._get_locals(frame[0])
-
-                    self.stackTrace.append(
-                        {
-                            "lineNumber": frame[2],
-                            "className": frame[3],
-                            "fileName": frame[1],
-                            "methodName": frame[4][0] if frame[4] is not None else None,
-                            "localVariables": localVariables,
-                        }
-                    )
+                    if with_locals[index]:
+                        localVariables = self._get_shared_locals(
+                            chain,
+                            frames[index][0],
+                            safe_repr,
+                            limits.get("max_locals_per_frame"),
+                        )
+
+                    entry["localVariables"] = localVariables
+                    entry["inApp"] = in_app[index]
+                    self.stackTrace.append(entry)
+                # Globals are captured once per report, for the outermost error
                 if (
                     options is not None
                     and "transmitGlobalVariables" in options
                     and options["transmitGlobalVariables"] is True
                     and len(frames) > 0
+                    and _depth == 0
                 ):
-                    self.globalVariables = frames[-1][0].f_globals.copy()
+                    capture = limits.get("global_capture") or globalvars.default_capture
+                    self.globalVariables = capture.capture(
+                        frames[-1][0].f_globals,
+                        lambda key, value: self._to_string(key, value, safe_repr),
+                    )
         except Exception:
             pass
         finally:
@@ -238,131 +283,307 @@ class RaygunErrorMessage:
 
         self.data = ""
 
-        if isinstance(exc_value, Exception):
-            nestedException: BaseException | None = None
-
-            if exc_value.__cause__:
-                nestedException = exc_value.__cause__
-            elif exc_value.__context__:
-                nestedException = exc_value.__context__
-
+        if exc_value is not None and _depth < limits.get("max_error_chain_depth", 10):
+            nestedException = exc_value.__cause__ or exc_value.__context__
             if nestedException is not None:
-                self.innerError = RaygunErrorMessage(
-                    type(nestedException),
-                    nestedException,
-                    nestedException.__traceback__,
-                    options,
+                self.innerError = self._capture_chained(
+                    nestedException, options, chain, _depth
                 )
 
-        try:
-            jsonpickle.encode(self, unpicklable=False)
-        except Exception:
-            if self.globalVariables:
-                self.globalVariables = None
-
-                try:
-                    jsonpickle.encode(self, unpicklable=False)
-                except Exception:
-                    for stack_entry in self.stackTrace:
-                        if "localVariables" in stack_entry:
-                            stack_entry["localVariables"] = None
+            if _is_exception_group(exc_value):
+                max_errors = limits.get("max_exception_group_errors", 10)
+                grouped = [
+                    self._capture_chained(exception, options, chain, _depth)
+                    for exception in exc_value.exceptions[:max_errors]  # type: ignore[attr-defined]
+                ]
+                self.innerErrors = [error for error in grouped if error is not None]
 
     def check_and_modify_payload_size(
-        self, options: dict[str, Any], max_size_kb: int = 128
+        self,
+        options: dict[str, Any],
+        max_size_kb: int = 128,
+        payload_size: int | None = None,
     ) -> None:
-        payload = jsonpickle.encode(self, unpicklable=False)
+        """
+        Replace the largest variables with "Removed" until the encoded report fits in `max_size_kb`.
+
+        The encoded size of each variable is measured once, and variables are evicted largest
+        first. Sizes are weighted by distance from the innermost frame, so variables of the
+        frames closest to the error are kept longest; globals and variables of chained errors
+        go before those of the innermost frames.
+
+        Parameters:
+            options (dict): Sender options; `log_payload_size_limit_breaches` logs each removal.
+            max_size_kb (int, optional): The size budget. Defaults to 128.
+            payload_size (int, optional): Encoded size in bytes of the whole report, if already known. Defaults to the encoded size of this error.
+        """
+        if payload_size is None:
+            payload_size = encoding.encoded_size(self)
+
+        excess = payload_size - max_size_kb * 1024
+        if excess <= 0:
+            return
+
+        log_removals = (
+            options is not None
+            and "log_payload_size_limit_breaches" in options
+            and options["log_payload_size_limit_breaches"] is True
+        )
+
+        candidates: list[tuple[float, int, int, str, dict[str, Any], str]] = []
+        for scope, variables, weight in self._trim_candidates(0):
+            for name, value in variables.items():
+                saving = encoding.encoded_size(value) - REMOVED_SIZE
+                if saving > 0:
+                    candidates.append(
+                        (
+                            -saving * weight,
+                            len(candidates),
+                            saving,
+                            scope,
+                            variables,
+                            name,
+                        )
+                    )
+        heapq.heapify(candidates)
 
-        while len(payload.encode("utf-8")) > max_size_kb * 1024:
-            if not self._remove_largest_variable(
-                options
-            ):  # Failed to remove either local or global variable
+        while excess > 0 and candidates:
+            _, _, saving, scope, variables, name = heapq.heappop(candidates)
+            if log_removals:
                 self.log.warning(
-                    "Raygun4Py: Unable to reduce size of payload below 128kb, error will be discarded by Raygun ingestion API"
+                    f"Raygun4Py: Removing {scope} variable {name} due to payload size limit"
                 )
-                break
+            variables[name] = REMOVED
+            excess -= saving
 
-            payload = jsonpickle.encode(self, unpicklable=False)
-
-    def _remove_largest_variable(self, options: dict[str, Any]) -> bool:
-        largest_global_var: str | None = None
-        largest_global_size: int = 0
+        if excess > 0:
+            self.log.warning(
+                f"Raygun4Py: Unable to reduce size of payload below {max_size_kb}kb, error will be discarded by Raygun ingestion API"
+            )
 
-        largest_local_var: str | None = None
-        largest_local_size: int = 0
-        largest_local_frame: dict[str, Any] | None = None
+    def _trim_candidates(
+        self, depth: int
+    ) -> Iterator[tuple[str, dict[str, Any], float]]:
+        frame_count = len(self.stackTrace)
+        for index, frame in enumerate(self.stackTrace):
+            if frame.get("localVariables"):
+                distance = (frame_count - 1 - index) / frame_count
+                yield "local", frame["localVariables"], depth + 1 + distance
 
-        # Find the largest global variable
         if self.globalVariables:
-            for var, value in self.globalVariables.items():
-                size = sys.getsizeof(value)
-                if size > largest_global_size:
-                    largest_global_size = size
-                    largest_global_var = var
-
-        # Find the largest local variable across all frames
-        for frame in self.stackTrace:
-            if "localVariables" in frame and frame["localVariables"]:
-                for var, value in frame["localVariables"].items():
-                    size = sys.getsizeof(value)
-                    if size > largest_local_size:
-                        largest_local_size = size
-                        largest_local_var = var
-                        largest_local_frame = frame
-
-        if largest_global_size == 0 and largest_local_size == 0:
-            return False
-
-        # Decide which one to remove: the largest global or the largest local variable
-        if largest_global_size >= largest_local_size and largest_global_var is not None:
-            if (
-                options is not None
-                and "log_payload_size_limit_breaches" in options
-                and options["log_payload_size_limit_breaches"] is True
-            ):
-                self.log.warning(
-                    f"Raygun4Py: Removing global variable {largest_global_var} due to payload size limit"
-                )
-
-            if self.globalVariables is not None:
-                self.globalVariables[largest_global_var] = "Removed"
-        elif largest_local_var is not None and largest_local_frame is not None:
-            if (
-                options is not None
-                and "log_payload_size_limit_breaches" in options
-                and options["log_payload_size_limit_breaches"] is True
-            ):
-                self.log.warning(
-                    f"Raygun4Py: Removing local variable {largest_local_var} due to payload size limit"
-                )
+            yield "global", self.globalVariables, depth + 2
 
-            largest_local_frame["localVariables"][largest_local_var] = "Removed"
-
-        return True
+        if self.innerError is not None:
+            yield from self.innerError._trim_candidates(depth + 1)
+        for error in self.innerErrors or ():
+            yield from error._trim_candidates(depth + 1)
 
     def get_classname(self) -> str | None:
         return self.className
 
-    def _get_locals(self, frame: FrameType) -> dict[str, str]:
-        result: dict[str, str] = {}
+    def to_dict(self) -> dict[str, Any]:
+        """Return the error as plain data ready for JSON encoding. Stack frames are shared, not copied."""
+        return {
+            "className": self.className,
+            "message": self.message,
+            "stackTrace": self.stackTrace,
+            "globalVariables": self.globalVariables,
+            "innerError": (
+                self.innerError.to_dict() if self.innerError is not None else None
+            ),
+            "innerErrors": (
+                [error.to_dict() for error in self.innerErrors]
+                if self.innerErrors is not None
+                else None
+            ),
+            "data": self.data,
+        }
+
+    def _capture_chained(
+        self,
+        exception: BaseException,
+        options: dict[str, Any] | None,
+        chain: _ChainCapture,
+        depth: int,
+    ) -> RaygunErrorMessage | None:
+        # A chain can loop back on itself, and every error it reaches costs a capture
+        if id(exception) in chain.seen or len(chain.seen) >= MAX_CHAINED_ERRORS:
+            return None
+        return RaygunErrorMessage(
+            type(exception),
+            exception,
+            exception.__traceback__,
+            options,
+            _chain=chain,
+            _depth=depth + 1,
+        )
+
+    def _is_in_app(self, classifier: inapp.FrameClassifier, frame: FrameType) -> bool:
+        try:
+            return classifier.is_in_app(frame)
+        except Exception:
+            return True
+
+    def _walk_traceback(
+        self, tb: TracebackType | None
+    ) -> list[tuple[FrameType, str, int, str]]:
+        # Only what the traceback records is read here; unlike inspect.getinnerframes no
+        # module or source file is looked up for each frame
+        frames = []
+        while tb is not None:
+            code = tb.tb_frame.f_code
+            frames.append((tb.tb_frame, code.co_filename, tb.tb_lineno, code.co_name))
+            tb = tb.tb_next
+        return frames
+
+    def _collapse_recursion(
+        self, frames: list[tuple[FrameType, str, int, str]]
+    ) -> tuple[list[tuple[FrameType, str, int, str]], dict[int, tuple[int, int]]]:
+        # A run of frames repeating the same cycle of lines is kept as its first and last
+        # cycles; the repeats dict maps the index of the last cycle's first frame to the
+        # cycle length and the number of cycles left out before it
+        keys = [(id(frame[0].f_code), frame[2]) for frame in frames]
+        kept: list[tuple[FrameType, str, int, str]] = []
+        repeats: dict[int, tuple[int, int]] = {}
+
+        index = 0
+        while index < len(frames):
+            best_period, best_count = 0, 0
+            for period in range(1, MAX_RECURSION_CYCLE + 1):
+                cycle = keys[index : index + period]
+                count = 1
+                while (
+                    keys[index + count * period : index + (count + 1) * period] == cycle
+                ):
+                    count += 1
+                if count >= MIN_RECURSION_REPEATS and (
+                    count * period > best_count * best_period
+                ):
+                    best_period, best_count = period, count
+
+            if not best_period:
+                kept.append(frames[index])
+                index += 1
+                continue
+
+            kept.extend(frames[index : index + best_period])
+            repeats[len(kept)] = (best_period, best_count - 2)
+            end = index + best_count * best_period
+            kept.extend(frames[end - best_period : end])
+            index = end
+
+        return kept, repeats
+
+    def _repeat_entry(
+        self,
+        frames: list[tuple[FrameType, str, int, str]],
+        index: int,
+        period: int,
+        count: int,
+        in_app: list[bool],
+    ) -> dict[str, Any]:
+        first = frames[index - period]
+        return {
+            "lineNumber": first[2],
+            "className": first[3],
+            "fileName": first[1],
+            "methodName": (
+                "[Previous frame repeated %d more times]" % count
+                if period == 1
+                else "[Previous %d frames repeated %d more times]" % (period, count)
+            ),
+            "localVariables": None,
+            "inApp": in_app[index - period],
+            "repeatCount": count,
+        }
+
+    def _skip_outer_frames(
+        self, tb: TracebackType | None, max_frames: int | None
+    ) -> TracebackType | None:
+        # Outer frames are dropped before any source lines or variables are read for them
+        if tb is None or max_frames is None:
+            return tb
+
+        depth = 0
+        current: TracebackType | None = tb
+        while current is not None:
+            depth += 1
+            current = current.tb_next
+
+        for _ in range(depth - max_frames):
+            if tb is None:
+                break
+            tb = tb.tb_next
+        return tb
+
+    def _get_shared_locals(
+        self,
+        chain: _ChainCapture,
+        frame: FrameType,
+        safe_repr: saferepr.SafeRepr,
+        max_count: int | None,
+    ) -> dict[str, str]:
+        # Chained errors often pass through the same frames; each frame's locals are
+        # rendered once per report, and copied so trimming one error leaves the others
+        rendered = chain.locals.get(id(frame))
+        if rendered is None:
+            rendered = chain.locals[id(frame)] = self._get_locals(
+                frame, safe_repr, max_count
+            )
+        return dict(rendered)
+
+    def _get_locals(
+        self,
+        frame: FrameType,
+        safe_repr: saferepr.SafeRepr,
+        max_count: int | None = None,
+    ) -> dict[str, str]:
         localVars = getattr(frame, "f_locals", {})
 
-        if "__traceback_hide__" not in localVars:
-            for key in localVars:
-                try:
-                    # Note that str() *can* fail; thus protect against it as much as we can.
-                    result[key] = str(localVars[key])
-                except Exception as e:
-                    try:
-                        r = repr(localVars[key])
-                    except Exception as re:
-                        r = "Couldn't convert to repr due to {0}".format(re)
-                    result[key] = (
-                        "!!! Couldn't convert {0!r} (repr: {1}) due to {2!r} !!!".format(
-                            key, r, e
-                        )
-                    )
+        if "__traceback_hide__" in localVars:
+            return {}
+        return self._to_strings(localVars, safe_repr, max_count)
+
+    def _to_strings(
+        self,
+        variables: dict[str, Any],
+        safe_repr: saferepr.SafeRepr,
+        max_count: int | None = None,
+    ) -> dict[str, str]:
+        # Variables are converted when captured, so the report is always JSON-safe
+        result: dict[str, str] = {}
+        for key in variables:
+            if max_count is not None and len(result) >= max_count:
+                break
+            result[key] = self._to_string(key, variables[key], safe_repr)
         return result
 
+    def _to_string(self, key: str, value: Any, safe_repr: saferepr.SafeRepr) -> str:
+        try:
+            # Note that str() *can* fail; thus protect against it as much as we can.
+            return safe_repr(value)
+        except Exception as e:
+            try:
+                r = safe_repr._call(repr, value)
+            except Exception as re:
+                r = "Couldn't convert to repr due to {0}".format(re)
+            return "!!! Couldn't convert {0!r} (repr: {1}) due to {2!r} !!!".format(
+                key, r, e
+            )
+
+
+class _ChainCapture:
+    """State shared by the errors captured for one report."""
+
+    def __init__(self) -> None:
+        self.seen: set[int] = set()
+        self.locals: dict[int, dict[str, str]] = {}
+
+
+def _is_exception_group(exception: BaseException) -> bool:
+    # Matched by name so the exceptiongroup backport's classes are recognised too
+    return any(cls.__name__ == "BaseExceptionGroup" for cls in type(exception).__mro__)
+
 
 class RaygunLoggerFallbackErrorMessage:
     """Fallback error message for use when logging without an exception context."""
@@ -380,8 +601,23 @@ class RaygunLoggerFallbackErrorMessage:
         filename: str,
         funcName: str | None,
         lineno: int,
+        frame_classifier: inapp.FrameClassifier | None = None,
+        pathname: str | None = None,
     ) -> None:
+        """
+        Initialize a RaygunLoggerFallbackErrorMessage from the details of a log record.
+
+        Parameters:
+            name (str): Name of the logger.
+            message (str): The logged message.
+            filename (str): File name the logging call was made from, as shown in the report.
+            funcName (str): Function the logging call was made from.
+            lineno (int): Line number of the logging call.
+            frame_classifier (FrameClassifier, optional): Marks the logging call as in-app or not. Defaults to `inapp.default_classifier`.
+            pathname (str, optional): Full path of the file the logging call was made from, used to classify it. Defaults to `filename`.
+        """
         self.className = "Logger (" + name + ")"
+        classifier = frame_classifier or inapp.default_classifier
         self.message = message
         # Create a single stackTrace entry using logger data
         self.stackTrace = [
@@ -391,17 +627,22 @@ class RaygunLoggerFallbackErrorMessage:
                 "fileName": filename,
                 "methodName": funcName or "UnknownMethod",
                 "localVariables": None,  # We don't have access to local variables
+                # Loggers are usually named after the module they log from
+                "inApp": classifier.classify(pathname or filename, name),
             }
         ]
         self.globalVariables = None  # We don't have access to global variables
         self.data = ""
 
-        try:
-            jsonpickle.encode(self, unpicklable=False)
-        except Exception:
-            for frame in self.stackTrace:
-                if "localVariables" in frame:
-                    frame["localVariables"] = None
-
     def get_classname(self) -> str:
         return self.className
+
+    def to_dict(self) -> dict[str, Any]:
+        """Return the error as plain data ready for JSON encoding."""
+        return {
+            "className": self.className,
+            "message": self.message,
+            "stackTrace": self.stackTrace,
+            "globalVariables": self.globalVariables,
+            "data": self.data,
+        }
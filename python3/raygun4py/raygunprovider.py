@@ -1,17 +1,34 @@
 from __future__ import annotations
 
 import copy
+import gzip
 import logging
-import socket
 import sys
+import threading
+import time
 from collections.abc import Callable
+from concurrent.futures import Future
 from types import TracebackType
 from typing import Any, Optional, Union
 
-import jsonpickle
 import requests
 
-from raygun4py import raygunmsgs, utilities
+from raygun4py import (
+    aggregation,
+    circuitbreaker,
+    dispatch,
+    encoding,
+    environment,
+    globalvars,
+    inapp,
+    ratelimit,
+    raygunmsgs,
+    retry,
+    sourcecache,
+    spool,
+    transport,
+    utilities,
+)
 
 DEFAULT_CONFIG: dict[str, Any] = {
     "before_send_callback": None,
@@ -20,13 +37,65 @@ DEFAULT_CONFIG: dict[str, Any] = {
     "ignored_exceptions": [],
     "proxy": None,
     "transmit_global_variables": True,
+    "global_variables_include": [],
+    "global_variables_exclude": [],
+    "global_variables_max_size": 16384,
     "transmit_local_variables": True,
     "enforce_payload_size_limit": True,
     "log_payload_size_limit_breaches": True,
+    "payload_size_limit_kb": 128,
+    "max_frames": None,
+    "max_frames_with_locals": None,
+    "max_locals_per_frame": None,
+    "max_value_length": None,
+    "collapse_recursion": True,
+    "max_error_chain_depth": 10,
+    "max_exception_group_errors": 10,
+    "max_value_depth": 5,
+    "max_value_width": 100,
+    "value_time_limit": 0.1,
+    "in_app_include": [],
+    "in_app_exclude": [],
+    "in_app_locals_only": True,
+    "source_context_lines": 0,
+    "source_cache_prewarm": True,
     "transmit_environment_variables": True,
     "userversion": "Not defined",
     "user": None,
     "http_timeout": 10.0,
+    "http_pool_size": 10,
+    "http_pool_idle_timeout": 60.0,
+    "async_send": False,
+    "async_queue_size": 1000,
+    "async_overflow_policy": dispatch.OVERFLOW_DROP_NEWEST,
+    "async_block_timeout": 1.0,
+    "async_shutdown_timeout": 5.0,
+    "batch_send": False,
+    "batch_max_entries": 100,
+    "batch_max_bytes": 1600 * 1024,
+    "batch_max_latency": 1.0,
+    "compress_payloads": False,
+    "compression_level": 6,
+    "compression_threshold": 1024,
+    "spool_directory": None,
+    "spool_max_bytes": 10 * 1024 * 1024,
+    "spool_segment_bytes": 1024 * 1024,
+    "spool_max_age": 24 * 60 * 60,
+    "spool_replay_interval": 30.0,
+    "spool_replay_concurrency": 2,
+    "max_retries": 0,
+    "retry_backoff_base": 0.5,
+    "retry_backoff_max": 30.0,
+    "retry_budget": 60.0,
+    "circuit_breaker_threshold": 0,
+    "circuit_breaker_reset_timeout": 30.0,
+    "circuit_breaker_half_open_requests": 1,
+    "rate_limit": None,
+    "rate_limit_burst": None,
+    "rate_limit_per_type": None,
+    "rate_limit_per_type_burst": None,
+    "aggregate_window": None,
+    "aggregate_max_fingerprints": 1000,
 }
 
 
@@ -38,6 +107,7 @@ CustomData = Optional[dict[str, Any]]
 ExcInfo = tuple[type[BaseException], BaseException, Optional[TracebackType]]
 BeforeSendCallback = Callable[[dict[str, Any]], Optional[dict[str, Any]]]
 GroupingKeyCallback = Callable[[raygunmsgs.RaygunMessage], str]
+SendResult = tuple[int, str]
 
 
 class RaygunSender:
@@ -54,6 +124,7 @@ class RaygunSender:
     endpointprotocol: str = "https://"
     endpointhost: str = "api.raygun.io"
     endpointpath: str = "/entries"
+    bulkendpointpath: str = "/entries/bulk"
     process_tags: list[str] = []
     process_custom_data: dict[str, Any] = dict()
 
@@ -62,15 +133,67 @@ class RaygunSender:
     grouping_key_callback: GroupingKeyCallback | None
     filtered_keys: list[str]
     ignored_exceptions: list[type[Exception]]
-    proxy: dict[str, Any] | None
+    proxy: dict[str, Any] | str | None
     transmit_global_variables: bool
+    global_variables_include: list[str]
+    global_variables_exclude: list[str]
+    global_variables_max_size: int | None
     transmit_local_variables: bool
     enforce_payload_size_limit: bool
     log_payload_size_limit_breaches: bool
+    payload_size_limit_kb: int
+    max_frames: int | None
+    max_frames_with_locals: int | None
+    max_locals_per_frame: int | None
+    max_value_length: int | None
+    collapse_recursion: bool
+    max_error_chain_depth: int
+    max_exception_group_errors: int
+    max_value_depth: int
+    max_value_width: int
+    value_time_limit: float | None
+    in_app_include: list[str]
+    in_app_exclude: list[str]
+    in_app_locals_only: bool
+    source_context_lines: int
+    source_cache_prewarm: bool
     transmit_environment_variables: bool
     userversion: str
     user: UserInfo
     http_timeout: float
+    http_pool_size: int
+    http_pool_idle_timeout: float
+    async_send: bool
+    async_queue_size: int
+    async_overflow_policy: str
+    async_block_timeout: float
+    async_shutdown_timeout: float
+    batch_send: bool
+    batch_max_entries: int
+    batch_max_bytes: int
+    batch_max_latency: float
+    compress_payloads: bool
+    compression_level: int
+    compression_threshold: int
+    spool_directory: str | None
+    spool_max_bytes: int
+    spool_segment_bytes: int
+    spool_max_age: float
+    spool_replay_interval: float
+    spool_replay_concurrency: int
+    max_retries: int
+    retry_backoff_base: float
+    retry_backoff_max: float
+    retry_budget: float
+    circuit_breaker_threshold: int
+    circuit_breaker_reset_timeout: float
+    circuit_breaker_half_open_requests: int
+    rate_limit: float | None
+    rate_limit_burst: float | None
+    rate_limit_per_type: float | None
+    rate_limit_per_type_burst: float | None
+    aggregate_window: float | None
+    aggregate_max_fingerprints: int
 
     def __init__(
         self, api_key: str | None, config: dict[str, Any] | None = None
@@ -109,6 +232,93 @@ class RaygunSender:
         for k, v in default_config.items():
             setattr(self, k, v)
 
+        self.transport = transport.HttpTransport(
+            pool_size=self.http_pool_size, idle_timeout=self.http_pool_idle_timeout
+        )
+
+        self.retry_policy = retry.RetryPolicy(
+            max_retries=self.max_retries,
+            backoff_base=self.retry_backoff_base,
+            backoff_max=self.retry_backoff_max,
+            budget=self.retry_budget,
+        )
+
+        self.rate_limiter: ratelimit.RateLimiter | None = None
+        if self.rate_limit is not None or self.rate_limit_per_type is not None:
+            self.rate_limiter = ratelimit.RateLimiter(
+                rate=self.rate_limit,
+                burst=self.rate_limit_burst,
+                per_key_rate=self.rate_limit_per_type,
+                per_key_burst=self.rate_limit_per_type_burst,
+            )
+
+        self.frame_classifier = inapp.FrameClassifier(
+            self.in_app_include, self.in_app_exclude
+        )
+
+        if self.source_context_lines and self.source_cache_prewarm:
+            # Reading the application's source now keeps file I/O off the error path
+            threading.Thread(
+                target=self._prewarm_source_cache,
+                name="raygun4py-prewarm",
+                daemon=True,
+            ).start()
+
+        self.global_capture = globalvars.GlobalsCapture(
+            self.global_variables_include,
+            self.global_variables_exclude,
+            self.global_variables_max_size,
+        )
+
+        self.aggregator: aggregation.ErrorAggregator | None = None
+        if self.aggregate_window:
+            self.aggregator = aggregation.ErrorAggregator(
+                window=self.aggregate_window,
+                max_entries=self.aggregate_max_fingerprints,
+            )
+
+        self.circuit_breaker: circuitbreaker.CircuitBreaker | None = None
+        if self.circuit_breaker_threshold:
+            self.circuit_breaker = circuitbreaker.CircuitBreaker(
+                failure_threshold=self.circuit_breaker_threshold,
+                reset_timeout=self.circuit_breaker_reset_timeout,
+                half_open_requests=self.circuit_breaker_half_open_requests,
+            )
+
+        self.spool: spool.DiskSpool | None = None
+        if self.spool_directory:
+            self.spool = spool.DiskSpool(
+                self.spool_directory,
+                max_bytes=self.spool_max_bytes,
+                segment_bytes=self.spool_segment_bytes,
+                max_age=self.spool_max_age,
+            )
+            self.spool.start(
+                self._transmit,
+                interval=self.spool_replay_interval,
+                concurrency=self.spool_replay_concurrency,
+            )
+
+        self._dispatcher: dispatch.BackgroundDispatcher | None = None
+        if self.async_send or self.batch_send:
+            self._dispatcher = dispatch.BackgroundDispatcher(
+                self._post,
+                queue_size=self.async_queue_size,
+                overflow_policy=self.async_overflow_policy,
+                block_timeout=self.async_block_timeout,
+                shutdown_timeout=self.async_shutdown_timeout,
+                batch_handler=self._post_batch if self.batch_send else None,
+                prepare=self._encode,
+                batch_max_entries=self.batch_max_entries,
+                batch_max_bytes=self.batch_max_bytes,
+                batch_max_latency=self.batch_max_latency,
+            )
+
+        if self.aggregator is not None:
+            # Started after the dispatcher, so the summaries sent by its exit hook are
+            # queued before the dispatcher's own exit hook drains the queue
+            self.aggregator.start(self._dispatch)
+
     def set_version(self, version: str) -> None:
         """
         Set the version for the error reports.
@@ -198,10 +408,14 @@ class RaygunSender:
         exc_info: ExcInfo | tuple[None, None, None] | None = None,
         user_override: UserInfo = None,
         **kwargs: Any,
-    ) -> tuple[int, str] | None:
+    ) -> SendResult | Future[SendResult] | None:
         """
         Send an exception report to Raygun.
 
+        When `async_send` is enabled the report is captured on the calling thread, then encoded
+        and transmitted on a background worker. With `batch_send` queued reports are
+        coalesced into bulk requests.
+
         Parameters:
             exception (Exception, optional): An exception instance to report.
             exc_info (tuple, optional): A 3-tuple containing exception type, exception instance, and traceback.
@@ -212,12 +426,67 @@ class RaygunSender:
 
         Returns:
             The result of the post request, typically indicating the success or failure of the exception report transmission.
+            When `async_send` or `batch_send` is enabled, a Future resolving to that result is returned instead.
         """
+        self._send_summaries()
+        transformed = self._capture(exception, exc_info, user_override, kwargs)
+
+        if transformed is None:
+            return None
+        return self._dispatch(transformed)
+
+    def _dispatch(
+        self, message: raygunmsgs.RaygunMessage
+    ) -> SendResult | Future[SendResult]:
+        if self._dispatcher is not None:
+            return self._dispatcher.submit(message)
+        return self._post(message)
+
+    def _prewarm_source_cache(self) -> None:
+        filenames = []
+        for name, module in list(sys.modules.items()):
+            filename = getattr(module, "__file__", None)
+            if (
+                isinstance(filename, str)
+                and filename.endswith(".py")
+                and self.frame_classifier.classify(filename, name)
+            ):
+                filenames.append(filename)
+        sourcecache.prewarm(filenames)
+
+    def _send_summaries(self, flush: bool = False) -> None:
+        if self.aggregator is None:
+            return
+
+        for summary in self.aggregator.collect(flush):
+            self._dispatch(summary)
+
+    def _capture(
+        self,
+        exception: BaseException | None,
+        exc_info: ExcInfo | tuple[None, None, None] | None,
+        user_override: UserInfo,
+        kwargs: dict[str, Any],
+    ) -> raygunmsgs.RaygunMessage | None:
         options = {
             "transmitLocalVariables": self.transmit_local_variables,
             "transmitGlobalVariables": self.transmit_global_variables,
             "enforce_payload_size_limit": self.enforce_payload_size_limit,
             "log_payload_size_limit_breaches": self.log_payload_size_limit_breaches,
+            "max_frames": self.max_frames,
+            "max_frames_with_locals": self.max_frames_with_locals,
+            "max_locals_per_frame": self.max_locals_per_frame,
+            "max_value_length": self.max_value_length,
+            "max_value_depth": self.max_value_depth,
+            "max_value_width": self.max_value_width,
+            "value_time_limit": self.value_time_limit,
+            "collapse_recursion": self.collapse_recursion,
+            "max_error_chain_depth": self.max_error_chain_depth,
+            "max_exception_group_errors": self.max_exception_group_errors,
+            "frame_classifier": self.frame_classifier,
+            "global_capture": self.global_capture,
+            "in_app_locals_only": self.in_app_locals_only,
+            "source_context_lines": self.source_context_lines,
         }
         (
             tags,
@@ -229,6 +498,22 @@ class RaygunSender:
         ) = self._parse_args(kwargs)
 
         exc_type, exc_value, exc_traceback = exc_info or sys.exc_info()
+
+        # Checked before capture, which is the expensive part of a report
+        if self.rate_limiter is not None and not self.rate_limiter.allow(
+            self._rate_limit_key(exception, exc_type, fallback_error)
+        ):
+            return None
+
+        aggregate_key: str | None = None
+        if self.aggregator is not None:
+            aggregate_key = self._aggregate_key(
+                exception, exc_type, exc_value, exc_traceback
+            )
+            if aggregate_key is not None and not self.aggregator.observe(aggregate_key):
+                # A repeat within the aggregation window, counted towards its summary report
+                return None
+
         errorMessage: (
             raygunmsgs.RaygunErrorMessage | raygunmsgs.RaygunLoggerFallbackErrorMessage
         )
@@ -249,10 +534,79 @@ class RaygunSender:
         )
         transformed = self._transform_message(message)
 
-        if transformed is not None:
-            return self._post(transformed)
+        if aggregate_key is not None and transformed is not None:
+            assert self.aggregator is not None
+            self.aggregator.remember(aggregate_key, transformed)
+        return transformed
+
+    def _aggregate_key(
+        self,
+        exception: BaseException | None,
+        exc_type: type[BaseException] | None,
+        exc_value: BaseException | None,
+        exc_traceback: TracebackType | None,
+    ) -> str | None:
+        if exception is not None:
+            return aggregation.fingerprint(
+                type(exception), exception, exception.__traceback__
+            )
+        if exc_type is not None:
+            return aggregation.fingerprint(exc_type, exc_value, exc_traceback)
         return None
 
+    def _rate_limit_key(
+        self,
+        exception: BaseException | None,
+        exc_type: type[BaseException] | None,
+        fallback_error: raygunmsgs.RaygunLoggerFallbackErrorMessage | None,
+    ) -> str:
+        error_type = type(exception) if exception is not None else exc_type
+        if error_type is not None:
+            return f"{error_type.__module__}.{error_type.__qualname__}"
+        if fallback_error is not None:
+            return fallback_error.get_classname()
+        return "None"
+
+    def flush(self, timeout: float | None = None) -> bool:
+        """
+        Wait for reports queued by `async_send` to be transmitted.
+
+        Parameters:
+            timeout (float, optional): Maximum seconds to wait. Waits indefinitely if None.
+
+        Returns:
+            bool: True if every queued report was handled, False if the timeout expired first.
+        """
+        self._send_summaries()
+
+        if self._dispatcher is None:
+            return True
+        return self._dispatcher.flush(timeout)
+
+    def close(self, timeout: float | None = None) -> bool:
+        """
+        Transmit any queued reports and pending aggregation summaries, stop the background
+        worker used by `async_send` and release pooled connections.
+
+        Parameters:
+            timeout (float, optional): Maximum seconds to wait. Waits indefinitely if None.
+
+        Returns:
+            bool: True if every queued report was handled, False if the timeout expired first.
+        """
+        if self.aggregator is not None:
+            self.aggregator.close()
+        self._send_summaries(flush=True)
+
+        drained = True
+        if self._dispatcher is not None:
+            drained = self._dispatcher.close(timeout)
+
+        if self.spool is not None:
+            self.spool.close()
+        self.transport.close()
+        return drained
+
     def _create_error_message(
         self,
         exception: BaseException | None,
@@ -321,12 +675,16 @@ class RaygunSender:
         user_override: UserInfo = None,
     ) -> raygunmsgs.RaygunMessage:
         options = {
-            "transmit_environment_variables": self.transmit_environment_variables
+            "transmit_environment_variables": self.transmit_environment_variables,
+            "max_value_length": self.max_value_length,
+            "max_value_depth": self.max_value_depth,
+            "max_value_width": self.max_value_width,
+            "value_time_limit": self.value_time_limit,
         }
         return (
             raygunmsgs.RaygunMessageBuilder(options)
             .new()
-            .set_machine_name(socket.gethostname())
+            .set_machine_name(environment.hostname())
             .set_version(self.userversion)
             .set_client_details()
             .set_exception_details(raygunExceptionMessage)
@@ -364,41 +722,155 @@ class RaygunSender:
 
         return result
 
-    def _post(self, raygunMessage: raygunmsgs.RaygunMessage) -> tuple[int, str]:
-        raygunMessage = raygunMessage.copy()
-        options = {
-            "enforce_payload_size_limit": self.enforce_payload_size_limit,
-            "log_payload_size_limit_breaches": self.log_payload_size_limit_breaches,
-        }
+    def _post(self, raygunMessage: raygunmsgs.RaygunMessage) -> SendResult:
+        return self._send_payload(self._encode(raygunMessage), self.endpointpath)
+
+    def _post_batch(self, payloads: list[bytes]) -> list[SendResult]:
+        if len(payloads) == 1:
+            # Including an entry too large to share a bulk request with any other
+            return [self._send_payload(payloads[0], self.endpointpath)]
+
+        result, answered = self._try_send_payload(
+            b"[" + b",".join(payloads) + b"]", self.bulkendpointpath
+        )
+        if answered and 400 <= result[0] < 500 and result[0] not in (401, 403):
+            # A single bad entry gets the whole bulk request rejected, so the entries are
+            # sent on their own to give each its own outcome
+            return [
+                self._send_payload(payload, self.endpointpath) for payload in payloads
+            ]
+
+        # Otherwise every entry shares the outcome of the bulk request
+        return [result] * len(payloads)
 
+    def _encode(self, raygunMessage: raygunmsgs.RaygunMessage) -> bytes:
         error = raygunMessage.get_error()
-        if (
-            isinstance(error, raygunmsgs.RaygunErrorMessage)
-            and "enforce_payload_size_limit" in options
-            and options["enforce_payload_size_limit"] is True
+        if self.enforce_payload_size_limit is not True or not isinstance(
+            error, raygunmsgs.RaygunErrorMessage
         ):
-            error.check_and_modify_payload_size(options)
-            raygunMessage.set_error(error)
-
-        json = jsonpickle.encode(raygunMessage, unpicklable=False)
+            return encoding.encode_bytes(raygunMessage)
 
         try:
-            headers = {
-                "X-ApiKey": self.api_key,
-                "Content-Type": "application/json",
-                "User-Agent": "raygun4py",
-            }
+            return encoding.encode_bytes(
+                raygunMessage, budget=self.payload_size_limit_kb * 1024
+            )
+        except encoding.PayloadTooLarge:
+            # Only reports over the size limit are measured, trimmed and encoded a second time
+            error.check_and_modify_payload_size(
+                {
+                    "enforce_payload_size_limit": self.enforce_payload_size_limit,
+                    "log_payload_size_limit_breaches": self.log_payload_size_limit_breaches,
+                },
+                max_size_kb=self.payload_size_limit_kb,
+                payload_size=encoding.encoded_size(raygunMessage),
+            )
+            return encoding.encode_bytes(raygunMessage)
+
+    def _send_payload(self, payload: bytes, path: str) -> SendResult:
+        result, _answered = self._try_send_payload(payload, path)
+        return result
+
+    def _try_send_payload(self, payload: bytes, path: str) -> tuple[SendResult, bool]:
+        # Also returns whether the result is the API's final answer to the payload, rather
+        # than a failure to get one that left the payload spooled or dropped
+        deadline = time.monotonic() + self.retry_policy.budget
+        attempt = 0
+        short_circuited = False
+        response: requests.Response | None = None
+
+        # Compressed once, however many attempts it takes to send
+        data, headers = self._prepare_request(payload)
+
+        while True:
+            if (
+                self.circuit_breaker is not None
+                and not self.circuit_breaker.allow_request()
+            ):
+                short_circuited = True
+                break
+
+            response = None
+            try:
+                response = self._request(data, headers, path)
+            except Exception as e:
+                self.log.error(e)
+
+            if response is not None and not retry.is_retryable_status(
+                response.status_code
+            ):
+                if self.spool is not None and 200 <= response.status_code < 300:
+                    # The endpoint is reachable again, so anything spooled can be replayed
+                    self.spool.wake()
+                return (response.status_code, response.text), True
+
+            if attempt >= self.retry_policy.max_retries:
+                break
+
+            delay = self.retry_policy.delay(
+                attempt,
+                retry.parse_retry_after(response.headers.get("Retry-After"))
+                if response is not None
+                else None,
+            )
+            if time.monotonic() + delay > deadline:
+                break
+
+            self.retry_policy.sleep(delay)
+            attempt += 1
+
+        spooled = self.spool is not None and self.spool.append(
+            path, payload.decode("utf-8")
+        )
+        if response is not None:
+            return (response.status_code, response.text), False
 
-            response = requests.post(
-                self.endpointprotocol + self.endpointhost + self.endpointpath,
+        reason = (
+            "Circuit breaker open: report not sent"
+            if short_circuited
+            else "Exception: Could not send"
+        )
+        if spooled:
+            return (400, reason + ", report spooled for retry"), False
+        return (400, reason), False
+
+    def _transmit(self, payload: str, path: str) -> SendResult:
+        response = self._request(*self._prepare_request(payload.encode("utf-8")), path)
+        return response.status_code, response.text
+
+    def _prepare_request(self, payload: bytes) -> tuple[bytes, dict[str, Any]]:
+        headers = {
+            "X-ApiKey": self.api_key,
+            "Content-Type": "application/json",
+            "User-Agent": "raygun4py",
+        }
+
+        if self.compress_payloads and len(payload) >= self.compression_threshold:
+            headers["Content-Encoding"] = "gzip"
+            return gzip.compress(payload, compresslevel=self.compression_level), headers
+        return payload, headers
+
+    def _request(
+        self, data: bytes, headers: dict[str, Any], path: str
+    ) -> requests.Response:
+        try:
+            response = self.transport.post(
+                self.endpointprotocol + self.endpointhost + path,
                 headers=headers,
-                data=json,
+                data=data,
                 timeout=self.http_timeout,
+                proxies=transport.proxies_from_config(self.proxy),
             )
-        except Exception as e:
-            self.log.error(e)
-            return 400, "Exception: Could not send"
-        return response.status_code, response.text
+        except Exception:
+            if self.circuit_breaker is not None:
+                self.circuit_breaker.record_failure()
+            raise
+
+        if self.circuit_breaker is not None:
+            if response.status_code >= 500:
+                self.circuit_breaker.record_failure()
+            else:
+                self.circuit_breaker.record_success()
+        return response
 
 
 class RaygunHandler(logging.Handler):
@@ -419,6 +891,7 @@ class RaygunHandler(logging.Handler):
         version: str | None = None,
         level: int = logging.ERROR,
         sender: RaygunSender | None = None,
+        config: dict[str, Any] | None = None,
     ) -> None:
         """
         Initialize a RaygunHandler for logging.
@@ -429,10 +902,11 @@ class RaygunHandler(logging.Handler):
             api_key (str): The API key for Raygun.
             version (str, optional): Version for the RaygunSender. Defaults to None.
             level (int, optional): Logging level. Defaults to logging.ERROR.
+            config (dict, optional): Configuration options for the RaygunSender. Defaults to None.
         """
         super().__init__(level)
         if api_key:
-            self.sender = RaygunSender(api_key)
+            self.sender = RaygunSender(api_key, config=config)
             if version:
                 self.sender.set_version(version)
             self.version = version
@@ -486,9 +960,15 @@ class RaygunHandler(logging.Handler):
                 record.filename,
                 record.funcName,
                 record.lineno,
+                frame_classifier=self.sender.frame_classifier,
+                pathname=record.pathname,
             )
             self.sender.send_exception(tags=tags, fallback_error=fallback_error)
 
+    def flush(self) -> None:
+        # Called by logging.shutdown(), so queued reports are not lost at interpreter exit
+        self.sender.flush(self.sender.async_shutdown_timeout)
+
     @staticmethod
     def get_tag_from_levelname(levelname: str) -> str | None:
         tag_map = {
@@ -0,0 +1,85 @@
+from __future__ import annotations
+
+import random
+import time
+from email.utils import parsedate_to_datetime
+
+
+def is_retryable_status(status: int) -> bool:
+    return status == 429 or status >= 500
+
+
+def parse_retry_after(value: str | None, now: float | None = None) -> float | None:
+    """
+    Parse a Retry-After header value.
+
+    Parameters:
+        value (str): Either a number of seconds or an HTTP-date.
+        now (float, optional): The current time as a Unix timestamp. Defaults to time.time().
+
+    Returns:
+        float: Seconds to wait, or None if the header is missing or malformed.
+    """
+    if not value:
+        return None
+
+    value = value.strip()
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+
+    try:
+        retry_at = parsedate_to_datetime(value).timestamp()
+    except (TypeError, ValueError, IndexError, OverflowError):
+        return None
+
+    return max(0.0, retry_at - (time.time() if now is None else now))
+
+
+class RetryPolicy:
+    """
+    Exponential backoff with full jitter, bounded by a total time budget per report.
+    """
+
+    def __init__(
+        self,
+        max_retries: int = 0,
+        backoff_base: float = 0.5,
+        backoff_max: float = 30.0,
+        budget: float = 60.0,
+    ) -> None:
+        """
+        Initialize a RetryPolicy.
+
+        Parameters:
+            max_retries (int, optional): Retries after the first attempt. Defaults to 0 (no retries).
+            backoff_base (float, optional): Backoff cap in seconds for the first retry, doubled for each retry after it. Defaults to 0.5.
+            backoff_max (float, optional): Largest backoff cap in seconds. Defaults to 30.0.
+            budget (float, optional): Total seconds that may be spent on one report, including waits. Defaults to 60.0.
+        """
+        self.max_retries = max(0, int(max_retries))
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.budget = budget
+
+    def delay(self, retry: int, retry_after: float | None = None) -> float:
+        """
+        Return how long to wait before the given retry.
+
+        Parameters:
+            retry (int): Zero-based index of the retry about to be made.
+            retry_after (float, optional): Seconds requested by the server's Retry-After header, which is always honoured.
+
+        Returns:
+            float: Seconds to wait.
+        """
+        cap = min(self.backoff_max, self.backoff_base * (2**retry))
+        jittered = random.uniform(0, cap)
+
+        if retry_after is not None:
+            return max(retry_after, jittered)
+        return jittered
+
+    def sleep(self, seconds: float) -> None:
+        time.sleep(seconds)
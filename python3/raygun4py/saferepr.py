@@ -0,0 +1,305 @@
+from __future__ import annotations
+
+import threading
+import time
+from collections import deque
+from collections.abc import Callable
+from typing import Any
+
+from raygun4py import summarizers
+
+# Types whose str() or repr() took longer than the time limit `SLOW_RENDERS_LIMIT` times
+# in a row. Their values are described by type and address from then on instead of being
+# rendered again. Builtin types are never added, since a single large value, or a pause
+# in another thread, can make any of them slow once.
+_slow_types: set[type] = set()
+_slow_renders: dict[type, int] = {}
+_slow_types_lock = threading.Lock()
+MAX_SLOW_TYPES = 1000
+SLOW_RENDERS_LIMIT = 3
+
+_SCALARS = (type(None), bool, int, float, complex)
+_CONTAINER_BRACKETS: dict[type, tuple[str, str]] = {
+    dict: ("{", "}"),
+    list: ("[", "]"),
+    tuple: ("(", ")"),
+    set: ("{", "}"),
+    frozenset: ("frozenset({", "})"),
+    deque: ("deque([", "])"),
+}
+
+
+class _Stop(Exception):
+    pass
+
+
+class SafeRepr:
+    """
+    Renders values to strings for reports, within bounds.
+
+    Containers are rendered at most `max_depth` levels deep and `max_width` items wide,
+    with cycles shown as `...`, and the output is cut off at `max_length` characters.
+    Strings inside containers are shortened to `max_string` characters. Rendering a value
+    stops once `time_limit` seconds have passed, and a type whose own `__str__` or
+    `__repr__` was slower than that is not asked to render itself again. Types with a
+    registered summarizer (see `summarizers.register_summarizer`) are never asked.
+    """
+
+    def __init__(
+        self,
+        max_depth: int = 5,
+        max_width: int = 100,
+        max_length: int | None = None,
+        time_limit: float | None = 0.1,
+        max_string: int = 1024,
+    ) -> None:
+        """
+        Initialize a SafeRepr.
+
+        Parameters:
+            max_depth (int, optional): Levels of nested containers rendered. Defaults to 5.
+            max_width (int, optional): Items rendered from each container. Defaults to 100.
+            max_length (int, optional): Characters kept from the output. Defaults to None (unlimited).
+            time_limit (float, optional): Seconds spent rendering one value. Defaults to 0.1.
+            max_string (int, optional): Characters kept from each string inside a container. Defaults to 1024.
+        """
+        self.max_depth = max_depth
+        self.max_width = max_width
+        self.max_length = max_length
+        self.time_limit = time_limit
+        self.max_string = max_string
+
+    def __call__(self, value: Any) -> str:
+        """
+        Render a value the way str() would, within the configured bounds.
+
+        Raises:
+            Exception: Whatever the value's own `__str__` raised, for values that are not containers.
+        """
+        if type(value) is str:
+            text = value
+        elif _container_type(value) is None:
+            text = self._call(str, value)
+        else:
+            return _Renderer(self).render(value)
+
+        if self.max_length is not None and len(text) > self.max_length:
+            return text[: self.max_length] + "..."
+        return text
+
+    def _call(self, render: Callable[[Any], str], value: Any) -> str:
+        cls = type(value)
+        if cls in _slow_types:
+            return object.__repr__(value)
+
+        summarizer = summarizers.lookup(cls)
+        if summarizer is not None:
+            try:
+                return summarizer(value)
+            except Exception:
+                return object.__repr__(value)
+
+        started = time.monotonic()
+        try:
+            return render(value)
+        finally:
+            if self.time_limit is not None and cls.__module__ != "builtins":
+                _record_render(cls, time.monotonic() - started > self.time_limit)
+
+
+def _record_render(cls: type, slow: bool) -> None:
+    if not slow:
+        # Only consecutive slow renders count against a type
+        if cls in _slow_renders:
+            with _slow_types_lock:
+                _slow_renders.pop(cls, None)
+        return
+
+    with _slow_types_lock:
+        count = _slow_renders.get(cls, 0) + 1
+        if count < SLOW_RENDERS_LIMIT:
+            if len(_slow_renders) >= MAX_SLOW_TYPES:
+                _slow_renders.clear()
+            _slow_renders[cls] = count
+            return
+
+        _slow_renders.pop(cls, None)
+        if len(_slow_types) >= MAX_SLOW_TYPES:
+            _slow_types.clear()
+        _slow_types.add(cls)
+
+
+class _Renderer:
+    def __init__(self, safe_repr: SafeRepr) -> None:
+        self.safe_repr = safe_repr
+        self.parts: list[str] = []
+        self.length = 0
+        self.active: set[int] = set()
+        self.deadline = (
+            time.monotonic() + safe_repr.time_limit
+            if safe_repr.time_limit is not None
+            else None
+        )
+
+    def render(self, value: Any) -> str:
+        try:
+            self._value(value, 0)
+        except _Stop:
+            return "".join(self.parts)[: self.safe_repr.max_length] + "..."
+        return "".join(self.parts)
+
+    def _write(self, text: str) -> None:
+        self.parts.append(text)
+        self.length += len(text)
+        max_length = self.safe_repr.max_length
+        if max_length is not None and self.length > max_length:
+            raise _Stop()
+
+    def _value(self, value: Any, depth: int) -> None:
+        if self.deadline is not None and time.monotonic() > self.deadline:
+            raise _Stop()
+
+        if isinstance(value, _SCALARS):
+            self._write(self._opaque(value))
+            return
+
+        if isinstance(value, (str, bytes, bytearray)):
+            max_string = self.safe_repr.max_string
+            self._write(repr(value[:max_string]))
+            if len(value) > max_string:
+                self._write("...")
+            return
+
+        container = _container_type(value)
+        if container is None:
+            self._write(self._opaque(value))
+            return
+
+        opening, closing = _CONTAINER_BRACKETS[container]
+        prefix, suffix = "", ""
+        if type(value) is not container:
+            if container is tuple and hasattr(value, "_fields"):
+                if depth >= self.safe_repr.max_depth:
+                    self._write(type(value).__name__ + "(...)")
+                else:
+                    self._named_tuple(value, depth)
+                return
+            prefix, suffix = type(value).__name__ + "(", ")"
+
+        if id(value) in self.active or depth >= self.safe_repr.max_depth:
+            self._write(prefix + opening + "..." + closing + suffix)
+            return
+
+        if container is set and not value:
+            self._write(prefix + "set()" + suffix)
+            return
+
+        self.active.add(id(value))
+        try:
+            self._write(prefix + opening)
+            # The builtin methods are used so overridden ones can't run arbitrary code
+            items = (
+                dict.items(value) if container is dict else container.__iter__(value)  # type: ignore[attr-defined]
+            )
+            count = 0
+            for item in items:
+                if count:
+                    self._write(", ")
+                if count >= self.safe_repr.max_width:
+                    self._write("...")
+                    break
+                if container is dict:
+                    self._value(item[0], depth + 1)
+                    self._write(": ")
+                    self._value(item[1], depth + 1)
+                else:
+                    self._value(item, depth + 1)
+                count += 1
+            if container is tuple and count == 1:
+                self._write(",")
+            self._write(closing + suffix)
+        finally:
+            self.active.discard(id(value))
+
+    def _named_tuple(self, value: Any, depth: int) -> None:
+        self._write(type(value).__name__ + "(")
+        for index, (name, item) in enumerate(zip(value._fields, value)):
+            if index:
+                self._write(", ")
+            self._write(str(name) + "=")
+            self._value(item, depth + 1)
+        self._write(")")
+
+    def _opaque(self, value: Any) -> str:
+        try:
+            return self.safe_repr._call(repr, value)
+        except Exception:
+            return "<unrepresentable %s object>" % type(value).__name__
+
+
+def sanitize(value: Any, safe_repr: SafeRepr) -> Any:
+    """
+    Make user supplied data, such as custom data, safe to encode as JSON.
+
+    Dicts, lists, tuples, sets and JSON scalars keep their structure, dates become ISO 8601
+    strings and any other object is rendered with `safe_repr`. Like rendered values,
+    containers are kept `safe_repr.max_depth` levels deep and `safe_repr.max_width` items
+    wide: deeper containers and reference cycles become "...", and a "..." item (or key,
+    for dicts) marks where items were left out.
+    """
+    return _sanitize(value, safe_repr, set(), 0)
+
+
+def _sanitize(value: Any, safe_repr: SafeRepr, active: set[int], depth: int) -> Any:
+    if value is None or isinstance(value, (str, bool, int, float)):
+        return value
+
+    if isinstance(value, (dict, list, tuple, set, frozenset)):
+        if id(value) in active or depth >= safe_repr.max_depth:
+            return "..."
+
+        active.add(id(value))
+        try:
+            if isinstance(value, dict):
+                result: dict[Any, Any] = {}
+                for index, (key, item) in enumerate(dict.items(value)):
+                    if index >= safe_repr.max_width:
+                        result["..."] = "..."
+                        break
+                    if not (key is None or isinstance(key, (str, bool, int, float))):
+                        key = _render(key, safe_repr)
+                    result[key] = _sanitize(item, safe_repr, active, depth + 1)
+                return result
+
+            items: list[Any] = []
+            for item in value:
+                if len(items) >= safe_repr.max_width:
+                    items.append("...")
+                    break
+                items.append(_sanitize(item, safe_repr, active, depth + 1))
+            return items
+        finally:
+            active.discard(id(value))
+
+    if hasattr(value, "isoformat") and hasattr(value, "timetuple"):
+        try:
+            isoformat: str = value.isoformat()
+            return isoformat
+        except Exception:
+            pass
+
+    return _render(value, safe_repr)
+
+
+def _render(value: Any, safe_repr: SafeRepr) -> str:
+    try:
+        return safe_repr(value)
+    except Exception:
+        return "<unrepresentable %s object>" % type(value).__name__
+
+
+def _container_type(value: Any) -> type | None:
+    for container in _CONTAINER_BRACKETS:
+        if isinstance(value, container):
+            return container
+    return None
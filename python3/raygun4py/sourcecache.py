@@ -0,0 +1,184 @@
+from __future__ import annotations
+
+import linecache
+import os
+import threading
+import time
+import tokenize
+from collections import OrderedDict
+from collections.abc import Iterable
+from typing import Any
+
+# Characters of source kept in memory; the least recently used files are dropped first
+MAX_CACHED_SIZE = 8 * 1024 * 1024
+# Seconds between checks that a cached file hasn't changed on disk
+CHECK_INTERVAL = 5.0
+
+
+class _File:
+    __slots__ = ("lines", "mtime", "size", "checked")
+
+    def __init__(self, lines: list[str], mtime: float | None) -> None:
+        self.lines = lines
+        self.mtime = mtime
+        self.size = sum(len(line) for line in lines)
+        self.checked = time.monotonic()
+
+
+_files: OrderedDict[str, _File] = OrderedDict()
+_size = 0
+_lock = threading.Lock()
+
+# Incremented whenever cached source is replaced or cleared, so caches of anything
+# derived from source lines can tell when to rebuild
+generation = 0
+
+
+def getlines(filename: str, module_globals: dict[str, Any] | None = None) -> list[str]:
+    """
+    Return the lines of a source file, each ending in a newline.
+
+    Files are read once and kept in a least recently used cache of at most
+    `MAX_CACHED_SIZE` characters. A cached file is checked for changes, by its
+    modification time, at most every `CHECK_INTERVAL` seconds. Sources that aren't plain
+    files, such as modules imported from zip files, are found through `linecache`.
+
+    Parameters:
+        filename (str): The file name recorded in a code object.
+        module_globals (dict, optional): Globals of the module, used to find its loader. Defaults to None.
+
+    Returns:
+        list: The lines of the file, or an empty list if its source isn't available.
+    """
+    with _lock:
+        cached = _files.get(filename)
+        if cached is not None:
+            _files.move_to_end(filename)
+
+    if cached is not None and not _changed(filename, cached):
+        return cached.lines
+    return _load(filename, module_globals).lines
+
+
+def getline(
+    filename: str, lineno: int | None, module_globals: dict[str, Any] | None = None
+) -> str | None:
+    """
+    Return a line of source code, as it appears in the file.
+
+    Parameters:
+        filename (str): The file name recorded in a code object.
+        lineno (int): The line number, starting at 1.
+        module_globals (dict, optional): Globals of the module, used to find its loader. Defaults to None.
+
+    Returns:
+        str: The line including its newline, or None if the source isn't available.
+    """
+    lines = getlines(filename, module_globals)
+    if lineno is None or not 1 <= lineno <= len(lines):
+        return None
+    return lines[lineno - 1]
+
+
+def get_context(
+    filename: str,
+    lineno: int | None,
+    context_lines: int,
+    module_globals: dict[str, Any] | None = None,
+) -> tuple[list[str], list[str]]:
+    """
+    Return the lines around a line of source code, without their newlines.
+
+    Returns:
+        tuple: Up to `context_lines` lines before the line, and up to as many after it.
+    """
+    lines = getlines(filename, module_globals)
+    if lineno is None or not 1 <= lineno <= len(lines):
+        return [], []
+
+    before = lines[max(lineno - 1 - context_lines, 0) : lineno - 1]
+    after = lines[lineno : lineno + context_lines]
+    return [line.rstrip("\r\n") for line in before], [
+        line.rstrip("\r\n") for line in after
+    ]
+
+
+def refresh(filenames: Iterable[str]) -> None:
+    """Reload any of the given cached files that changed on disk and are due a check."""
+    for filename in filenames:
+        with _lock:
+            cached = _files.get(filename)
+        if cached is not None and _changed(filename, cached):
+            _load(filename, None)
+
+
+def prewarm(filenames: Iterable[str]) -> None:
+    """Read files into the cache ahead of time, until the cache is full."""
+    for filename in filenames:
+        if _size >= MAX_CACHED_SIZE:
+            break
+        if filename not in _files:
+            _load(filename, None)
+
+
+def clear_cache() -> None:
+    """Forget every file read so far."""
+    global _size, generation
+    with _lock:
+        _files.clear()
+        _size = 0
+        generation += 1
+
+
+def _changed(filename: str, cached: _File) -> bool:
+    now = time.monotonic()
+    if cached.mtime is None or now - cached.checked < CHECK_INTERVAL:
+        return False
+
+    cached.checked = now
+    # A file that has gone away since is still shown as it was
+    mtime = _mtime(filename)
+    return mtime is not None and mtime != cached.mtime
+
+
+def _load(filename: str, module_globals: dict[str, Any] | None) -> _File:
+    global _size, generation
+    loaded = _File(_read(filename, module_globals), _mtime(filename))
+
+    with _lock:
+        previous = _files.pop(filename, None)
+        if previous is not None:
+            _size -= previous.size
+            generation += 1
+
+        _files[filename] = loaded
+        _size += loaded.size
+        while _size > MAX_CACHED_SIZE and len(_files) > 1:
+            _, evicted = _files.popitem(last=False)
+            _size -= evicted.size
+    return loaded
+
+
+def _read(filename: str, module_globals: dict[str, Any] | None) -> list[str]:
+    try:
+        # Reading the file directly keeps a second copy out of linecache
+        with tokenize.open(filename) as source:
+            lines = source.readlines()
+    except (OSError, SyntaxError, UnicodeDecodeError):
+        try:
+            return linecache.getlines(filename, module_globals)
+        except Exception:
+            return []
+
+    if lines and not lines[-1].endswith("\n"):
+        lines[-1] += "\n"
+    return lines
+
+
+def _mtime(filename: str) -> float | None:
+    if filename.startswith("<"):
+        return None
+    try:
+        return os.stat(filename).st_mtime
+    except (OSError, ValueError):
+        return None
@@ -0,0 +1,429 @@
+from __future__ import annotations
+
+import json
+import logging
+import os
+import threading
+import time
+from collections.abc import Callable
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any
+
+from raygun4py.retry import is_retryable_status
+
+SEGMENT_SUFFIX = ".spool"
+CLAIMED_SUFFIX = ".replaying"
+
+SendResult = tuple[int, str]
+Transmit = Callable[[str, str], SendResult]
+
+# Claimed segments this process is replaying right now, across every DiskSpool instance
+_active_claims: set[str] = set()
+_active_claims_lock = threading.Lock()
+
+
+class DiskSpool:
+    """
+    A durable spool of report payloads that could not be delivered.
+
+    Payloads are appended as JSON lines to segment files in `directory`. Each append is
+    written with a single O_APPEND write followed by fsync, so a crash can at worst leave
+    a torn final line, which is skipped on replay. Segments are claimed for replay by an
+    atomic rename, so several processes can share one spool directory.
+    """
+
+    log: logging.Logger = logging.getLogger(__name__)
+
+    def __init__(
+        self,
+        directory: str,
+        max_bytes: int = 10 * 1024 * 1024,
+        segment_bytes: int = 1024 * 1024,
+        max_age: float = 24 * 60 * 60,
+    ) -> None:
+        """
+        Initialize a DiskSpool.
+
+        Parameters:
+            directory (str): Directory to store segment files in. Created if missing.
+            max_bytes (int, optional): Maximum total size of all segments; the oldest are deleted beyond this. Defaults to 10MB.
+            segment_bytes (int, optional): Size at which a new segment file is started. Defaults to 1MB.
+            max_age (float, optional): Seconds after which unsent segments are deleted. Defaults to 24 hours.
+        """
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.segment_bytes = segment_bytes
+        self.max_age = max_age
+
+        self.spooled = 0
+        self.replayed = 0
+        self.discarded = 0
+
+        os.makedirs(directory, exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._replay_lock = threading.Lock()
+        self._segment: str | None = None
+        self._segment_size = 0
+        self._sequence = 0
+        self._pid = os.getpid()
+
+        self._wakeup = threading.Event()
+        self._stopped = threading.Event()
+        self._thread: threading.Thread | None = None
+        self._transmit: Transmit | None = None
+        self._interval = 30.0
+        self._concurrency = 2
+
+        self._recover_abandoned_claims()
+
+    def append(self, path: str, payload: str, spooled_on: float | None = None) -> bool:
+        """
+        Persist a payload for later delivery.
+
+        Parameters:
+            path (str): The endpoint path the payload should be posted to.
+            payload (str): The encoded report.
+            spooled_on (float, optional): Original spool timestamp, kept when a record is re-spooled.
+
+        Returns:
+            bool: True if the payload was written to disk.
+        """
+        record = {
+            "path": path,
+            "payload": payload,
+            "spooledOn": spooled_on if spooled_on is not None else time.time(),
+        }
+        line = (json.dumps(record) + "\n").encode("utf-8")
+
+        if len(line) > self.max_bytes:
+            self.log.warning(
+                "Raygun4Py: Report is larger than spool_max_bytes and will not be spooled"
+            )
+            return False
+
+        with self._lock:
+            if (
+                self._segment is None
+                or self._pid != os.getpid()
+                or self._segment_size + len(line) > self.segment_bytes
+            ):
+                self._segment = self._new_segment_path()
+                self._segment_size = 0
+                self._pid = os.getpid()
+
+            try:
+                self._write(self._segment, line)
+            except OSError as e:
+                self.log.error(e)
+                self._segment = None
+                return False
+
+            self._segment_size += len(line)
+            self.spooled += 1
+
+        self._enforce_limits()
+        self._ensure_worker()
+        return True
+
+    def pending(self) -> int:
+        """Return the number of bytes currently waiting in the spool, including segments being replayed."""
+        total = 0
+        for segment in self._segments(claimed=True):
+            try:
+                total += os.path.getsize(segment)
+            except OSError:
+                pass
+        return total
+
+    def replay(
+        self, transmit: Transmit | None = None, concurrency: int | None = None
+    ) -> int:
+        """
+        Try to deliver every spooled payload, oldest first.
+
+        The first payload of each segment is sent on its own as a probe; if the endpoint is
+        still unavailable the segment is put back unchanged and replay stops. Otherwise the
+        rest of the segment is sent by up to `concurrency` threads, and only the payloads
+        that fail are spooled again. Payloads spooled more than `max_age` seconds ago are
+        discarded instead of being sent.
+
+        Parameters:
+            transmit (callable, optional): Sends (payload, path) and returns (status, body). Defaults to the one given to `start`.
+            concurrency (int, optional): Maximum concurrent sends. Defaults to the one given to `start`.
+
+        Returns:
+            int: The number of payloads delivered.
+        """
+        transmit = transmit or self._transmit
+        if transmit is None:
+            return 0
+        concurrency = max(1, concurrency or self._concurrency)
+
+        delivered = 0
+        with self._replay_lock:
+            with self._lock:
+                # Seal the active segment so its records are replayed as well
+                self._segment = None
+
+            self._enforce_limits()
+
+            for segment in self._segments():
+                claimed = "%s.%d%s" % (segment, os.getpid(), CLAIMED_SUFFIX)
+                with _active_claims_lock:
+                    _active_claims.add(os.path.abspath(claimed))
+                try:
+                    try:
+                        os.rename(segment, claimed)
+                    except OSError:
+                        # Claimed by another process, or expired in the meantime
+                        continue
+
+                    records = self._read(claimed)
+                    if records and not self._deliver(records[0], transmit):
+                        # The endpoint is still unavailable. Putting the segment back
+                        # as it was keeps its place in the replay order and its age.
+                        try:
+                            os.rename(claimed, segment)
+                        except OSError as e:
+                            self.log.error(e)
+                        break
+
+                    sent, remaining = self._send_records(
+                        records[1:], transmit, concurrency
+                    )
+                    delivered += sent + min(len(records), 1)
+
+                    # Only the records that failed after a successful probe are spooled again
+                    for record in remaining:
+                        self.append(
+                            record["path"], record["payload"], record["spooledOn"]
+                        )
+
+                    try:
+                        os.remove(claimed)
+                    except OSError as e:
+                        self.log.error(e)
+                finally:
+                    with _active_claims_lock:
+                        _active_claims.discard(os.path.abspath(claimed))
+
+                if remaining:
+                    break
+
+        self.replayed += delivered
+        return delivered
+
+    def start(
+        self, transmit: Transmit, interval: float = 30.0, concurrency: int = 2
+    ) -> None:
+        """
+        Replay spooled payloads from a background thread every `interval` seconds.
+
+        Parameters:
+            transmit (callable): Sends (payload, path) and returns (status, body), raising on transport errors.
+            interval (float, optional): Seconds between replay attempts. Defaults to 30.0.
+            concurrency (int, optional): Maximum concurrent sends during a replay. Defaults to 2.
+        """
+        self._transmit = transmit
+        self._interval = interval
+        self._concurrency = concurrency
+        self._ensure_worker()
+
+    def wake(self) -> None:
+        """Trigger a replay now, for example after a report was delivered successfully."""
+        if self._thread is not None:
+            self._wakeup.set()
+
+    def close(self) -> None:
+        self._stopped.set()
+        self._wakeup.set()
+
+    def _ensure_worker(self) -> None:
+        if self._transmit is None or self._stopped.is_set():
+            return
+
+        if self._thread is None or not self._thread.is_alive():
+            self._thread = threading.Thread(
+                target=self._run, name="raygun4py-spool", daemon=True
+            )
+            self._thread.start()
+
+    def _run(self) -> None:
+        while not self._stopped.is_set():
+            self._wakeup.wait(self._interval)
+            self._wakeup.clear()
+
+            if self._stopped.is_set():
+                return
+
+            try:
+                if self._segments():
+                    self.replay()
+            except Exception as e:
+                self.log.error(e)
+
+    def _send_records(
+        self,
+        records: list[dict[str, Any]],
+        transmit: Transmit,
+        concurrency: int,
+    ) -> tuple[int, list[dict[str, Any]]]:
+        if not records:
+            return 0, []
+
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            outcomes = list(executor.map(lambda r: self._deliver(r, transmit), records))
+
+        remaining = [r for r, ok in zip(records, outcomes) if not ok]
+        return len(records) - len(remaining), remaining
+
+    def _deliver(self, record: dict[str, Any], transmit: Transmit) -> bool:
+        """Return False if the record should stay in the spool."""
+        try:
+            status, text = transmit(record["payload"], record["path"])
+        except Exception as e:
+            self.log.debug(e)
+            return False
+
+        if is_retryable_status(status):
+            return False
+
+        if not 200 <= status < 300:
+            # The endpoint rejected this report outright; keeping it would only block the spool
+            self.discarded += 1
+            self.log.warning(
+                f"Raygun4Py: Discarding spooled report rejected with {status}: {text}"
+            )
+        return True
+
+    def _read(self, segment: str) -> list[dict[str, Any]]:
+        records = []
+        expired = 0
+        expiry = time.time() - self.max_age
+        try:
+            with open(segment, "rb") as f:
+                for line in f:
+                    if not line.endswith(b"\n"):
+                        # Torn write from a crash part-way through an append
+                        continue
+                    try:
+                        record = json.loads(line)
+                    except ValueError:
+                        continue
+                    # Re-spooled records keep their original time, which a segment's
+                    # modification time doesn't reflect
+                    if record.get("spooledOn", expiry) < expiry:
+                        expired += 1
+                        continue
+                    records.append(record)
+        except OSError as e:
+            self.log.error(e)
+
+        if expired:
+            self.discarded += expired
+            self.log.warning(
+                f"Raygun4Py: Discarding {expired} spooled reports older than spool_max_age"
+            )
+        return records
+
+    def _write(self, segment: str, line: bytes) -> None:
+        fd = os.open(segment, os.O_WRONLY | os.O_CREAT | os.O_APPEND, 0o600)
+        try:
+            view = memoryview(line)
+            while view:
+                written = os.write(fd, view)
+                view = view[written:]
+            os.fsync(fd)
+        finally:
+            os.close(fd)
+
+    def _new_segment_path(self) -> str:
+        self._sequence += 1
+        name = "%020d-%d-%d%s" % (
+            time.time_ns(),
+            os.getpid(),
+            self._sequence,
+            SEGMENT_SUFFIX,
+        )
+        return os.path.join(self.directory, name)
+
+    def _segments(self, claimed: bool = False) -> list[str]:
+        # Claimed segments are named after the segment they came from, so they sort with it
+        suffixes = (SEGMENT_SUFFIX, CLAIMED_SUFFIX) if claimed else (SEGMENT_SUFFIX,)
+        try:
+            names = os.listdir(self.directory)
+        except OSError:
+            return []
+        return sorted(
+            os.path.join(self.directory, name)
+            for name in names
+            if name.endswith(suffixes)
+        )
+
+    def _enforce_limits(self) -> None:
+        segments = []
+        for segment in self._segments(claimed=True):
+            try:
+                stat = os.stat(segment)
+            except OSError:
+                continue
+            segments.append((segment, stat.st_size, stat.st_mtime))
+
+        expiry = time.time() - self.max_age
+        total = sum(size for _, size, _ in segments)
+
+        for segment, size, mtime in segments:
+            if mtime >= expiry and total <= self.max_bytes:
+                continue
+            if os.path.abspath(segment) in _active_claims:
+                # Being replayed by this process; it is removed once the replay finishes
+                continue
+
+            self.log.warning(
+                f"Raygun4Py: Discarding spool segment {segment} to stay within spool limits"
+            )
+            with self._lock:
+                if segment == self._segment:
+                    self._segment = None
+            try:
+                os.remove(segment)
+            except OSError:
+                continue
+            total -= size
+
+    def _recover_abandoned_claims(self) -> None:
+        # Segments claimed by a process that died mid-replay are made available again.
+        # A claim under this process's own pid is abandoned too unless this process is
+        # replaying it: after a crash and restart in a container, the app is often PID 1
+        # both times.
+        try:
+            names = os.listdir(self.directory)
+        except OSError:
+            return
+
+        for name in names:
+            if not name.endswith(CLAIMED_SUFFIX):
+                continue
+
+            base, _, pid = name[: -len(CLAIMED_SUFFIX)].rpartition(".")
+            path = os.path.join(self.directory, name)
+            if pid == str(os.getpid()):
+                with _active_claims_lock:
+                    if os.path.abspath(path) in _active_claims:
+                        continue
+            elif os.name == "nt":
+                continue
+            else:
+                try:
+                    os.kill(int(pid), 0)
+                    continue
+                except ProcessLookupError:
+                    pass
+                except (OSError, ValueError):
+                    continue
+
+            try:
+                os.rename(path, os.path.join(self.directory, base))
+            except OSError:
+                pass
@@ -0,0 +1,113 @@
+from __future__ import annotations
+
+import threading
+from collections.abc import Callable
+from typing import Any
+
+Summarizer = Callable[[Any], str]
+
+_registry: dict[str, Summarizer] = {}
+_cache: dict[type, Summarizer | None] = {}
+_lock = threading.Lock()
+MAX_CACHED_TYPES = 4096
+
+
+def register_summarizer(cls: type | str, summarizer: Summarizer) -> None:
+    """
+    Describe values of a type with `summarizer` instead of their own str() or repr().
+
+    Use this for objects that are expensive, or have side effects, when rendered. Types are
+    matched by qualified name, including base classes, so summarizers can be registered for
+    libraries that are not imported.
+
+    Parameters:
+        cls (type or str): The type, or its qualified name, such as "django.db.models.query.QuerySet".
+        summarizer (callable): Returns a short description of a value. Exceptions it raises are ignored.
+    """
+    with _lock:
+        _registry[qualified_name(cls) if isinstance(cls, type) else cls] = summarizer
+        _cache.clear()
+
+
+def unregister_summarizer(cls: type | str) -> None:
+    """Remove the summarizer registered for a type, or its qualified name."""
+    with _lock:
+        _registry.pop(qualified_name(cls) if isinstance(cls, type) else cls, None)
+        _cache.clear()
+
+
+def lookup(cls: type) -> Summarizer | None:
+    """Return the summarizer for a type, or for its nearest base class that has one."""
+    try:
+        return _cache[cls]
+    except KeyError:
+        pass
+
+    summarizer = None
+    for base in getattr(cls, "__mro__", (cls,)):
+        summarizer = _registry.get(qualified_name(base))
+        if summarizer is not None:
+            break
+
+    with _lock:
+        if len(_cache) >= MAX_CACHED_TYPES:
+            _cache.clear()
+        _cache[cls] = summarizer
+    return summarizer
+
+
+def qualified_name(cls: type) -> str:
+    return "%s.%s" % (cls.__module__, cls.__qualname__)
+
+
+def summarize_queryset(value: Any) -> str:
+    # Rendering a QuerySet would run its query, so only what is already known is shown
+    model = getattr(value.model, "__name__", "?")
+    if value._result_cache is None:
+        return "QuerySet<%s, unevaluated>" % model
+    return "QuerySet<%s, %d results>" % (model, len(value._result_cache))
+
+
+def summarize_ndarray(value: Any) -> str:
+    return "ndarray shape=%s dtype=%s" % (tuple(value.shape), value.dtype)
+
+
+def summarize_dataframe(value: Any) -> str:
+    columns = list(value.columns[:10])
+    more = ", ..." if len(value.columns) > 10 else ""
+    return "DataFrame shape=%s columns=[%s%s]" % (
+        tuple(value.shape),
+        ", ".join(repr(column) for column in columns),
+        more,
+    )
+
+
+def summarize_series(value: Any) -> str:
+    return "Series name=%r length=%d dtype=%s" % (value.name, len(value), value.dtype)
+
+
+def summarize_io(value: Any) -> str:
+    name = getattr(value, "name", None)
+    description = type(value).__name__
+    if isinstance(name, (str, int)):
+        description += " name=%r" % name
+    if value.closed:
+        description += " closed"
+    return "<%s>" % description
+
+
+def summarize_socket(value: Any) -> str:
+    # socket's own repr asks the OS for both addresses
+    return "<socket fd=%d family=%s type=%s>" % (
+        value.fileno(),
+        getattr(value.family, "name", value.family),
+        getattr(value.type, "name", value.type),
+    )
+
+
+register_summarizer("django.db.models.query.QuerySet", summarize_queryset)
+register_summarizer("numpy.ndarray", summarize_ndarray)
+register_summarizer("pandas.core.frame.DataFrame", summarize_dataframe)
+register_summarizer("pandas.core.series.Series", summarize_series)
+register_summarizer("_io._IOBase", summarize_io)
+register_summarizer("socket.socket", summarize_socket)
@@ -0,0 +1,114 @@
+from __future__ import annotations
+
+import os
+import threading
+import time
+from typing import Any
+
+import requests
+from requests.adapters import HTTPAdapter
+
+
+def proxies_from_config(proxy: dict[str, Any] | str | None) -> dict[str, str] | None:
+    """
+    Convert the `proxy` config option into a `requests` proxies mapping.
+
+    Parameters:
+        proxy (dict or str): Either {"host": ..., "port": ...} as stored by `RaygunSender.set_proxy`, or a proxy URL.
+
+    Returns:
+        dict: A mapping for both the http and https schemes, or None if no proxy is configured.
+    """
+    if not proxy:
+        return None
+
+    if isinstance(proxy, dict):
+        host = proxy.get("host")
+        if not host:
+            return None
+        url = str(host)
+        if proxy.get("port"):
+            url = "%s:%s" % (url, proxy["port"])
+    else:
+        url = str(proxy)
+
+    if "://" not in url:
+        url = "http://" + url
+
+    return {"http": url, "https": url}
+
+
+class HttpTransport:
+    """
+    A keep-alive HTTP transport that reuses pooled connections between reports.
+
+    The underlying `requests.Session` is recreated after being idle for `idle_timeout`
+    seconds, and after a fork so that connections are never shared between processes.
+    """
+
+    def __init__(self, pool_size: int = 10, idle_timeout: float = 60.0) -> None:
+        """
+        Initialize an HttpTransport.
+
+        Parameters:
+            pool_size (int, optional): Maximum number of pooled connections per host. Defaults to 10.
+            idle_timeout (float, optional): Seconds a session may sit unused before its connections are discarded. Defaults to 60.0.
+        """
+        self.pool_size = max(1, int(pool_size))
+        self.idle_timeout = idle_timeout
+
+        self._lock = threading.Lock()
+        self._session: requests.Session | None = None
+        self._last_used = 0.0
+        self._pid = os.getpid()
+
+    def post(
+        self,
+        url: str,
+        data: str | bytes,
+        headers: dict[str, Any],
+        timeout: float,
+        proxies: dict[str, str] | None = None,
+    ) -> requests.Response:
+        session = self._acquire()
+        return session.post(
+            url, data=data, headers=headers, timeout=timeout, proxies=proxies
+        )
+
+    def close(self) -> None:
+        with self._lock:
+            if self._session is not None:
+                self._session.close()
+                self._session = None
+
+    def _acquire(self) -> requests.Session:
+        now = time.monotonic()
+
+        with self._lock:
+            if self._session is not None and self._pid != os.getpid():
+                # Never reuse sockets inherited from the parent process
+                self._session = None
+
+            if (
+                self._session is not None
+                and self.idle_timeout is not None
+                and now - self._last_used > self.idle_timeout
+            ):
+                self._session.close()
+                self._session = None
+
+            if self._session is None:
+                self._session = self._create_session()
+                self._pid = os.getpid()
+
+            self._last_used = now
+            return self._session
+
+    def _create_session(self) -> requests.Session:
+        session = requests.Session()
+        adapter = HTTPAdapter(
+            pool_connections=self.pool_size, pool_maxsize=self.pool_size
+        )
+        session.mount("https://", adapter)
+        session.mount("http://", adapter)
+        return session
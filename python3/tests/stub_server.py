@@ -0,0 +1,74 @@
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class StubRaygunServer(object):
+    """A local stand-in for the Raygun ingestion API that records every request it receives."""
+
+    def __init__(self, status=202, body="", delay=0.0, headers=None):
+        self.status = status
+        self.headers = headers or {}
+        self.body = body
+        self.delay = delay
+        self.requests = []
+        self.received = threading.Event()
+        self.release = threading.Event()
+        self.release.set()
+
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_POST(self):
+                length = int(self.headers.get("Content-Length", 0))
+                data = self.rfile.read(length)
+                stub.requests.append(
+                    {
+                        "path": self.path,
+                        "headers": dict(self.headers),
+                        "body": data,
+                        "client": self.client_address,
+                    }
+                )
+                stub.received.set()
+                stub.release.wait(5)
+                if stub.delay:
+                    time.sleep(stub.delay)
+
+                status = stub.status() if callable(stub.status) else stub.status
+                payload = stub.body.encode("utf-8")
+                self.send_response(status)
+                for name, value in stub.headers.items():
+                    self.send_header(name, value)
+                self.send_header("Content-Length", str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def log_message(self, format, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.server.daemon_threads = True
+        self.thread = threading.Thread(
+            target=self.server.serve_forever, args=(0.05,), daemon=True
+        )
+
+    @property
+    def host(self):
+        return "127.0.0.1:%d" % self.server.server_address[1]
+
+    def point(self, sender):
+        sender.endpointprotocol = "http://"
+        sender.endpointhost = self.host
+        return sender
+
+    def __enter__(self):
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.release.set()
+        self.server.shutdown()
+        self.server.server_close()
@@ -0,0 +1,161 @@
+import sys
+import threading
+import unittest
+from unittest import mock
+
+from raygun4py import aggregation, raygunmsgs
+
+
+def raise_value_error(message):
+    raise ValueError(message)
+
+
+def capture(message):
+    try:
+        raise_value_error(message)
+    except ValueError:
+        return sys.exc_info()
+
+
+class TestFingerprint(unittest.TestCase):
+    def test_numbers_in_message_are_ignored(self):
+        first = aggregation.fingerprint(*capture("order 12 at 0x7f3a not found"))
+        second = aggregation.fingerprint(*capture("order 345 at 0x9bc1 not found"))
+
+        self.assertEqual(first, second)
+
+    def test_different_messages_differ(self):
+        first = aggregation.fingerprint(*capture("order not found"))
+        second = aggregation.fingerprint(*capture("user not found"))
+
+        self.assertNotEqual(first, second)
+
+    def test_different_locations_differ(self):
+        first = aggregation.fingerprint(*capture("boom"))
+        try:
+            raise ValueError("boom")
+        except ValueError:
+            second = aggregation.fingerprint(*sys.exc_info())
+
+        self.assertNotEqual(first, second)
+
+
+class TestErrorAggregator(unittest.TestCase):
+    def setUp(self):
+        self.now = 1000.0
+        patcher = mock.patch(
+            "raygun4py.aggregation.time.time", side_effect=lambda: self.now
+        )
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+        self.message = raygunmsgs.RaygunMessageBuilder({}).new().build()
+
+    def test_repeats_are_counted_into_one_summary(self):
+        aggregator = aggregation.ErrorAggregator(window=60)
+
+        self.assertTrue(aggregator.observe("key"))
+        aggregator.remember("key", self.message)
+        for _ in range(4):
+            self.now += 5
+            self.assertFalse(aggregator.observe("key"))
+
+        self.assertEqual(aggregator.collect(), [])
+
+        self.now = 1061.0
+        summaries = aggregator.collect()
+
+        self.assertEqual(len(summaries), 1)
+        custom_data = summaries[0].get_details()["userCustomData"]
+        self.assertEqual(custom_data["occurrenceCount"], 5)
+        self.assertEqual(custom_data["firstOccurredOn"], "1970-01-01T00:16:40+00:00")
+        self.assertEqual(custom_data["lastOccurredOn"], "1970-01-01T00:17:00+00:00")
+        self.assertEqual(aggregator.aggregated, 4)
+
+        # A new window starts once the previous one has ended
+        self.assertTrue(aggregator.observe("key"))
+
+    def test_single_occurrence_has_no_summary(self):
+        aggregator = aggregation.ErrorAggregator(window=60)
+        aggregator.observe("key")
+        aggregator.remember("key", self.message)
+
+        self.assertEqual(aggregator.collect(flush=True), [])
+
+    def test_flush_ends_open_windows(self):
+        aggregator = aggregation.ErrorAggregator(window=60)
+        aggregator.observe("key")
+        aggregator.remember("key", self.message)
+        aggregator.observe("key")
+
+        self.assertEqual(len(aggregator.collect(flush=True)), 1)
+        self.assertEqual(aggregator.collect(flush=True), [])
+
+    def test_oldest_fingerprints_are_evicted(self):
+        aggregator = aggregation.ErrorAggregator(window=60, max_entries=2)
+        for key in ["a", "b", "c"]:
+            aggregator.observe(key)
+
+        self.assertEqual(list(aggregator._entries), ["b", "c"])
+
+
+class TestBackgroundSummaries(unittest.TestCase):
+    def setUp(self):
+        self.message = raygunmsgs.RaygunMessageBuilder({}).new().build()
+        self.sent = []
+        self.sent_event = threading.Event()
+
+    def send(self, summary):
+        self.sent.append(summary)
+        self.sent_event.set()
+
+    def create_aggregator(self, window):
+        aggregator = aggregation.ErrorAggregator(window=window)
+        aggregator.start(self.send)
+        self.addCleanup(aggregator.close)
+        return aggregator
+
+    def test_summary_is_sent_when_window_ends(self):
+        aggregator = self.create_aggregator(window=0.05)
+        aggregator.observe("key")
+        aggregator.remember("key", self.message)
+        aggregator.observe("key")
+
+        self.assertTrue(self.sent_event.wait(5))
+        self.assertEqual(len(self.sent), 1)
+        custom_data = self.sent[0].get_details()["userCustomData"]
+        self.assertEqual(custom_data["occurrenceCount"], 2)
+
+    def test_exit_hook_sends_open_windows(self):
+        with mock.patch("atexit.register") as register:
+            aggregator = self.create_aggregator(window=60)
+        aggregator.observe("key")
+        aggregator.remember("key", self.message)
+        aggregator.observe("key")
+
+        register.assert_called_once_with(aggregator._shutdown)
+        aggregator._shutdown()
+
+        self.assertEqual(len(self.sent), 1)
+
+    def test_close_unregisters_exit_hook(self):
+        with mock.patch("atexit.unregister") as unregister:
+            aggregator = self.create_aggregator(window=60)
+            aggregator.close()
+
+        unregister.assert_called_with(aggregator._shutdown)
+
+    def test_send_errors_are_logged(self):
+        aggregator = aggregation.ErrorAggregator(window=60)
+        aggregator.start(mock.MagicMock(side_effect=RuntimeError("offline")))
+        self.addCleanup(aggregator.close)
+        aggregator.observe("key")
+        aggregator.remember("key", self.message)
+        aggregator.observe("key")
+
+        with self.assertLogs("raygun4py.aggregation", "ERROR"):
+            aggregator._shutdown()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,155 @@
+import asyncio
+import concurrent.futures
+import json
+import logging
+import unittest
+import warnings
+
+from raygun4py import asyncprovider, dispatch, raygunprovider
+
+from tests.stub_server import StubRaygunServer
+
+
+class TestAsyncRaygunSender(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        self.server = StubRaygunServer().__enter__()
+        self.addCleanup(self.server.__exit__)
+        self.sender = self.server.point(asyncprovider.AsyncRaygunSender("apikey"))
+
+    async def asyncTearDown(self):
+        self.server.release.set()
+        await self.sender.aclose()
+
+    async def test_send_exception_is_awaitable(self):
+        try:
+            raise Exception("awaited")
+        except Exception:
+            result = await self.sender.asend_exception()
+
+        self.assertEqual(result, (202, ""))
+        payload = json.loads(self.server.requests[0]["body"])
+        self.assertEqual(payload["details"]["error"]["message"], "Exception: awaited")
+
+    async def test_send_exception_does_not_block_loop(self):
+        self.server.release.clear()
+        ticks = 0
+
+        async def ticker():
+            nonlocal ticks
+            while True:
+                ticks += 1
+                await asyncio.sleep(0.01)
+
+        ticking = asyncio.ensure_future(ticker())
+        try:
+            raise Exception("slow endpoint")
+        except Exception:
+            sending = asyncio.ensure_future(self.sender.asend_exception())
+
+        await asyncio.sleep(0.1)
+        self.assertFalse(sending.done())
+        self.assertGreater(ticks, 3)
+
+        self.server.release.set()
+        self.assertEqual(await sending, (202, ""))
+        ticking.cancel()
+
+    async def test_send_exception_nowait_captures_current_exception(self):
+        try:
+            raise ValueError("fire and forget")
+        except ValueError:
+            sending = self.sender.send_exception_nowait()
+
+        self.assertTrue(await self.sender.aflush(5))
+
+        self.assertEqual(await sending, (202, ""))
+        payload = json.loads(self.server.requests[0]["body"])
+        self.assertEqual(
+            payload["details"]["error"]["message"], "ValueError: fire and forget"
+        )
+
+    async def test_send_exception_nowait_is_bounded(self):
+        sender = self.server.point(
+            asyncprovider.AsyncRaygunSender("apikey", config={"async_queue_size": 1})
+        )
+        self.addAsyncCleanup(sender.aclose, 5)
+        self.server.release.clear()
+
+        results = []
+        for index in range(3):
+            try:
+                raise ValueError(index)
+            except ValueError:
+                results.append(sender.send_exception_nowait())
+            if index == 0:
+                # The first report is in flight and the second fills the queue
+                await asyncio.get_running_loop().run_in_executor(
+                    None, self.server.received.wait, 5
+                )
+
+        self.assertEqual(await results[2], dispatch.DROPPED_RESULT)
+        self.server.release.set()
+        self.assertEqual(await results[0], (202, ""))
+        self.assertEqual(await results[1], (202, ""))
+
+    async def test_send_exception_does_not_return_a_coroutine(self):
+        try:
+            raise ValueError("sync")
+        except ValueError:
+            future = self.sender.send_exception()
+
+        self.assertIsInstance(future, concurrent.futures.Future)
+        self.assertEqual(await asyncio.wrap_future(future), (202, ""))
+
+    async def test_logging_handler(self):
+        logger = logging.getLogger("raygun4py.tests.async")
+        logger.propagate = False
+        handler = raygunprovider.RaygunHandler.from_sender(self.sender)
+        logger.addHandler(handler)
+        self.addCleanup(logger.removeHandler, handler)
+
+        with warnings.catch_warnings():
+            warnings.simplefilter("error", RuntimeWarning)
+            try:
+                raise ValueError("logged")
+            except ValueError:
+                logger.exception("Something failed")
+            logger.error("Without an exception")
+
+            self.assertTrue(await self.sender.aflush(5))
+
+        self.assertEqual(len(self.server.requests), 2)
+        messages = [
+            json.loads(request["body"])["details"]["error"]["message"]
+            for request in self.server.requests
+        ]
+        self.assertEqual(messages, ["Something failed", "Without an exception"])
+
+    async def test_connection_is_reused(self):
+        for _ in range(2):
+            try:
+                raise Exception("reuse")
+            except Exception:
+                await self.sender.asend_exception()
+
+        self.assertEqual(
+            self.server.requests[0]["client"], self.server.requests[1]["client"]
+        )
+
+    async def test_cancelled_by_before_send(self):
+        self.sender.on_before_send(lambda payload: None)
+
+        try:
+            raise Exception("cancelled")
+        except Exception:
+            self.assertIsNone(await self.sender.asend_exception())
+
+        self.assertEqual(self.server.requests, [])
+
+
+def main():
+    unittest.main()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+import unittest
+from unittest import mock
+
+from raygun4py import circuitbreaker
+
+
+class TestCircuitBreaker(unittest.TestCase):
+    def setUp(self):
+        self.now = 1000.0
+        patcher = mock.patch(
+            "raygun4py.circuitbreaker.time.monotonic", side_effect=lambda: self.now
+        )
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.breaker = circuitbreaker.CircuitBreaker(
+            failure_threshold=3, reset_timeout=10
+        )
+
+    def open_breaker(self):
+        for _ in range(3):
+            self.breaker.record_failure()
+
+    def test_closed_by_default(self):
+        self.assertEqual(self.breaker.state, circuitbreaker.CLOSED)
+        self.assertTrue(self.breaker.allow_request())
+
+    def test_opens_after_consecutive_failures(self):
+        self.breaker.record_failure()
+        self.breaker.record_failure()
+        self.assertTrue(self.breaker.allow_request())
+
+        self.breaker.record_failure()
+
+        self.assertEqual(self.breaker.state, circuitbreaker.OPEN)
+        self.assertFalse(self.breaker.allow_request())
+        self.assertEqual(self.breaker.short_circuited, 1)
+
+    def test_success_resets_failure_count(self):
+        self.breaker.record_failure()
+        self.breaker.record_failure()
+        self.breaker.record_success()
+        self.breaker.record_failure()
+
+        self.assertEqual(self.breaker.state, circuitbreaker.CLOSED)
+
+    def test_half_open_allows_single_trial(self):
+        self.open_breaker()
+        self.now += 10
+
+        self.assertEqual(self.breaker.state, circuitbreaker.HALF_OPEN)
+        self.assertTrue(self.breaker.allow_request())
+        self.assertFalse(self.breaker.allow_request())
+
+    def test_successful_trial_closes(self):
+        self.open_breaker()
+        self.now += 10
+        self.breaker.allow_request()
+
+        self.breaker.record_success()
+
+        self.assertEqual(self.breaker.state, circuitbreaker.CLOSED)
+
+    def test_failed_trial_reopens(self):
+        self.open_breaker()
+        self.now += 10
+        self.breaker.allow_request()
+
+        self.breaker.record_failure()
+
+        self.assertEqual(self.breaker.state, circuitbreaker.OPEN)
+        self.assertFalse(self.breaker.allow_request())
+
+
+def main():
+    unittest.main()
+
+
+if __name__ == "__main__":
+    main()
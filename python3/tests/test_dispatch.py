@@ -0,0 +1,300 @@
+import os
+import signal
+import threading
+import unittest
+from unittest import mock
+
+from raygun4py import dispatch
+
+
+class BlockingHandler(object):
+    def __init__(self):
+        self.started = threading.Event()
+        self.release = threading.Event()
+        self.items = []
+
+    def __call__(self, item):
+        self.started.set()
+        self.release.wait(5)
+        self.items.append(item)
+        return 202, ""
+
+
+class TestBackgroundDispatcher(unittest.TestCase):
+    def setUp(self):
+        self.handler = BlockingHandler()
+
+    def create_dispatcher(self, **kwargs):
+        dispatcher = dispatch.BackgroundDispatcher(self.handler, **kwargs)
+        self.addCleanup(dispatcher.close, 5)
+        self.addCleanup(self.handler.release.set)
+        return dispatcher
+
+    def occupy_worker(self, dispatcher):
+        future = dispatcher.submit("in-flight")
+        self.assertTrue(self.handler.started.wait(5))
+        return future
+
+    def test_submit_returns_future_with_handler_result(self):
+        dispatcher = self.create_dispatcher()
+        self.handler.release.set()
+
+        future = dispatcher.submit("item")
+
+        self.assertEqual(future.result(5), (202, ""))
+        self.assertEqual(self.handler.items, ["item"])
+        self.assertEqual(dispatcher.sent, 1)
+
+    def test_drop_newest(self):
+        dispatcher = self.create_dispatcher(queue_size=1)
+        self.occupy_worker(dispatcher)
+
+        queued = dispatcher.submit("queued")
+        dropped = dispatcher.submit("dropped")
+
+        self.assertEqual(dropped.result(0), dispatch.DROPPED_RESULT)
+        self.handler.release.set()
+        self.assertEqual(queued.result(5), (202, ""))
+        self.assertEqual(dispatcher.dropped, 1)
+        self.assertNotIn("dropped", self.handler.items)
+
+    def test_drop_oldest(self):
+        dispatcher = self.create_dispatcher(
+            queue_size=1, overflow_policy=dispatch.OVERFLOW_DROP_OLDEST
+        )
+        self.occupy_worker(dispatcher)
+
+        oldest = dispatcher.submit("oldest")
+        newest = dispatcher.submit("newest")
+
+        self.assertEqual(oldest.result(0), dispatch.DROPPED_RESULT)
+        self.handler.release.set()
+        self.assertEqual(newest.result(5), (202, ""))
+        self.assertEqual(self.handler.items, ["in-flight", "newest"])
+
+    def test_block_times_out_and_drops(self):
+        dispatcher = self.create_dispatcher(
+            queue_size=1,
+            overflow_policy=dispatch.OVERFLOW_BLOCK,
+            block_timeout=0.05,
+        )
+        self.occupy_worker(dispatcher)
+        dispatcher.submit("queued")
+
+        blocked = dispatcher.submit("blocked")
+
+        self.assertEqual(blocked.result(0), dispatch.DROPPED_RESULT)
+
+    def test_block_waits_for_space(self):
+        dispatcher = self.create_dispatcher(
+            queue_size=1, overflow_policy=dispatch.OVERFLOW_BLOCK, block_timeout=5
+        )
+        self.occupy_worker(dispatcher)
+        dispatcher.submit("queued")
+
+        threading.Timer(0.05, self.handler.release.set).start()
+        blocked = dispatcher.submit("blocked")
+
+        self.assertEqual(blocked.result(5), (202, ""))
+
+    def test_flush_waits_for_queue(self):
+        dispatcher = self.create_dispatcher()
+        self.occupy_worker(dispatcher)
+
+        self.assertFalse(dispatcher.flush(0.01))
+        self.handler.release.set()
+        self.assertTrue(dispatcher.flush(5))
+        self.assertEqual(dispatcher.pending(), 0)
+
+    def test_handler_exception_is_set_on_future(self):
+        def failing(item):
+            raise RuntimeError("boom")
+
+        dispatcher = dispatch.BackgroundDispatcher(failing)
+        self.addCleanup(dispatcher.close, 5)
+
+        future = dispatcher.submit("item")
+
+        self.assertIsInstance(future.exception(5), RuntimeError)
+        self.assertEqual(dispatcher.failed, 1)
+
+    def test_submit_after_close_drops(self):
+        dispatcher = self.create_dispatcher()
+        dispatcher.close(5)
+
+        self.assertEqual(dispatcher.submit("late").result(0), dispatch.DROPPED_RESULT)
+
+    def test_close_unregisters_exit_hook(self):
+        with (
+            mock.patch("atexit.register") as register,
+            mock.patch("atexit.unregister") as unregister,
+        ):
+            dispatcher = dispatch.BackgroundDispatcher(self.handler)
+            dispatcher.close(5)
+
+        register.assert_called_once_with(dispatcher._shutdown)
+        unregister.assert_called_once_with(dispatcher._shutdown)
+
+    def test_forked_child_drops_parent_queue(self):
+        dispatcher = self.create_dispatcher()
+        self.occupy_worker(dispatcher)
+        dispatcher.submit("queued in parent")
+
+        with (
+            mock.patch("os.getpid", return_value=dispatcher._pid + 1),
+            mock.patch("threading.Thread"),
+        ):
+            self.assertEqual(dispatcher.pending(), 0)
+            future = dispatcher.submit("queued in child")
+
+        self.assertEqual(list(dispatcher._queue), [("queued in child", future)])
+        self.assertEqual(dispatcher._unfinished, 1)
+        # Put the real worker back in charge so the dispatcher can close
+        dispatcher._pid = os.getpid()
+        dispatcher._thread = None
+        with dispatcher._condition:
+            dispatcher._ensure_worker()
+
+    @unittest.skipUnless(hasattr(os, "fork"), "os.fork is not available")
+    def test_fork_while_lock_is_held(self):
+        dispatcher = self.create_dispatcher()
+        self.occupy_worker(dispatcher)
+        dispatcher.submit("queued in parent")
+
+        # Another thread holds the lock at the moment of the fork, as the worker might
+        locked, unlock = threading.Event(), threading.Event()
+
+        def hold_lock():
+            with dispatcher._condition:
+                locked.set()
+                unlock.wait(5)
+
+        holder = threading.Thread(target=hold_lock)
+        holder.start()
+        self.assertTrue(locked.wait(5))
+        try:
+            pid = os.fork()
+            if pid == 0:
+                # The child must neither deadlock on the inherited lock nor resend the
+                # parent's queue
+                ok = False
+                # Ends the child, failing the test, should it deadlock
+                signal.alarm(10)
+                try:
+                    self.handler.release.set()
+                    future = dispatcher.submit("queued in child")
+                    ok = dispatcher.flush(5) and future.result(0) == (202, "")
+                    ok = ok and self.handler.items == ["queued in child"]
+                finally:
+                    os._exit(0 if ok else 1)
+        finally:
+            unlock.set()
+            holder.join()
+
+        _, status = os.waitpid(pid, 0)
+        self.assertEqual(os.waitstatus_to_exitcode(status), 0)
+
+    def test_unknown_overflow_policy(self):
+        with self.assertRaises(ValueError):
+            dispatch.BackgroundDispatcher(self.handler, overflow_policy="nope")
+
+
+class TestBatchingDispatcher(unittest.TestCase):
+    def setUp(self):
+        self.batches = []
+
+    def batch_handler(self, items):
+        self.batches.append(list(items))
+        return [(202, "")] * len(items)
+
+    def create_dispatcher(self, **kwargs):
+        kwargs.setdefault("batch_max_latency", 5)
+        dispatcher = dispatch.BackgroundDispatcher(
+            None, batch_handler=self.batch_handler, **kwargs
+        )
+        self.addCleanup(dispatcher.close, 5)
+        return dispatcher
+
+    def test_flushes_on_entry_count(self):
+        dispatcher = self.create_dispatcher(batch_max_entries=3)
+
+        futures = [dispatcher.submit("entry %d" % i) for i in range(3)]
+
+        for future in futures:
+            self.assertEqual(future.result(5), (202, ""))
+        self.assertEqual(self.batches, [["entry 0", "entry 1", "entry 2"]])
+
+    def test_flushes_on_byte_size(self):
+        # Two entries make a 15 byte JSON array
+        dispatcher = self.create_dispatcher(batch_max_bytes=15)
+
+        first = dispatcher.submit("x" * 6)
+        second = dispatcher.submit("y" * 6)
+
+        self.assertEqual(second.result(5), (202, ""))
+        self.assertTrue(first.done())
+        self.assertEqual(self.batches, [["x" * 6, "y" * 6]])
+
+    def test_batches_never_exceed_byte_size(self):
+        dispatcher = self.create_dispatcher(batch_max_bytes=1000)
+
+        for i in range(4):
+            dispatcher.submit(str(i) * 300)
+        self.assertTrue(dispatcher.flush(5))
+
+        self.assertEqual([len(batch) for batch in self.batches], [3, 1])
+        for batch in self.batches:
+            self.assertLessEqual(len("[" + ",".join(batch) + "]"), 1000)
+
+    def test_oversized_entry_is_sent_on_its_own(self):
+        dispatcher = self.create_dispatcher(batch_max_bytes=100)
+
+        dispatcher.submit("small")
+        large = dispatcher.submit("x" * 200)
+        dispatcher.submit("after")
+
+        self.assertEqual(large.result(5), (202, ""))
+        self.assertTrue(dispatcher.flush(5))
+        self.assertEqual(self.batches, [["small"], ["x" * 200], ["after"]])
+
+    def test_flushes_on_latency(self):
+        dispatcher = self.create_dispatcher(batch_max_latency=0.05)
+
+        future = dispatcher.submit("lonely")
+
+        self.assertEqual(future.result(5), (202, ""))
+        self.assertEqual(self.batches, [["lonely"]])
+
+    def test_flush_sends_partial_batch(self):
+        dispatcher = self.create_dispatcher()
+        dispatcher.submit("first")
+        dispatcher.submit("second")
+
+        self.assertTrue(dispatcher.flush(1))
+        self.assertEqual(self.batches, [["first", "second"]])
+
+    def test_prepare_failure_only_fails_that_entry(self):
+        def prepare(item):
+            if item == "bad":
+                raise ValueError("cannot encode")
+            return item.upper()
+
+        dispatcher = self.create_dispatcher(prepare=prepare, batch_max_entries=2)
+
+        good = dispatcher.submit("good")
+        bad = dispatcher.submit("bad")
+        other = dispatcher.submit("other")
+
+        self.assertIsInstance(bad.exception(5), ValueError)
+        self.assertEqual(good.result(5), (202, ""))
+        self.assertEqual(other.result(5), (202, ""))
+        self.assertEqual(self.batches, [["GOOD", "OTHER"]])
+        self.assertEqual((dispatcher.sent, dispatcher.failed), (2, 1))
+
+
+def main():
+    unittest.main()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,132 @@
+import json
+import sys
+import unittest
+import uuid
+from unittest import mock
+
+import jsonpickle
+from raygun4py import encoding, raygunmsgs
+
+
+class CustomObject:
+    def __init__(self):
+        self.name = "custom"
+        self.values = (1, 2)
+
+
+class TestEncode(unittest.TestCase):
+    def setUp(self):
+        def raise_error():
+            items = {1: "one"}  # noqa: F841
+            raise ValueError("failed")
+
+        try:
+            raise_error()
+        except ValueError:
+            error = raygunmsgs.RaygunErrorMessage(
+                *sys.exc_info(), options={"transmitLocalVariables": True}
+            )
+
+        self.message = (
+            raygunmsgs.RaygunMessageBuilder({})
+            .new()
+            .set_exception_details(error)
+            .set_customdata(
+                {
+                    "object": CustomObject(),
+                    "id": uuid.UUID(int=5),
+                    "tags": {"a"},
+                    "text": "ünïcode",
+                    "counts": {1: 2},
+                }
+            )
+            .build()
+        )
+        self.expected = json.loads(jsonpickle.encode(self.message, unpicklable=False))
+
+    def test_matches_jsonpickle_with_stdlib_json(self):
+        with mock.patch("raygun4py.encoding.USE_ORJSON", False):
+            self.assertEqual(json.loads(encoding.encode(self.message)), self.expected)
+
+    @unittest.skipUnless(encoding.USE_ORJSON, "orjson is not installed")
+    def test_matches_jsonpickle_with_orjson(self):
+        encoded = json.loads(encoding.encode(self.message))
+
+        # orjson writes UUIDs as strings rather than flattening their attributes
+        self.assertEqual(
+            encoded["details"]["userCustomData"].pop("id"), str(uuid.UUID(int=5))
+        )
+        del self.expected["details"]["userCustomData"]["id"]
+        self.assertEqual(encoded, self.expected)
+
+    def test_unsupported_keys_fall_back_to_jsonpickle(self):
+        with mock.patch("raygun4py.encoding.USE_ORJSON", False):
+            encoded = json.loads(encoding.encode({"pair": {(1, 2): "value"}}))
+
+        self.assertEqual(encoded, {"pair": {"(1, 2)": "value"}})
+
+    def test_occurred_on_is_iso_formatted(self):
+        encoded = json.loads(encoding.encode(self.message))
+
+        self.assertEqual(encoded["occurredOn"], self.message.occurredOn.isoformat())
+
+
+class TestEncodeBytes(unittest.TestCase):
+    def setUp(self):
+        self.document = {
+            "occurredOn": "2024-01-01T00:00:00+00:00",
+            "details": {
+                "error": {
+                    "stackTrace": [
+                        {"lineNumber": i, "localVariables": {"value": "x" * 1000}}
+                        for i in range(10)
+                    ]
+                },
+                "userCustomData": {"empty": {}, "items": [], "pair": {(1, 2): "value"}},
+                "tags": ["one", "two"],
+            },
+        }
+
+    def test_matches_encode(self):
+        for use_orjson in {False, encoding.USE_ORJSON}:
+            with mock.patch("raygun4py.encoding.USE_ORJSON", use_orjson):
+                self.assertEqual(
+                    json.loads(encoding.encode_bytes(self.document)),
+                    json.loads(encoding.encode(self.document)),
+                )
+
+    def test_encoded_size(self):
+        self.assertEqual(
+            encoding.encoded_size(self.document),
+            len(encoding.encode_bytes(self.document)),
+        )
+
+    def test_stops_once_over_budget(self):
+        with mock.patch(
+            "raygun4py.encoding._dumps_bytes", wraps=encoding._dumps_bytes
+        ) as dumps:
+            with self.assertRaises(encoding.PayloadTooLarge) as raised:
+                encoding.encode_bytes(self.document, budget=2500)
+
+        self.assertLess(raised.exception.size, 2500 + 1100)
+        # Only the first few stack frames were encoded
+        self.assertLess(dumps.call_count, 10)
+
+    def test_lone_surrogates_are_escaped(self):
+        document = {"text": "caf\udce9 \u00fc", "key\udcff": ["\ud800"]}
+
+        for use_orjson in {False, encoding.USE_ORJSON}:
+            with mock.patch("raygun4py.encoding.USE_ORJSON", use_orjson):
+                payload = encoding.encode_bytes(document)
+
+            self.assertIn(b"caf\\udce9 \xc3\xbc", payload)
+            self.assertEqual(json.loads(payload), document)
+
+    def test_buffer_is_reused_without_stale_bytes(self):
+        encoding.encode_bytes(self.document)
+
+        self.assertEqual(encoding.encode_bytes({"a": 1}), b'{"a":1}')
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,77 @@
+import os
+import unittest
+from unittest import mock
+
+from raygun4py import environment, raygunmsgs
+
+
+class TestEnvironment(unittest.TestCase):
+    def setUp(self):
+        environment.invalidate()
+        self.addCleanup(environment.invalidate)
+
+    def test_snapshot(self):
+        snapshot = environment.snapshot()
+
+        self.assertEqual(dict(snapshot["environmentVariables"]), dict(os.environ))
+        self.assertTrue(snapshot["runtimeVersion"].startswith("Python "))
+        self.assertIn("architecture", snapshot)
+        self.assertIn("oSVersion", snapshot)
+
+    def test_snapshot_is_read_only(self):
+        snapshot = environment.snapshot()
+
+        with self.assertRaises(TypeError):
+            snapshot["cpu"] = "changed"
+        with self.assertRaises(TypeError):
+            snapshot["environmentVariables"]["PATH"] = "changed"
+
+    def test_details_are_gathered_once(self):
+        with (
+            mock.patch(
+                "platform.architecture", return_value=("64bit", "")
+            ) as architecture,
+            mock.patch("socket.gethostname", return_value="web-1") as gethostname,
+        ):
+            for _ in range(3):
+                environment.snapshot()
+                self.assertEqual(environment.hostname(), "web-1")
+
+        architecture.assert_called_once_with()
+        gethostname.assert_called_once_with()
+
+    def test_invalidate(self):
+        environment.snapshot()
+
+        with mock.patch.dict(os.environ, {"RAYGUN_TEST_VARIABLE": "1"}):
+            self.assertNotIn(
+                "RAYGUN_TEST_VARIABLE", environment.snapshot()["environmentVariables"]
+            )
+            environment.invalidate()
+            self.assertIn(
+                "RAYGUN_TEST_VARIABLE", environment.snapshot()["environmentVariables"]
+            )
+
+    def test_details_are_gathered_again_in_a_forked_process(self):
+        snapshot = environment.snapshot()
+
+        with mock.patch("os.getpid", return_value=os.getpid() + 1):
+            self.assertIsNot(environment.snapshot(), snapshot)
+
+    def test_reports_get_their_own_copy(self):
+        builder = raygunmsgs.RaygunMessageBuilder({}).new()
+        builder.set_environment_details({"extra": 1})
+        details = builder.raygunMessage.details["environment"]
+
+        details["cpu"] = "changed"
+        details["environmentVariables"]["RAYGUN_TEST_VARIABLE"] = "1"
+
+        self.assertEqual(details["extra"], 1)
+        self.assertNotEqual(environment.snapshot().get("cpu"), "changed")
+        self.assertNotIn(
+            "RAYGUN_TEST_VARIABLE", environment.snapshot()["environmentVariables"]
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
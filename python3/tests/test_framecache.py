@@ -0,0 +1,144 @@
+import os
+import sys
+import tempfile
+import unittest
+from unittest import mock
+
+from raygun4py import framecache, raygunmsgs, sourcecache
+
+
+def fail(value):
+    if value:
+        raise ValueError(value)
+    raise KeyError(value)
+
+
+def walk(value):
+    try:
+        fail(value)
+    except Exception:
+        tb = sys.exc_info()[2]
+    frames = []
+    while tb is not None:
+        code = tb.tb_frame.f_code
+        frames.append((tb.tb_frame, code.co_filename, tb.tb_lineno, code.co_name))
+        tb = tb.tb_next
+    return frames
+
+
+class TestLRUCache(unittest.TestCase):
+    def test_least_recently_used_item_is_evicted(self):
+        cache = framecache.LRUCache(2)
+        cache.put("a", 1)
+        cache.put("b", 2)
+        cache.get("a")
+        cache.put("c", 3)
+
+        self.assertEqual(cache.get("a"), 1)
+        self.assertIsNone(cache.get("b"))
+        self.assertEqual(cache.get("c"), 3)
+        self.assertEqual(len(cache), 2)
+
+
+class TestStackEntries(unittest.TestCase):
+    def setUp(self):
+        framecache.clear_cache()
+        self.addCleanup(framecache.clear_cache)
+
+    def test_entries(self):
+        entries = framecache.stack_entries(walk(1))
+
+        self.assertEqual(
+            entries[-1],
+            {
+                "lineNumber": fail.__code__.co_firstlineno + 2,
+                "className": "fail",
+                "fileName": __file__,
+                "methodName": "        raise ValueError(value)\n",
+            },
+        )
+
+    def test_repeated_tracebacks_are_looked_up_once(self):
+        with mock.patch.object(
+            sourcecache, "getline", wraps=sourcecache.getline
+        ) as getline:
+            first = framecache.stack_entries(walk(1))
+            second = framecache.stack_entries(walk(2))
+
+        self.assertEqual(first, second)
+        self.assertEqual(getline.call_count, 2)
+
+    def test_frames_are_shared_between_tracebacks(self):
+        with mock.patch.object(
+            sourcecache, "getline", wraps=sourcecache.getline
+        ) as getline:
+            framecache.stack_entries(walk(1))
+            entries = framecache.stack_entries(walk(0))
+
+        # Only the line raising KeyError is new
+        self.assertEqual(getline.call_count, 3)
+        self.assertEqual(entries[-1]["methodName"], "    raise KeyError(value)\n")
+
+    def test_context_lines(self):
+        entry = framecache.stack_entries(walk(1), context_lines=1)[-1]
+
+        self.assertEqual(entry["preContext"], ["    if value:"])
+        self.assertEqual(entry["postContext"], ["    raise KeyError(value)"])
+        self.assertNotIn("preContext", framecache.stack_entries(walk(1))[-1])
+
+    def test_entries_are_rebuilt_when_the_source_changes(self):
+        handle, filename = tempfile.mkstemp(suffix=".py")
+        self.addCleanup(os.remove, filename)
+        with os.fdopen(handle, "w") as source:
+            source.write("def broken():\n    raise ValueError()\n")
+        namespace = {}
+        exec(compile(open(filename).read(), filename, "exec"), namespace)
+
+        def frames():
+            try:
+                namespace["broken"]()
+            except ValueError:
+                tb = sys.exc_info()[2].tb_next
+            code = tb.tb_frame.f_code
+            return [(tb.tb_frame, filename, tb.tb_lineno, code.co_name)]
+
+        self.assertEqual(
+            framecache.stack_entries(frames())[0]["methodName"],
+            "    raise ValueError()\n",
+        )
+
+        mtime = os.stat(filename).st_mtime
+        with open(filename, "w") as source:
+            source.write("def broken():\n    raise ValueError('edited')\n")
+        os.utime(filename, (mtime + 10, mtime + 10))
+
+        with mock.patch.object(sourcecache, "CHECK_INTERVAL", 0):
+            entries = framecache.stack_entries(frames())
+
+        self.assertEqual(entries[0]["methodName"], "    raise ValueError('edited')\n")
+
+    def test_entries_are_copies(self):
+        framecache.stack_entries(walk(1))[0]["localVariables"] = {"value": "1"}
+
+        self.assertNotIn("localVariables", framecache.stack_entries(walk(1))[0])
+
+    def test_error_messages_capture_variables_afresh(self):
+        messages = []
+        for value in (1, 2):
+            try:
+                fail(value)
+            except ValueError:
+                messages.append(
+                    raygunmsgs.RaygunErrorMessage(
+                        *sys.exc_info(), {"transmitLocalVariables": True}
+                    )
+                )
+
+        self.assertEqual(
+            [message.stackTrace[-1]["localVariables"] for message in messages],
+            [{"value": "1"}, {"value": "2"}],
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,77 @@
+import sys
+import types
+import unittest
+
+from raygun4py import globalvars
+
+
+def render(name, value):
+    return str(value)
+
+
+class TestGlobalsCapture(unittest.TestCase):
+    def setUp(self):
+        self.variables = {
+            "__name__": "myapp.views",
+            "sys": sys,
+            "render": render,
+            "TestGlobalsCapture": TestGlobalsCapture,
+            "DEBUG": True,
+            "API_URL": "https://api.example.com",
+            "counters": [1, 2],
+        }
+
+    def test_code_objects_and_dunder_names_are_excluded(self):
+        captured = globalvars.GlobalsCapture().capture(self.variables, render)
+
+        self.assertEqual(
+            captured,
+            {
+                "DEBUG": "True",
+                "API_URL": "https://api.example.com",
+                "counters": "[1, 2]",
+            },
+        )
+
+    def test_include_and_exclude(self):
+        capture = globalvars.GlobalsCapture(include=["API_*", "sys"], exclude=["sys"])
+
+        self.assertEqual(
+            capture.capture(self.variables, render),
+            {"API_URL": "https://api.example.com"},
+        )
+
+    def test_size_budget(self):
+        capture = globalvars.GlobalsCapture(max_size=len("DEBUG") + len("True"))
+
+        self.assertEqual(capture.capture(self.variables, render), {"DEBUG": "True"})
+
+    def test_changed_values_are_rendered_again(self):
+        capture = globalvars.GlobalsCapture()
+        capture.capture(self.variables, render)
+        self.variables["counters"].append(3)
+
+        captured = capture.capture(self.variables, render)
+
+        self.assertEqual(captured["counters"], "[1, 2, 3]")
+
+    def test_rebound_names_are_rendered_again(self):
+        capture = globalvars.GlobalsCapture()
+        capture.capture(self.variables, render)
+        self.variables["API_URL"] = "https://staging.example.com"
+
+        captured = capture.capture(self.variables, render)
+
+        self.assertEqual(captured["API_URL"], "https://staging.example.com")
+
+    def test_module_globals(self):
+        module = types.ModuleType("example")
+        exec("import os\nLIMIT = 10\ndef handler(): pass", module.__dict__)
+
+        captured = globalvars.default_capture.capture(module.__dict__, render)
+
+        self.assertEqual(captured, {"LIMIT": "10"})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,58 @@
+import json
+import os
+import sys
+import unittest
+from unittest import mock
+
+from raygun4py import inapp
+
+
+class TestFrameClassifier(unittest.TestCase):
+    def setUp(self):
+        self.classifier = inapp.FrameClassifier()
+
+    def test_application_code_is_in_app(self):
+        self.assertTrue(self.classifier.classify(__file__, __name__))
+        self.assertTrue(self.classifier.classify("<string>", ""))
+
+    def test_stdlib_is_not_in_app(self):
+        self.assertFalse(self.classifier.classify(json.__file__, "json"))
+        self.assertFalse(
+            self.classifier.classify("<frozen importlib._bootstrap>", "importlib")
+        )
+
+    def test_installed_packages_are_not_in_app(self):
+        path = os.path.join(os.sep, "srv", "venv", "site-packages", "django", "db.py")
+
+        self.assertFalse(self.classifier.classify(path, "django.db"))
+
+    def test_include_and_exclude(self):
+        library = os.path.join(os.sep, "srv", "venv", "site-packages", "ours", "a.py")
+        classifier = inapp.FrameClassifier(
+            include=["ours"], exclude=["tests.*", os.path.dirname(json.__file__)]
+        )
+
+        self.assertTrue(classifier.classify(library, "ours.a"))
+        self.assertFalse(classifier.classify(__file__, "tests.test_inapp"))
+        self.assertFalse(classifier.classify(json.__file__, "json"))
+
+    def test_include_wins_over_exclude(self):
+        classifier = inapp.FrameClassifier(
+            include=["tests.test_inapp"], exclude=["tests"]
+        )
+
+        self.assertTrue(classifier.classify(__file__, "tests.test_inapp"))
+
+    def test_results_are_cached_per_code_object(self):
+        frame = sys._getframe()
+        with mock.patch.object(
+            self.classifier, "classify", wraps=self.classifier.classify
+        ) as classify:
+            self.assertTrue(self.classifier.is_in_app(frame))
+            self.assertTrue(self.classifier.is_in_app(frame))
+
+        classify.assert_called_once_with(__file__, __name__)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,63 @@
+import unittest
+from unittest import mock
+
+from raygun4py import ratelimit
+
+
+class TestRateLimiter(unittest.TestCase):
+    def setUp(self):
+        self.now = 1000.0
+        patcher = mock.patch(
+            "raygun4py.ratelimit.time.monotonic", side_effect=lambda: self.now
+        )
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_global_burst_then_suppress(self):
+        limiter = ratelimit.RateLimiter(rate=1, burst=3)
+
+        results = [limiter.allow("ValueError") for _ in range(5)]
+
+        self.assertEqual(results, [True, True, True, False, False])
+        self.assertEqual(limiter.suppressed, 2)
+        self.assertEqual(limiter.suppressed_by_key["ValueError"], 2)
+
+    def test_tokens_refill_over_time(self):
+        limiter = ratelimit.RateLimiter(rate=2, burst=1)
+        self.assertTrue(limiter.allow("key"))
+        self.assertFalse(limiter.allow("key"))
+
+        self.now += 0.5
+
+        self.assertTrue(limiter.allow("key"))
+
+    def test_per_key_limits_are_independent(self):
+        limiter = ratelimit.RateLimiter(per_key_rate=1, per_key_burst=1)
+
+        self.assertTrue(limiter.allow("ValueError"))
+        self.assertFalse(limiter.allow("ValueError"))
+        self.assertTrue(limiter.allow("KeyError"))
+        self.assertEqual(dict(limiter.suppressed_by_key), {"ValueError": 1})
+
+    def test_key_buckets_are_bounded(self):
+        limiter = ratelimit.RateLimiter(per_key_rate=1, max_keys=2)
+
+        for key in ["a", "b", "c"]:
+            limiter.allow(key)
+
+        self.assertEqual(list(limiter._key_buckets), ["b", "c"])
+        # "a" was evicted, so it starts again with a full bucket
+        self.assertTrue(limiter.allow("a"))
+
+    def test_unlimited(self):
+        limiter = ratelimit.RateLimiter()
+
+        self.assertTrue(all(limiter.allow("key") for _ in range(100)))
+
+
+def main():
+    unittest.main()
+
+
+if __name__ == "__main__":
+    main()
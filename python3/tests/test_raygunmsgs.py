@@ -1,10 +1,11 @@
-import inspect
+import json
 import socket
 import sys
 import unittest
+from unittest import mock
 
 import jsonpickle
-from raygun4py import raygunmsgs, raygunprovider
+from raygun4py import encoding, framecache, raygunmsgs, raygunprovider, sourcecache
 
 
 class TestRaygunMessageBuilder(unittest.TestCase):
@@ -55,6 +56,26 @@ class TestRaygunMessageBuilder(unittest.TestCase):
             self.builder.raygunMessage.details["userCustomData"], dict
         )
 
+    def test_customdata_objects_are_rendered(self):
+        custom_object = object()
+        self.builder.set_customdata({"object": custom_object, "items": [1, {2}]})
+
+        self.assertEqual(
+            self.builder.raygunMessage.details["userCustomData"],
+            {"object": str(custom_object), "items": [1, [2]]},
+        )
+
+    def test_customdata_is_bounded(self):
+        nested = []
+        for _ in range(5000):
+            nested = [nested]
+        self.builder.set_customdata({"items": list(range(200000)), "nested": nested})
+
+        custom_data = self.builder.raygunMessage.details["userCustomData"]
+        self.assertEqual(len(custom_data["items"]), 101)
+        self.assertEqual(custom_data["items"][-1], "...")
+        self.assertEqual(custom_data["nested"], [[[["..."]]]])
+
     def test_tags(self):
         self.builder.set_tags([1, 2, 3])
         self.assertIsInstance(self.builder.raygunMessage.details["tags"], list)
@@ -309,6 +330,242 @@ class TestRaygunErrorMessage(unittest.TestCase):
                 localReference,
             )
 
+    def test_innermost_frame_variables_kept(self):
+        def inner():
+            innerReference = self.create_string_of_size(70 * 1024)  # noqa: F841
+            raise Exception()
+
+        def outer():
+            outerReference = self.create_string_of_size(70 * 1024)  # noqa: F841
+            inner()
+
+        try:
+            outer()
+        except Exception:
+            msg = raygunmsgs.RaygunErrorMessage(
+                *sys.exc_info(), {"transmitLocalVariables": True}
+            )
+
+        msg.check_and_modify_payload_size({"enforce_payload_size_limit": True})
+
+        self.assertEqual(
+            self.find_local_variable(msg.stackTrace, "outerReference"), "Removed"
+        )
+        self.assertEqual(
+            len(self.find_local_variable(msg.stackTrace, "innerReference")), 70 * 1024
+        )
+
+    def test_only_removes_what_is_needed(self):
+        try:
+            raise Exception()
+        except Exception:
+            msg = raygunmsgs.RaygunErrorMessage(*sys.exc_info(), {})
+
+        msg.globalVariables = {
+            "var%d" % i: self.create_string_of_size(10 * 1024) for i in range(20)
+        }
+
+        with mock.patch(
+            "raygun4py.encoding.encoded_size", wraps=encoding.encoded_size
+        ) as encoded_size:
+            msg.check_and_modify_payload_size(
+                {"enforce_payload_size_limit": True}, max_size_kb=128
+            )
+
+        removed = [k for k, v in msg.globalVariables.items() if v == "Removed"]
+        self.assertEqual(len(removed), 8)
+        # The whole error is measured once, then each variable once
+        self.assertEqual(encoded_size.call_count, 21)
+
+    def test_global_variables_are_captured_as_strings(self):
+        global globalObject
+        globalObject = object()
+
+        try:
+            raise Exception()
+        except Exception:
+            msg = raygunmsgs.RaygunErrorMessage(
+                *sys.exc_info(), {"transmitGlobalVariables": True}
+            )
+
+        self.assertEqual(msg.globalVariables["globalObject"], str(globalObject))
+        # Modules, classes and dunder names are not state worth reporting
+        self.assertNotIn("sys", msg.globalVariables)
+        self.assertNotIn("TestRaygunErrorMessage", msg.globalVariables)
+        self.assertNotIn("__name__", msg.globalVariables)
+
+        del globalObject
+
+
+class TestRecursionCollapsing(unittest.TestCase):
+    def capture(self, function, *args, **options):
+        try:
+            function(*args)
+        except Exception:
+            return raygunmsgs.RaygunErrorMessage(
+                *sys.exc_info(), dict(options, transmitLocalVariables=True)
+            )
+
+    def test_recursion_error(self):
+        def recurse(depth):
+            return recurse(depth + 1)
+
+        msg = self.capture(recurse, 0)
+
+        # The capturing frame, the first and last calls, and one entry for the rest
+        self.assertEqual(len(msg.stackTrace), 4)
+        head, first, repeated, last = msg.stackTrace
+        self.assertEqual(head["className"], "capture")
+        self.assertEqual(first["localVariables"], {"depth": "0", "recurse": mock.ANY})
+        self.assertEqual(repeated["className"], "recurse")
+        self.assertIsNone(repeated["localVariables"])
+        self.assertGreater(repeated["repeatCount"], 100)
+        self.assertEqual(
+            repeated["methodName"],
+            "[Previous frame repeated %d more times]" % repeated["repeatCount"],
+        )
+        self.assertEqual(
+            last["localVariables"]["depth"], str(repeated["repeatCount"] + 1)
+        )
+
+    def test_mutual_recursion_keeps_the_innermost_frames(self):
+        def even(n):
+            return odd(n - 1)
+
+        def odd(n):
+            if n == 0:
+                raise ValueError()
+            return even(n - 1)
+
+        msg = self.capture(even, 41)
+
+        self.assertEqual(
+            [frame["className"] for frame in msg.stackTrace],
+            ["capture", "even", "odd", "even", "even", "odd", "even", "odd"],
+        )
+        self.assertEqual(msg.stackTrace[3]["repeatCount"], 18)
+        self.assertEqual(
+            msg.stackTrace[3]["methodName"],
+            "[Previous 2 frames repeated 18 more times]",
+        )
+        self.assertEqual(msg.stackTrace[-1]["localVariables"]["n"], "0")
+
+    def test_short_recursion_is_kept(self):
+        def recurse(depth):
+            if depth:
+                recurse(depth - 1)
+            raise ValueError()
+
+        msg = self.capture(recurse, 2)
+
+        self.assertEqual(len(msg.stackTrace), 4)
+        self.assertNotIn("repeatCount", json.dumps(msg.stackTrace))
+
+    def test_can_be_disabled(self):
+        def recurse(depth):
+            if depth:
+                recurse(depth - 1)
+            raise ValueError()
+
+        msg = self.capture(recurse, 9, collapse_recursion=False)
+
+        self.assertEqual(len(msg.stackTrace), 11)
+
+
+class TestRaygunErrorMessageLimits(unittest.TestCase):
+    def capture(self, **options):
+        # Recursion is collapsed separately, see TestRecursionCollapsing
+        options.setdefault("collapse_recursion", False)
+
+        def recurse(depth):
+            first, second, third = "a" * 50, "b", "c"  # noqa: F841
+            if depth:
+                recurse(depth - 1)
+            raise ValueError()
+
+        try:
+            recurse(9)
+        except ValueError:
+            return raygunmsgs.RaygunErrorMessage(
+                *sys.exc_info(), dict(options, transmitLocalVariables=True)
+            )
+
+    def test_unlimited_by_default(self):
+        msg = self.capture()
+
+        self.assertEqual(len(msg.stackTrace), 11)
+        self.assertEqual(msg.stackTrace[-1]["localVariables"]["first"], "a" * 50)
+
+    def test_library_frames_are_flagged_and_skip_locals(self):
+        def callback(item):
+            library_local = item  # noqa: F841
+            raise ValueError()
+
+        try:
+            # The outer frame is json's, calling back into this module
+            json.dumps(object(), default=callback)
+        except ValueError:
+            msg = raygunmsgs.RaygunErrorMessage(
+                *sys.exc_info(),
+                {"transmitLocalVariables": True, "in_app_locals_only": True},
+            )
+
+        test_frame, *library_frames, callback_frame = msg.stackTrace
+        self.assertTrue(test_frame["inApp"])
+        self.assertTrue(callback_frame["inApp"])
+        self.assertTrue(library_frames)
+        for frame in library_frames:
+            self.assertFalse(frame["inApp"])
+            self.assertIsNone(frame["localVariables"])
+        self.assertIn("library_local", callback_frame["localVariables"])
+
+    def test_max_frames_keeps_innermost(self):
+        msg = self.capture(max_frames=3)
+
+        self.assertEqual(len(msg.stackTrace), 3)
+        self.assertEqual(
+            [frame["methodName"].strip() for frame in msg.stackTrace[-2:]],
+            ["recurse(depth - 1)", "raise ValueError()"],
+        )
+
+    def test_max_frames_with_locals(self):
+        msg = self.capture(max_frames_with_locals=2)
+
+        with_locals = [f for f in msg.stackTrace if f["localVariables"] is not None]
+        self.assertEqual(with_locals, msg.stackTrace[-2:])
+
+    def test_max_locals_per_frame(self):
+        msg = self.capture(max_locals_per_frame=2)
+
+        self.assertEqual(list(msg.stackTrace[-1]["localVariables"]), ["depth", "first"])
+
+    def test_max_value_length(self):
+        msg = self.capture(max_value_length=10)
+
+        self.assertEqual(
+            msg.stackTrace[-1]["localVariables"]["first"], "a" * 10 + "..."
+        )
+        self.assertEqual(msg.stackTrace[-1]["localVariables"]["second"], "b")
+
+    def test_containers_are_bounded(self):
+        def fail():
+            items = [list(range(1000))]  # noqa: F841
+            raise ValueError()
+
+        try:
+            fail()
+        except ValueError:
+            msg = raygunmsgs.RaygunErrorMessage(
+                *sys.exc_info(),
+                {
+                    "transmitLocalVariables": True,
+                    "max_value_width": 3,
+                    "max_value_depth": 1,
+                },
+            )
+
+        self.assertEqual(msg.stackTrace[-1]["localVariables"]["items"], "[[...]]")
+
 
 class TestRaygunErrorMessageChained(unittest.TestCase):
     class GrandchildError(Exception):
@@ -385,21 +642,168 @@ class TestRaygunErrorMessageChained(unittest.TestCase):
             TestRaygunErrorMessageChained.GrandchildError,
         )
 
+    def test_capture_does_not_encode(self):
+        with mock.patch("raygun4py.encoding.encode") as encode:
+            try:
+                self.parent()
+            except Exception:
+                raygunmsgs.RaygunErrorMessage(
+                    *sys.exc_info(), {"transmitLocalVariables": True}
+                )
+
+        encode.assert_not_called()
+
     def test_methodname_none(self):
-        original_getinnerframes = inspect.getinnerframes
-        inspect.getinnerframes = getinnerframes_mock_methodname_none
+        try:
+            raise ValueError()
+        except ValueError:
+            exc_info = sys.exc_info()
 
-        error_message = raygunmsgs.RaygunErrorMessage(
-            int, 1, None, {"transmitLocalVariables": False}
-        )
+        framecache.clear_cache()
+        self.addCleanup(framecache.clear_cache)
+        with mock.patch.object(sourcecache, "getline", return_value=None):
+            error_message = raygunmsgs.RaygunErrorMessage(
+                *exc_info, {"transmitLocalVariables": False}
+            )
 
         self.assertEqual(error_message.__dict__["stackTrace"][0]["methodName"], None)
 
-        inspect.getinnerframes = original_getinnerframes
+    def test_stack_trace_entries(self):
+        try:
+            raise ValueError()
+        except ValueError:
+            error_message = raygunmsgs.RaygunErrorMessage(*sys.exc_info(), {})
+
+        (entry,) = error_message.stackTrace
+        self.assertEqual(entry["fileName"], __file__)
+        self.assertEqual(entry["className"], "test_stack_trace_entries")
+        self.assertEqual(entry["methodName"], "            raise ValueError()\n")
+        self.assertEqual(
+            entry["lineNumber"],
+            self.test_stack_trace_entries.__code__.co_firstlineno + 2,
+        )
+
+
+class TestErrorChainCapture(unittest.TestCase):
+    def capture(self, exception, **options):
+        return raygunmsgs.RaygunErrorMessage(
+            type(exception),
+            exception,
+            exception.__traceback__,
+            dict(options, transmitLocalVariables=True, transmitGlobalVariables=True),
+        )
+
+    def raise_chain(self, length):
+        def wrap(depth):
+            try:
+                if depth:
+                    wrap(depth - 1)
+                else:
+                    raise KeyError(depth)
+            except Exception as e:
+                raise ValueError(depth) from e
+
+        try:
+            wrap(length - 2)
+        except ValueError as e:
+            return e
+
+    def chain_length(self, msg):
+        length = 0
+        while msg is not None:
+            length += 1
+            msg = msg.innerError
+        return length
+
+    def test_globals_are_captured_for_the_outermost_error_only(self):
+        msg = self.capture(self.raise_chain(3))
+
+        self.assertIsNotNone(msg.globalVariables)
+        self.assertIsNone(msg.innerError.globalVariables)
+        self.assertIsNone(msg.innerError.innerError.globalVariables)
+
+    def test_locals_are_rendered_once_per_frame(self):
+        exception = self.raise_chain(4)
+
+        with mock.patch.object(
+            raygunmsgs.RaygunErrorMessage,
+            "_get_locals",
+            autospec=True,
+            side_effect=raygunmsgs.RaygunErrorMessage._get_locals,
+        ) as get_locals:
+            msg = self.capture(exception)
+
+        frames = {id(call.args[1]) for call in get_locals.call_args_list}
+        self.assertEqual(len(frames), get_locals.call_count)
+        self.assertEqual(self.chain_length(msg), 4)
+        self.assertEqual(
+            msg.innerError.stackTrace[0]["localVariables"],
+            msg.stackTrace[1]["localVariables"],
+        )
+        self.assertIsNot(
+            msg.innerError.stackTrace[0]["localVariables"],
+            msg.stackTrace[1]["localVariables"],
+        )
+
+    def test_chain_depth_is_bounded(self):
+        exception = self.raise_chain(8)
+
+        self.assertEqual(self.chain_length(self.capture(exception)), 8)
+        self.assertEqual(
+            self.chain_length(self.capture(exception, max_error_chain_depth=2)), 3
+        )
+
+    def test_cycles_are_captured_once(self):
+        first, second = ValueError("first"), KeyError("second")
+        first.__cause__ = second
+        second.__cause__ = first
+
+        msg = self.capture(first)
+
+        self.assertEqual(msg.innerError.className, "KeyError")
+        self.assertIsNone(msg.innerError.innerError)
+
+    @unittest.skipIf(sys.version_info < (3, 11), "ExceptionGroup requires Python 3.11")
+    def test_exception_groups(self):
+        def fail(index):
+            try:
+                raise OSError(index)
+            except OSError as e:
+                raise ValueError(index) from e
+
+        errors = []
+        for index in range(5):
+            try:
+                fail(index)
+            except ValueError as e:
+                errors.append(e)
+        try:
+            raise ExceptionGroup("several", errors)  # noqa: F821
+        except Exception as e:
+            group = e
+
+        msg = self.capture(group, max_exception_group_errors=3)
 
+        self.assertEqual(msg.className, "ExceptionGroup")
+        self.assertEqual(
+            [error.message for error in msg.innerErrors],
+            ["ValueError: 0", "ValueError: 1", "ValueError: 2"],
+        )
+        self.assertEqual(msg.innerErrors[0].innerError.className, "OSError")
+        self.assertEqual(
+            msg.to_dict()["innerErrors"][1]["stackTrace"][-1]["className"], "fail"
+        )
 
-def getinnerframes_mock_methodname_none(exception):
-    return [("localVar", "fileName", "lineNumber", "className", None)]
+    def test_chained_variables_are_trimmed(self):
+        exception = self.raise_chain(2)
+        msg = self.capture(exception)
+        msg.innerError.stackTrace[0]["localVariables"]["large"] = "x" * 4096
+
+        msg.check_and_modify_payload_size({}, max_size_kb=2)
+
+        self.assertEqual(
+            msg.innerError.stackTrace[0]["localVariables"]["large"], "Removed"
+        )
 
 
 def main():
@@ -1,11 +1,30 @@
+import gzip
+import json
 import logging
+import os
+import shutil
+import socket
 import sys
+import tempfile
+import threading
 import unittest
+from concurrent.futures import Future
 from unittest import mock
 
-from raygun4py import __version__, raygunmsgs, raygunprovider, utilities
+from raygun4py import (
+    __version__,
+    dispatch,
+    environment,
+    framecache,
+    raygunmsgs,
+    raygunprovider,
+    sourcecache,
+    utilities,
+)
 from raygun4py import version as version_file
 
+from tests.stub_server import StubRaygunServer
+
 
 class TestRaygunSender(unittest.TestCase):
     def setUp(self):
@@ -85,6 +104,22 @@ class TestRaygunSender(unittest.TestCase):
         self.sender = raygunprovider.RaygunSender("foo")
         self.assertTrue(self.sender.transmit_global_variables)
 
+    def test_set_proxy_is_used_for_transport(self):
+        self.sender.set_proxy("proxy.local", 3128)
+        self.sender.transport.post = mock.MagicMock(
+            return_value=mock.Mock(status_code=202, text="")
+        )
+
+        try:
+            raise Exception("proxied")
+        except Exception:
+            self.sender.send_exception()
+
+        self.assertEqual(
+            self.sender.transport.post.call_args[1]["proxies"],
+            {"http": "http://proxy.local:3128", "https": "http://proxy.local:3128"},
+        )
+
     def test_module_version_matches(self):
         self.assertEqual(__version__, version_file.__version__)
 
@@ -120,6 +155,183 @@ class TestCreateMessage(unittest.TestCase):
         )
 
 
+class TestEncode(unittest.TestCase):
+    def test_report_is_encoded_once(self):
+        sender = raygunprovider.RaygunSender(
+            "apikey", config={"transmit_global_variables": True}
+        )
+        sender._send_payload = mock.MagicMock(return_value=(202, ""))
+
+        with mock.patch(
+            "raygun4py.encoding.encode_bytes",
+            wraps=raygunprovider.encoding.encode_bytes,
+        ) as encode:
+            try:
+                try:
+                    raise KeyError("inner")
+                except KeyError as e:
+                    raise ValueError("outer") from e
+            except ValueError:
+                sender.send_exception()
+
+        self.assertEqual(encode.call_count, 1)
+
+    def test_oversized_report_is_trimmed(self):
+        sender = raygunprovider.RaygunSender("apikey")
+        sender._send_payload = mock.MagicMock(return_value=(202, ""))
+        large = "a" * 150 * 1024  # noqa: F841
+
+        try:
+            raise ValueError()
+        except ValueError:
+            sender.send_exception()
+
+        payload = sender._send_payload.call_args[0][0]
+        self.assertLess(len(payload), 128 * 1024)
+        self.assertIn(b'"large":"Removed"', payload)
+
+    def test_payload_size_limit_is_configurable(self):
+        sender = raygunprovider.RaygunSender(
+            "apikey",
+            config={
+                "payload_size_limit_kb": 16,
+                "transmit_environment_variables": False,
+            },
+        )
+        sender._send_payload = mock.MagicMock(return_value=(202, ""))
+        large = "a" * 20 * 1024  # noqa: F841
+
+        try:
+            raise ValueError()
+        except ValueError:
+            sender.send_exception()
+
+        payload = sender._send_payload.call_args[0][0]
+        self.assertLess(len(payload), 16 * 1024)
+        self.assertIn(b'"large":"Removed"', payload)
+
+    def test_lone_surrogates_are_sent(self):
+        with StubRaygunServer() as server:
+            sender = server.point(
+                raygunprovider.RaygunSender(
+                    "apikey", config={"transmit_local_variables": True}
+                )
+            )
+            name = "caf\udce9"  # noqa: F841
+
+            with mock.patch.dict(os.environ, {"RAYGUN_TEST_VAR": "caf\udce9"}):
+                environment.invalidate()
+                self.addCleanup(environment.invalidate)
+                try:
+                    raise ValueError()
+                except ValueError:
+                    result = sender.send_exception(userCustomData={"name": "caf\udce9"})
+
+            self.assertEqual(result, (202, ""))
+            details = json.loads(server.requests[0]["body"])["details"]
+            self.assertEqual(details["userCustomData"]["name"], "caf\udce9")
+            self.assertEqual(
+                details["environment"]["environmentVariables"]["RAYGUN_TEST_VAR"],
+                "caf\udce9",
+            )
+            self.assertEqual(
+                details["error"]["stackTrace"][0]["localVariables"]["name"],
+                "caf\udce9",
+            )
+
+    def test_capture_limits_are_applied(self):
+        sender = raygunprovider.RaygunSender(
+            "apikey", config={"max_frames": 1, "max_value_length": 4}
+        )
+        message = "x" * 100  # noqa: F841
+
+        try:
+            raise ValueError()
+        except ValueError:
+            captured = sender._capture(None, None, None, {})
+
+        stack_trace = captured.get_error().stackTrace
+        self.assertEqual(len(stack_trace), 1)
+        self.assertEqual(stack_trace[0]["localVariables"]["message"], "xxxx...")
+
+    def test_global_variables_are_filtered(self):
+        sender = raygunprovider.RaygunSender(
+            "apikey", config={"global_variables_include": ["raygun*"]}
+        )
+
+        try:
+            raise ValueError()
+        except ValueError:
+            captured = sender._capture(None, None, None, {})
+
+        self.assertEqual(
+            sorted(captured.get_error().globalVariables),
+            ["raygunmsgs", "raygunprovider"],
+        )
+
+
+class TestSourceContext(unittest.TestCase):
+    def setUp(self):
+        framecache.clear_cache()
+        self.addCleanup(framecache.clear_cache)
+
+    def test_source_context_lines(self):
+        sender = raygunprovider.RaygunSender(
+            "apikey", config={"source_context_lines": 2, "source_cache_prewarm": False}
+        )
+
+        try:
+            raise ValueError()
+        except ValueError:
+            captured = sender._capture(None, None, None, {})
+
+        entry = captured.get_error().stackTrace[0]
+        self.assertEqual(entry["preContext"], ["", "        try:"])
+        self.assertEqual(
+            entry["postContext"],
+            [
+                "        except ValueError:",
+                "            captured = sender._capture(None, None, None, {})",
+            ],
+        )
+
+    def test_no_source_context_by_default(self):
+        try:
+            raise ValueError()
+        except ValueError:
+            captured = raygunprovider.RaygunSender("apikey")._capture(
+                None, None, None, {}
+            )
+
+        self.assertNotIn("preContext", captured.get_error().stackTrace[0])
+
+    def test_prewarm_reads_in_app_modules(self):
+        sender = raygunprovider.RaygunSender(
+            "apikey", config={"source_context_lines": 2, "source_cache_prewarm": False}
+        )
+
+        with mock.patch.object(sourcecache, "prewarm") as prewarm:
+            sender._prewarm_source_cache()
+
+        (filenames,), _ = prewarm.call_args
+        self.assertIn(__file__, filenames)
+        self.assertNotIn(json.__file__, filenames)
+
+    def test_prewarm_runs_in_the_background(self):
+        with (
+            mock.patch.object(
+                raygunprovider.RaygunSender, "_prewarm_source_cache"
+            ) as prewarm,
+            mock.patch("threading.Thread") as thread,
+        ):
+            raygunprovider.RaygunSender("apikey", config={"source_context_lines": 2})
+
+        thread.assert_called_once_with(
+            target=prewarm, name="raygun4py-prewarm", daemon=True
+        )
+        thread.return_value.start.assert_called_once_with()
+
+
 class TestGroupingKey(unittest.TestCase):
     def the_callback(self, raygun_message):
         return self.key
@@ -204,6 +416,484 @@ class TestGroupingKey(unittest.TestCase):
         self.assertIsNone(msg.get_details()["groupingKey"])
 
 
+class TestAsyncSend(unittest.TestCase):
+    def create_sender(self, server, **config):
+        config.setdefault("async_send", True)
+        sender = server.point(raygunprovider.RaygunSender("apikey", config=config))
+        self.addCleanup(sender.close, 5)
+        return sender
+
+    def test_sync_send_by_default(self):
+        with StubRaygunServer() as server:
+            sender = server.point(raygunprovider.RaygunSender("apikey"))
+
+            try:
+                raise Exception("sync")
+            except Exception:
+                result = sender.send_exception()
+
+            self.assertEqual(result, (202, ""))
+
+    def test_async_send_returns_future(self):
+        with StubRaygunServer() as server:
+            sender = self.create_sender(server)
+
+            try:
+                raise Exception("async")
+            except Exception:
+                result = sender.send_exception()
+
+            self.assertIsInstance(result, Future)
+            self.assertEqual(result.result(5), (202, ""))
+            payload = json.loads(server.requests[0]["body"])
+            self.assertEqual(payload["details"]["error"]["message"], "Exception: async")
+
+    def test_async_send_does_not_wait_for_transmission(self):
+        with StubRaygunServer() as server:
+            server.release.clear()
+            sender = self.create_sender(server)
+
+            try:
+                raise Exception("slow endpoint")
+            except Exception:
+                result = sender.send_exception()
+
+            self.assertFalse(result.done())
+            server.release.set()
+            self.assertEqual(result.result(5), (202, ""))
+
+    def test_async_send_overflow_drops_newest(self):
+        with StubRaygunServer() as server:
+            server.release.clear()
+            sender = self.create_sender(server, async_queue_size=1)
+
+            futures = []
+            for i in range(3):
+                try:
+                    raise Exception("overflow %d" % i)
+                except Exception:
+                    futures.append(sender.send_exception())
+                    if i == 0:
+                        server.received.wait(5)
+
+            self.assertEqual(futures[2].result(0), dispatch.DROPPED_RESULT)
+            server.release.set()
+            self.assertTrue(sender.flush(5))
+            self.assertEqual(len(server.requests), 2)
+
+    def test_batch_send_posts_bulk_request(self):
+        with StubRaygunServer() as server:
+            sender = self.create_sender(
+                server, batch_send=True, batch_max_entries=3, batch_max_latency=5
+            )
+
+            futures = []
+            for i in range(3):
+                try:
+                    raise Exception("batched %d" % i)
+                except Exception:
+                    futures.append(sender.send_exception())
+
+            for future in futures:
+                self.assertEqual(future.result(5), (202, ""))
+            self.assertEqual(len(server.requests), 1)
+            self.assertEqual(server.requests[0]["path"], "/entries/bulk")
+            entries = json.loads(server.requests[0]["body"])
+            self.assertEqual(
+                [entry["details"]["error"]["message"] for entry in entries],
+                [
+                    "Exception: batched 0",
+                    "Exception: batched 1",
+                    "Exception: batched 2",
+                ],
+            )
+
+    def test_batch_send_failure_is_reported_per_entry(self):
+        with StubRaygunServer(status=500) as server:
+            sender = self.create_sender(server, batch_send=True, batch_max_latency=5)
+
+            try:
+                raise Exception("first")
+            except Exception:
+                first = sender.send_exception()
+            try:
+                raise Exception("second")
+            except Exception:
+                second = sender.send_exception()
+
+            self.assertTrue(sender.flush(5))
+            self.assertEqual(first.result(0)[0], 500)
+            self.assertEqual(second.result(0)[0], 500)
+            self.assertEqual(sender._dispatcher.failed, 2)
+
+    def test_rejected_batch_is_sent_entry_by_entry(self):
+        def status():
+            request = server.requests[-1]
+            if request["path"] == "/entries/bulk" or b"bad entry" in request["body"]:
+                return 400
+            return 202
+
+        with StubRaygunServer(status=status) as server:
+            sender = self.create_sender(
+                server, batch_send=True, batch_max_entries=3, batch_max_latency=5
+            )
+
+            futures = []
+            for message in ["good entry", "bad entry", "other entry"]:
+                try:
+                    raise Exception(message)
+                except Exception:
+                    futures.append(sender.send_exception())
+
+            self.assertEqual(
+                [future.result(5)[0] for future in futures], [202, 400, 202]
+            )
+            self.assertEqual(
+                [request["path"] for request in server.requests],
+                ["/entries/bulk", "/entries", "/entries", "/entries"],
+            )
+
+    def test_single_entry_batch_is_sent_on_its_own(self):
+        with StubRaygunServer() as server:
+            sender = self.create_sender(server, batch_send=True, batch_max_latency=5)
+
+            try:
+                raise Exception("alone")
+            except Exception:
+                future = sender.send_exception()
+
+            self.assertTrue(sender.flush(5))
+            self.assertEqual(future.result(0), (202, ""))
+            self.assertEqual(server.requests[0]["path"], "/entries")
+
+    def test_flush_without_async_send(self):
+        sender = raygunprovider.RaygunSender("apikey")
+        self.assertTrue(sender.flush(0))
+        self.assertTrue(sender.close(0))
+
+    def test_handler_passes_config_to_sender(self):
+        handler = raygunprovider.RaygunHandler(
+            "apikey", config={"async_send": True, "async_queue_size": 5}
+        )
+        self.addCleanup(handler.sender.close, 5)
+
+        self.assertTrue(handler.sender.async_send)
+        self.assertEqual(handler.sender._dispatcher.queue_size, 5)
+
+
+class TestCompression(unittest.TestCase):
+    def send(self, server, **config):
+        sender = server.point(raygunprovider.RaygunSender("apikey", config=config))
+        try:
+            raise Exception("compressed")
+        except Exception:
+            self.assertEqual(sender.send_exception(), (202, ""))
+        return server.requests[-1]
+
+    def test_uncompressed_by_default(self):
+        with StubRaygunServer() as server:
+            request = self.send(server)
+
+            self.assertNotIn("Content-Encoding", request["headers"])
+            json.loads(request["body"])
+
+    def test_gzip_compressed_payload(self):
+        with StubRaygunServer() as server:
+            request = self.send(server, compress_payloads=True, compression_level=9)
+
+            self.assertEqual(request["headers"]["Content-Encoding"], "gzip")
+            payload = json.loads(gzip.decompress(request["body"]))
+            self.assertEqual(
+                payload["details"]["error"]["message"], "Exception: compressed"
+            )
+
+    def test_small_payload_is_not_compressed(self):
+        with StubRaygunServer() as server:
+            request = self.send(
+                server, compress_payloads=True, compression_threshold=10 * 1024 * 1024
+            )
+
+            self.assertNotIn("Content-Encoding", request["headers"])
+
+    def test_payload_is_compressed_once_across_retries(self):
+        responses = iter([503, 202])
+        with StubRaygunServer(status=lambda: next(responses)) as server:
+            with (
+                mock.patch("raygun4py.raygunprovider.retry.RetryPolicy.sleep"),
+                mock.patch(
+                    "raygun4py.raygunprovider.gzip.compress", wraps=gzip.compress
+                ) as compress,
+            ):
+                self.send(server, compress_payloads=True, max_retries=1)
+
+            self.assertEqual(compress.call_count, 1)
+            self.assertEqual(server.requests[0]["body"], server.requests[1]["body"])
+
+
+class TestSpool(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory, True)
+
+    def unreachable_host(self):
+        sock = socket.socket()
+        sock.bind(("127.0.0.1", 0))
+        port = sock.getsockname()[1]
+        sock.close()
+        return "127.0.0.1:%d" % port
+
+    def test_unsent_report_is_spooled_and_replayed(self):
+        sender = raygunprovider.RaygunSender(
+            "apikey",
+            config={"spool_directory": self.directory, "spool_replay_interval": 60},
+        )
+        self.addCleanup(sender.close)
+        sender.endpointprotocol = "http://"
+        sender.endpointhost = self.unreachable_host()
+
+        try:
+            raise Exception("spooled")
+        except Exception:
+            result = sender.send_exception()
+
+        self.assertEqual(result[0], 400)
+        self.assertIn("spooled", result[1])
+        self.assertGreater(sender.spool.pending(), 0)
+
+        with StubRaygunServer() as server:
+            server.point(sender)
+
+            self.assertEqual(sender.spool.replay(), 1)
+
+            payload = json.loads(server.requests[0]["body"])
+            self.assertEqual(
+                payload["details"]["error"]["message"], "Exception: spooled"
+            )
+        self.assertEqual(sender.spool.pending(), 0)
+
+    def test_server_error_is_spooled(self):
+        with StubRaygunServer(status=503) as server:
+            sender = server.point(
+                raygunprovider.RaygunSender(
+                    "apikey",
+                    config={
+                        "spool_directory": self.directory,
+                        "spool_replay_interval": 60,
+                    },
+                )
+            )
+            self.addCleanup(sender.close)
+
+            try:
+                raise Exception("unavailable")
+            except Exception:
+                self.assertEqual(sender.send_exception()[0], 503)
+
+        self.assertGreater(sender.spool.pending(), 0)
+
+    def test_no_spool_by_default(self):
+        self.assertIsNone(raygunprovider.RaygunSender("apikey").spool)
+
+
+class TestRetry(unittest.TestCase):
+    def send(self, server, **config):
+        sender = server.point(raygunprovider.RaygunSender("apikey", config=config))
+        sender.retry_policy.sleep = mock.MagicMock()
+        try:
+            raise Exception("retried")
+        except Exception:
+            return sender, sender.send_exception()
+
+    def test_no_retry_by_default(self):
+        with StubRaygunServer(status=503) as server:
+            _, result = self.send(server)
+
+            self.assertEqual(result[0], 503)
+            self.assertEqual(len(server.requests), 1)
+
+    def test_retries_until_success(self):
+        statuses = [503, 429, 202]
+        with StubRaygunServer(status=lambda: statuses.pop(0)) as server:
+            sender, result = self.send(server, max_retries=3)
+
+            self.assertEqual(result[0], 202)
+            self.assertEqual(len(server.requests), 3)
+            self.assertEqual(sender.retry_policy.sleep.call_count, 2)
+
+    def test_gives_up_after_max_retries(self):
+        with StubRaygunServer(status=500) as server:
+            _, result = self.send(server, max_retries=2)
+
+            self.assertEqual(result[0], 500)
+            self.assertEqual(len(server.requests), 3)
+
+    def test_client_error_is_not_retried(self):
+        with StubRaygunServer(status=403) as server:
+            _, result = self.send(server, max_retries=3)
+
+            self.assertEqual(result[0], 403)
+            self.assertEqual(len(server.requests), 1)
+
+    def test_retry_after_header_is_honoured(self):
+        with StubRaygunServer(status=429, headers={"Retry-After": "7"}) as server:
+            sender, _ = self.send(server, max_retries=1, retry_budget=60)
+
+            self.assertGreaterEqual(sender.retry_policy.sleep.call_args[0][0], 7)
+
+    def test_retry_after_beyond_budget_stops_retrying(self):
+        with StubRaygunServer(status=429, headers={"Retry-After": "120"}) as server:
+            sender, result = self.send(server, max_retries=3, retry_budget=10)
+
+            self.assertEqual(result[0], 429)
+            self.assertEqual(len(server.requests), 1)
+            sender.retry_policy.sleep.assert_not_called()
+
+    def test_async_retries_run_on_worker_thread(self):
+        statuses = [503, 202]
+        with StubRaygunServer(status=lambda: statuses.pop(0)) as server:
+            sender = server.point(
+                raygunprovider.RaygunSender(
+                    "apikey", config={"async_send": True, "max_retries": 1}
+                )
+            )
+            self.addCleanup(sender.close, 5)
+            threads = []
+            sender.retry_policy.sleep = lambda seconds: threads.append(
+                threading.current_thread()
+            )
+
+            try:
+                raise Exception("retried in background")
+            except Exception:
+                self.assertEqual(sender.send_exception().result(5)[0], 202)
+
+            self.assertEqual(len(threads), 1)
+            self.assertIsNot(threads[0], threading.current_thread())
+
+
+class TestCircuitBreaker(unittest.TestCase):
+    def send(self, sender):
+        try:
+            raise Exception("breaker")
+        except Exception:
+            return sender.send_exception()
+
+    def test_open_breaker_short_circuits_sends(self):
+        with StubRaygunServer(status=500) as server:
+            sender = server.point(
+                raygunprovider.RaygunSender(
+                    "apikey", config={"circuit_breaker_threshold": 2}
+                )
+            )
+
+            self.assertEqual(self.send(sender)[0], 500)
+            self.assertEqual(self.send(sender)[0], 500)
+            result = self.send(sender)
+
+            self.assertEqual(result, (400, "Circuit breaker open: report not sent"))
+            self.assertEqual(len(server.requests), 2)
+            self.assertEqual(sender.circuit_breaker.short_circuited, 1)
+
+    def test_short_circuited_report_is_spooled(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory, True)
+        with StubRaygunServer(status=500) as server:
+            sender = server.point(
+                raygunprovider.RaygunSender(
+                    "apikey",
+                    config={
+                        "circuit_breaker_threshold": 1,
+                        "spool_directory": directory,
+                        "spool_replay_interval": 60,
+                    },
+                )
+            )
+            self.addCleanup(sender.close)
+            self.send(sender)
+
+            result = self.send(sender)
+
+            self.assertTrue(result[1].endswith("report spooled for retry"))
+            self.assertEqual(len(server.requests), 1)
+
+    def test_no_breaker_by_default(self):
+        self.assertIsNone(raygunprovider.RaygunSender("apikey").circuit_breaker)
+
+
+class TestRateLimit(unittest.TestCase):
+    def test_suppressed_reports_are_not_captured(self):
+        sender = raygunprovider.RaygunSender(
+            "apikey", config={"rate_limit_per_type": 1, "rate_limit_per_type_burst": 2}
+        )
+        sender._post = mock.MagicMock(return_value=(202, ""))
+        sender._create_error_message = mock.MagicMock(
+            wraps=sender._create_error_message
+        )
+
+        results = []
+        for _ in range(4):
+            try:
+                raise ValueError("hot loop")
+            except ValueError:
+                results.append(sender.send_exception())
+
+        self.assertEqual(results, [(202, ""), (202, ""), None, None])
+        self.assertEqual(sender._create_error_message.call_count, 2)
+        self.assertEqual(sender.rate_limiter.suppressed, 2)
+        self.assertEqual(
+            sender.rate_limiter.suppressed_by_key["builtins.ValueError"], 2
+        )
+
+    def test_no_rate_limit_by_default(self):
+        self.assertIsNone(raygunprovider.RaygunSender("apikey").rate_limiter)
+
+
+class TestAggregation(unittest.TestCase):
+    def test_repeats_are_sent_as_one_summary(self):
+        sender = raygunprovider.RaygunSender("apikey", config={"aggregate_window": 60})
+        sender._post = mock.MagicMock(return_value=(202, ""))
+
+        results = []
+        for i in range(5):
+            try:
+                raise ValueError("item %d failed" % i)
+            except ValueError:
+                results.append(sender.send_exception())
+
+        self.assertEqual(results, [(202, ""), None, None, None, None])
+        self.assertEqual(sender._post.call_count, 1)
+
+        sender.close()
+
+        self.assertEqual(sender._post.call_count, 2)
+        summary = sender._post.call_args[0][0]
+        self.assertEqual(summary.get_details()["userCustomData"]["occurrenceCount"], 5)
+        self.assertIsNone(summary.get_error().stackTrace[0]["localVariables"])
+
+    def test_summary_is_sent_without_another_error(self):
+        sender = raygunprovider.RaygunSender("apikey", config={"aggregate_window": 0.5})
+        sent = threading.Event()
+        sender._post = mock.MagicMock(
+            side_effect=lambda message: sent.set() or (202, "")
+        )
+        self.addCleanup(sender.close)
+
+        for i in range(3):
+            try:
+                raise ValueError("item %d failed" % i)
+            except ValueError:
+                sender.send_exception()
+        sent.clear()
+
+        self.assertTrue(sent.wait(5))
+        self.assertEqual(sender._post.call_count, 2)
+        summary = sender._post.call_args[0][0]
+        self.assertEqual(summary.get_details()["userCustomData"]["occurrenceCount"], 3)
+
+    def test_no_aggregation_by_default(self):
+        self.assertIsNone(raygunprovider.RaygunSender("apikey").aggregator)
+
+
 class TestRaygunHandler(unittest.TestCase):
     def setUp(self):
         self.handler = raygunprovider.RaygunHandler("testkey", "v1.0")
@@ -225,6 +915,21 @@ class TestRaygunHandler(unittest.TestCase):
 
         logger.removeHandler(self.handler)
 
+    def test_fallback_error_uses_senders_in_app_rules(self):
+        sender = raygunprovider.RaygunSender(
+            "apikey", config={"in_app_exclude": [__file__]}
+        )
+        sender.send_exception = mock.MagicMock(return_value=(202, "OK"))
+        handler = raygunprovider.RaygunHandler.from_sender(sender)
+        logger = logging.getLogger("test_logger_in_app")
+        logger.addHandler(handler)
+        self.addCleanup(logger.removeHandler, handler)
+
+        logger.error("Test error message")
+
+        fallback_error = sender.send_exception.call_args[1]["fallback_error"]
+        self.assertFalse(fallback_error.stackTrace[0]["inApp"])
+
 
 def main():
     unittest.main()
@@ -0,0 +1,53 @@
+import unittest
+from email.utils import formatdate
+
+from raygun4py import retry
+
+
+class TestParseRetryAfter(unittest.TestCase):
+    def test_missing(self):
+        self.assertIsNone(retry.parse_retry_after(None))
+        self.assertIsNone(retry.parse_retry_after(""))
+
+    def test_seconds(self):
+        self.assertEqual(retry.parse_retry_after("120"), 120.0)
+
+    def test_negative_seconds(self):
+        self.assertEqual(retry.parse_retry_after("-5"), 0.0)
+
+    def test_http_date(self):
+        now = 1700000000.0
+        header = formatdate(now + 30, usegmt=True)
+
+        self.assertAlmostEqual(retry.parse_retry_after(header, now=now), 30.0)
+
+    def test_malformed(self):
+        self.assertIsNone(retry.parse_retry_after("soon"))
+
+
+class TestRetryPolicy(unittest.TestCase):
+    def test_delay_is_bounded_by_exponential_cap(self):
+        policy = retry.RetryPolicy(backoff_base=1.0, backoff_max=5.0)
+
+        for attempt, cap in [(0, 1.0), (1, 2.0), (2, 4.0), (3, 5.0), (10, 5.0)]:
+            for _ in range(20):
+                self.assertTrue(0 <= policy.delay(attempt) <= cap)
+
+    def test_retry_after_is_honoured(self):
+        policy = retry.RetryPolicy(backoff_base=0.1)
+
+        self.assertGreaterEqual(policy.delay(0, retry_after=3.0), 3.0)
+
+    def test_retryable_statuses(self):
+        self.assertTrue(retry.is_retryable_status(429))
+        self.assertTrue(retry.is_retryable_status(503))
+        self.assertFalse(retry.is_retryable_status(403))
+        self.assertFalse(retry.is_retryable_status(202))
+
+
+def main():
+    unittest.main()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,181 @@
+import collections
+import datetime
+import itertools
+import unittest
+from unittest import mock
+
+from raygun4py import saferepr
+
+
+class Unprintable:
+    def __str__(self):
+        raise RuntimeError("no str")
+
+    def __repr__(self):
+        raise RuntimeError("no repr")
+
+
+class Slow:
+    def __repr__(self):
+        return "slow"
+
+
+class TestSafeRepr(unittest.TestCase):
+    def setUp(self):
+        self.safe_repr = saferepr.SafeRepr(max_depth=3, max_width=5)
+        self.addCleanup(saferepr._slow_types.clear)
+        self.addCleanup(saferepr._slow_renders.clear)
+
+    def test_matches_str_for_small_values(self):
+        for value in [
+            "text",
+            42,
+            None,
+            [1, "two", (3,)],
+            {"a": {1, 2}},
+            (),
+            set(),
+            b"bytes",
+        ]:
+            self.assertEqual(self.safe_repr(value), str(value))
+
+    def test_width_is_bounded(self):
+        self.assertEqual(self.safe_repr(list(range(1000))), "[0, 1, 2, 3, 4, ...]")
+
+    def test_depth_is_bounded(self):
+        self.assertEqual(
+            self.safe_repr({"a": {"b": {"c": {"d": 1}}}}), "{'a': {'b': {'c': {...}}}}"
+        )
+
+    def test_cycles_are_cut(self):
+        value = [1]
+        value.append(value)
+
+        self.assertEqual(self.safe_repr(value), "[1, [...]]")
+
+    def test_length_is_bounded(self):
+        safe_repr = saferepr.SafeRepr(max_length=10)
+
+        self.assertEqual(safe_repr("a" * 100), "a" * 10 + "...")
+        self.assertEqual(safe_repr([1] * 100), "[1, 1, 1, ...")
+
+    def test_strings_in_containers_are_shortened(self):
+        safe_repr = saferepr.SafeRepr(max_string=3)
+
+        self.assertEqual(safe_repr(["abcdef"]), "['abc'...]")
+
+    def test_subclasses_and_named_tuples(self):
+        point = collections.namedtuple("Point", "x y")
+
+        self.assertEqual(self.safe_repr(point(1, 2)), "Point(x=1, y=2)")
+        self.assertEqual(
+            self.safe_repr(collections.OrderedDict(a=1)), "OrderedDict({'a': 1})"
+        )
+
+    def test_failing_repr_inside_container(self):
+        self.assertEqual(
+            self.safe_repr([Unprintable()]), "[<unrepresentable Unprintable object>]"
+        )
+
+    def test_failing_str_is_raised(self):
+        with self.assertRaises(RuntimeError):
+            self.safe_repr(Unprintable())
+
+    def test_slow_types_are_not_rendered_again(self):
+        clock = itertools.count()
+        with mock.patch(
+            "raygun4py.saferepr.time.monotonic", side_effect=lambda: next(clock)
+        ):
+            for _ in range(saferepr.SLOW_RENDERS_LIMIT):
+                self.assertEqual(self.safe_repr(Slow()), "slow")
+
+        self.assertIn(Slow, saferepr._slow_types)
+        self.assertIn("Slow object at 0x", self.safe_repr(Slow()))
+
+    def test_one_slow_render_is_not_enough(self):
+        clock = itertools.count()
+        with mock.patch(
+            "raygun4py.saferepr.time.monotonic", side_effect=lambda: next(clock)
+        ):
+            for _ in range(saferepr.SLOW_RENDERS_LIMIT - 1):
+                self.safe_repr(Slow())
+
+        # A fast render starts the count again
+        self.assertEqual(self.safe_repr(Slow()), "slow")
+        self.assertNotIn(Slow, saferepr._slow_renders)
+        self.assertNotIn(Slow, saferepr._slow_types)
+
+    def test_builtin_types_are_never_marked_slow(self):
+        clock = itertools.count()
+        with mock.patch(
+            "raygun4py.saferepr.time.monotonic", side_effect=lambda: next(clock)
+        ):
+            for _ in range(saferepr.SLOW_RENDERS_LIMIT + 1):
+                self.assertEqual(self.safe_repr(42), "42")
+                self.assertEqual(self.safe_repr(1.5), "1.5")
+
+        self.assertEqual(saferepr._slow_types, set())
+        self.assertEqual(saferepr._slow_renders, {})
+
+    def test_rendering_stops_at_time_limit(self):
+        now = [0.0]
+
+        class Tick:
+            def __repr__(self):
+                now[0] += 0.06
+                return "tick"
+
+        with mock.patch(
+            "raygun4py.saferepr.time.monotonic", side_effect=lambda: now[0]
+        ):
+            self.assertEqual(
+                self.safe_repr([Tick(), Tick(), Tick()]), "[tick, tick, ..."
+            )
+
+
+class TestSanitize(unittest.TestCase):
+    def test_structure_is_kept(self):
+        value = {"list": [1, "two"], "set": {3}, "nested": {"none": None}}
+
+        self.assertEqual(
+            saferepr.sanitize(value, saferepr.SafeRepr()),
+            {"list": [1, "two"], "set": [3], "nested": {"none": None}},
+        )
+
+    def test_objects_are_rendered(self):
+        value = {"date": datetime.date(2020, 1, 2), "object": Unprintable()}
+        value["self"] = value
+
+        self.assertEqual(
+            saferepr.sanitize(value, saferepr.SafeRepr()),
+            {
+                "date": "2020-01-02",
+                "object": "<unrepresentable Unprintable object>",
+                "self": "...",
+            },
+        )
+
+    def test_wide_containers_are_truncated(self):
+        safe_repr = saferepr.SafeRepr(max_width=3)
+
+        self.assertEqual(
+            saferepr.sanitize(list(range(200000)), safe_repr), [0, 1, 2, "..."]
+        )
+        self.assertEqual(
+            saferepr.sanitize({i: i for i in range(200000)}, safe_repr),
+            {0: 0, 1: 1, 2: 2, "...": "..."},
+        )
+
+    def test_deep_nesting_is_truncated(self):
+        value = []
+        for _ in range(5000):
+            value = [value]
+
+        self.assertEqual(
+            saferepr.sanitize({"deep": value}, saferepr.SafeRepr(max_depth=3)),
+            {"deep": [["..."]]},
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
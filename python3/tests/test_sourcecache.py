@@ -0,0 +1,122 @@
+import os
+import tempfile
+import types
+import unittest
+from unittest import mock
+
+from raygun4py import sourcecache
+
+
+class TestSourceCache(unittest.TestCase):
+    def setUp(self):
+        sourcecache.clear_cache()
+        self.addCleanup(sourcecache.clear_cache)
+        self.filename = self.create_file("first = 1\nsecond = 2\nthird = 3\n")
+
+    def create_file(self, source):
+        handle, filename = tempfile.mkstemp(suffix=".py")
+        with os.fdopen(handle, "w") as file:
+            file.write(source)
+        self.addCleanup(os.remove, filename)
+        return filename
+
+    def rewrite(self, source):
+        mtime = os.stat(self.filename).st_mtime
+        with open(self.filename, "w") as file:
+            file.write(source)
+        os.utime(self.filename, (mtime + 10, mtime + 10))
+
+    def test_getline(self):
+        self.assertEqual(sourcecache.getline(self.filename, 2), "second = 2\n")
+        self.assertIsNone(sourcecache.getline(self.filename, 4))
+        self.assertIsNone(sourcecache.getline(self.filename, 0))
+        self.assertIsNone(sourcecache.getline(self.filename, None))
+
+    def test_get_context(self):
+        self.assertEqual(
+            sourcecache.get_context(self.filename, 2, 5),
+            (["first = 1"], ["third = 3"]),
+        )
+        self.assertEqual(
+            sourcecache.get_context(self.filename, 1, 1), ([], ["second = 2"])
+        )
+        self.assertEqual(sourcecache.get_context("<string>", 1, 1), ([], []))
+
+    def test_missing_source(self):
+        self.assertIsNone(sourcecache.getline("<string>", 1))
+        self.assertIsNone(sourcecache.getline("/no/such/file.py", 1))
+
+    def test_files_are_read_once(self):
+        with mock.patch.object(sourcecache, "_read", wraps=sourcecache._read) as read:
+            sourcecache.getline(self.filename, 1)
+            sourcecache.getline(self.filename, 2)
+            sourcecache.getline("<string>", 1)
+            sourcecache.getline("<string>", 1)
+
+        self.assertEqual(read.call_count, 2)
+
+    def test_changed_files_are_reloaded_after_the_check_interval(self):
+        sourcecache.getline(self.filename, 1)
+        generation = sourcecache.generation
+        self.rewrite("changed = 1\n")
+
+        self.assertEqual(sourcecache.getline(self.filename, 1), "first = 1\n")
+
+        with mock.patch.object(sourcecache, "CHECK_INTERVAL", 0):
+            self.assertEqual(sourcecache.getline(self.filename, 1), "changed = 1\n")
+        self.assertGreater(sourcecache.generation, generation)
+
+    def test_refresh(self):
+        sourcecache.getline(self.filename, 1)
+        self.rewrite("changed = 1\n")
+
+        with mock.patch.object(sourcecache, "CHECK_INTERVAL", 0):
+            sourcecache.refresh([self.filename, "/not/cached.py"])
+
+        self.assertEqual(sourcecache._files[self.filename].lines, ["changed = 1\n"])
+        self.assertNotIn("/not/cached.py", sourcecache._files)
+
+    def test_cache_size_is_bounded(self):
+        other = self.create_file("x = 1\n" * 10)
+
+        with mock.patch.object(sourcecache, "MAX_CACHED_SIZE", 70):
+            sourcecache.getline(self.filename, 1)
+            sourcecache.getline(other, 1)
+
+        self.assertEqual(list(sourcecache._files), [other])
+        self.assertEqual(sourcecache._size, 60)
+
+    def test_prewarm(self):
+        with mock.patch.object(sourcecache, "_read", wraps=sourcecache._read) as read:
+            sourcecache.prewarm([self.filename])
+            sourcecache.getline(self.filename, 1)
+
+        read.assert_called_once_with(self.filename, None)
+
+    def test_clear_cache(self):
+        sourcecache.getline(self.filename, 1)
+        with open(self.filename, "w") as source:
+            source.write("changed = 1\n")
+
+        sourcecache.clear_cache()
+
+        self.assertEqual(sourcecache.getline(self.filename, 1), "changed = 1\n")
+
+    def test_loader_sources(self):
+        class Loader:
+            def get_source(self, name):
+                return "generated = True\n"
+
+        module_globals = {"__name__": "generated", "__loader__": Loader()}
+        module_globals["__spec__"] = types.SimpleNamespace(
+            name="generated", loader=module_globals["__loader__"]
+        )
+
+        self.assertEqual(
+            sourcecache.getline("/virtual/generated.py", 1, module_globals),
+            "generated = True\n",
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
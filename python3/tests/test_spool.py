@@ -0,0 +1,264 @@
+import os
+import shutil
+import tempfile
+import time
+import unittest
+
+from raygun4py import spool
+
+
+class FakeTransmit(object):
+    def __init__(self, results=None):
+        self.results = list(results or [])
+        self.sent = []
+
+    def __call__(self, payload, path):
+        result = self.results.pop(0) if self.results else (202, "")
+        if isinstance(result, Exception):
+            raise result
+        self.sent.append((path, payload))
+        return result
+
+
+class TestDiskSpool(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory, True)
+
+    def create_spool(self, **kwargs):
+        disk_spool = spool.DiskSpool(self.directory, **kwargs)
+        self.addCleanup(disk_spool.close)
+        return disk_spool
+
+    def segment_files(self):
+        return sorted(
+            name
+            for name in os.listdir(self.directory)
+            if name.endswith(spool.SEGMENT_SUFFIX)
+        )
+
+    def test_append_persists_payload(self):
+        disk_spool = self.create_spool()
+
+        self.assertTrue(disk_spool.append("/entries", '{"a": 1}'))
+
+        self.assertEqual(len(self.segment_files()), 1)
+        self.assertGreater(disk_spool.pending(), 0)
+
+    def test_replay_delivers_in_order_and_empties_spool(self):
+        disk_spool = self.create_spool()
+        for i in range(5):
+            disk_spool.append("/entries", '{"n": %d}' % i)
+        transmit = FakeTransmit()
+
+        delivered = disk_spool.replay(transmit, concurrency=1)
+
+        self.assertEqual(delivered, 5)
+        self.assertEqual(
+            [payload for _, payload in transmit.sent],
+            ['{"n": %d}' % i for i in range(5)],
+        )
+        self.assertEqual(disk_spool.pending(), 0)
+
+    def test_replay_stops_while_endpoint_is_down(self):
+        disk_spool = self.create_spool()
+        disk_spool.append("/entries", "{}")
+        disk_spool.append("/entries", "{}")
+        transmit = FakeTransmit([ConnectionError("down")])
+
+        self.assertEqual(disk_spool.replay(transmit), 0)
+
+        self.assertEqual(transmit.sent, [])
+        self.assertGreater(disk_spool.pending(), 0)
+        self.assertEqual(disk_spool.replay(FakeTransmit()), 2)
+
+    def test_failed_probe_puts_segment_back_unchanged(self):
+        disk_spool = self.create_spool(segment_bytes=100)
+        for i in range(3):
+            disk_spool.append("/entries", "%d" % i + "x" * 50)
+        names = self.segment_files()
+        old = time.time() - 30
+        os.utime(os.path.join(self.directory, names[0]), (old, old))
+
+        self.assertEqual(disk_spool.replay(FakeTransmit([(503, "")])), 0)
+
+        self.assertEqual(self.segment_files(), names)
+        self.assertEqual(os.path.getmtime(os.path.join(self.directory, names[0])), old)
+        transmit = FakeTransmit()
+        disk_spool.replay(transmit, concurrency=1)
+        self.assertEqual([payload[0] for _, payload in transmit.sent], ["0", "1", "2"])
+
+    def test_only_failed_records_are_spooled_again(self):
+        disk_spool = self.create_spool()
+        for i in range(3):
+            disk_spool.append("/entries", '{"n": %d}' % i)
+
+        transmit = FakeTransmit([(202, ""), (503, ""), (202, "")])
+        self.assertEqual(disk_spool.replay(transmit, concurrency=1), 2)
+
+        transmit = FakeTransmit()
+        self.assertEqual(disk_spool.replay(transmit), 1)
+        self.assertEqual(transmit.sent, [("/entries", '{"n": 1}')])
+
+    def test_expired_records_are_discarded(self):
+        disk_spool = self.create_spool(max_age=60)
+        disk_spool.append("/entries", '{"old": true}', spooled_on=time.time() - 120)
+        disk_spool.append("/entries", '{"old": false}')
+        transmit = FakeTransmit()
+
+        self.assertEqual(disk_spool.replay(transmit), 1)
+
+        self.assertEqual(transmit.sent, [("/entries", '{"old": false}')])
+        self.assertEqual(disk_spool.discarded, 1)
+
+    def test_retryable_status_is_kept(self):
+        disk_spool = self.create_spool()
+        disk_spool.append("/entries", "{}")
+
+        self.assertEqual(disk_spool.replay(FakeTransmit([(503, "")])), 0)
+        self.assertGreater(disk_spool.pending(), 0)
+
+    def test_rejected_report_is_discarded(self):
+        disk_spool = self.create_spool()
+        disk_spool.append("/entries", "{}")
+
+        disk_spool.replay(FakeTransmit([(403, "Forbidden")]))
+
+        self.assertEqual(disk_spool.pending(), 0)
+        self.assertEqual(disk_spool.discarded, 1)
+
+    def test_torn_final_line_is_skipped(self):
+        disk_spool = self.create_spool()
+        disk_spool.append("/entries", '{"ok": true}')
+        segment = os.path.join(self.directory, self.segment_files()[0])
+        with open(segment, "ab") as f:
+            f.write(b'{"path": "/entries", "payl')
+        transmit = FakeTransmit()
+
+        self.assertEqual(disk_spool.replay(transmit), 1)
+        self.assertEqual(transmit.sent, [("/entries", '{"ok": true}')])
+
+    def test_segments_rotate_at_segment_size(self):
+        disk_spool = self.create_spool(segment_bytes=100)
+
+        for _ in range(3):
+            disk_spool.append("/entries", "x" * 50)
+
+        self.assertEqual(len(self.segment_files()), 3)
+
+    def test_oldest_segments_are_dropped_beyond_max_bytes(self):
+        disk_spool = self.create_spool(segment_bytes=100, max_bytes=250)
+
+        for i in range(5):
+            disk_spool.append("/entries", "%d" % i + "x" * 50)
+        transmit = FakeTransmit()
+        disk_spool.replay(transmit)
+
+        self.assertEqual(len(transmit.sent), 2)
+        self.assertTrue(transmit.sent[-1][1].startswith("4"))
+
+    def test_expired_segments_are_dropped(self):
+        disk_spool = self.create_spool(max_age=60)
+        disk_spool.append("/entries", "{}")
+        segment = os.path.join(self.directory, self.segment_files()[0])
+        old = time.time() - 120
+        os.utime(segment, (old, old))
+        transmit = FakeTransmit()
+
+        self.assertEqual(disk_spool.replay(transmit), 0)
+        self.assertEqual(transmit.sent, [])
+
+    def test_oversized_payload_is_not_spooled(self):
+        disk_spool = self.create_spool(max_bytes=10)
+
+        self.assertFalse(disk_spool.append("/entries", "x" * 100))
+
+    def test_abandoned_claim_is_recovered(self):
+        disk_spool = self.create_spool()
+        disk_spool.append("/entries", "{}")
+        segment = self.segment_files()[0]
+        # A pid that cannot belong to a live process
+        os.rename(
+            os.path.join(self.directory, segment),
+            os.path.join(
+                self.directory, "%s.%d%s" % (segment, 2**22 + 1, spool.CLAIMED_SUFFIX)
+            ),
+        )
+
+        recovered = self.create_spool()
+
+        self.assertEqual(recovered.replay(FakeTransmit()), 1)
+
+    def test_background_replay(self):
+        disk_spool = self.create_spool()
+        disk_spool.append("/entries", "{}")
+        transmit = FakeTransmit()
+
+        disk_spool.start(transmit, interval=0.01)
+
+        deadline = time.time() + 5
+        while not transmit.sent and time.time() < deadline:
+            time.sleep(0.01)
+        self.assertEqual(transmit.sent, [("/entries", "{}")])
+
+    def claim(self, pid):
+        segment = self.segment_files()[0]
+        claimed = "%s.%d%s" % (segment, pid, spool.CLAIMED_SUFFIX)
+        os.rename(
+            os.path.join(self.directory, segment),
+            os.path.join(self.directory, claimed),
+        )
+        return os.path.join(self.directory, claimed)
+
+    def test_pending_counts_segments_being_replayed(self):
+        disk_spool = self.create_spool()
+        disk_spool.append("/entries", "{}")
+        size = disk_spool.pending()
+
+        self.claim(os.getpid())
+
+        self.assertEqual(disk_spool.pending(), size)
+
+    def test_own_abandoned_claim_is_recovered(self):
+        disk_spool = self.create_spool()
+        disk_spool.append("/entries", "{}")
+        # Left behind by an earlier run of the app under the same pid
+        self.claim(os.getpid())
+
+        recovered = self.create_spool()
+
+        self.assertEqual(recovered.replay(FakeTransmit()), 1)
+
+    def test_active_claim_is_not_recovered(self):
+        disk_spool = self.create_spool()
+        disk_spool.append("/entries", "{}")
+        recovered = []
+
+        def transmit(payload, path):
+            # Another spool on the same directory starting up mid-replay
+            self.create_spool()
+            recovered.extend(self.segment_files())
+            return 202, ""
+
+        self.assertEqual(disk_spool.replay(transmit), 1)
+        self.assertEqual(recovered, [])
+
+    def test_claims_count_towards_limits(self):
+        disk_spool = self.create_spool(max_age=60)
+        disk_spool.append("/entries", "{}")
+        # Claimed by a live process that will never finish replaying it
+        claimed = self.claim(1)
+        old = time.time() - 120
+        os.utime(claimed, (old, old))
+
+        disk_spool._enforce_limits()
+
+        self.assertFalse(os.path.exists(claimed))
+
+
+def main():
+    unittest.main()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+import socket
+import unittest
+
+from raygun4py import saferepr, summarizers
+
+
+def fake_type(module, qualname, **attributes):
+    cls = type(qualname.rpartition(".")[2], (), attributes)
+    cls.__module__ = module
+    cls.__qualname__ = qualname
+    return cls
+
+
+class Expensive:
+    def __repr__(self):
+        raise AssertionError("should not be rendered")
+
+
+class ExpensiveChild(Expensive):
+    pass
+
+
+class TestSummarizers(unittest.TestCase):
+    def setUp(self):
+        self.safe_repr = saferepr.SafeRepr()
+
+    def register(self, cls, summarizer):
+        summarizers.register_summarizer(cls, summarizer)
+        self.addCleanup(summarizers.unregister_summarizer, cls)
+
+    def test_registered_type_and_subclasses_are_summarized(self):
+        self.register(Expensive, lambda value: "<expensive>")
+
+        self.assertEqual(self.safe_repr(Expensive()), "<expensive>")
+        self.assertEqual(self.safe_repr([ExpensiveChild()]), "[<expensive>]")
+
+    def test_register_by_name(self):
+        self.register("tests.test_summarizers.Expensive", lambda value: "<by name>")
+
+        self.assertEqual(self.safe_repr(Expensive()), "<by name>")
+
+    def test_failing_summarizer_falls_back_to_type_and_address(self):
+        self.register(Expensive, lambda value: 1 / 0)
+
+        self.assertIn("Expensive object at 0x", self.safe_repr(Expensive()))
+
+    def test_unregister(self):
+        self.register(Expensive, lambda value: "<expensive>")
+        summarizers.unregister_summarizer(Expensive)
+
+        self.assertIsNone(summarizers.lookup(Expensive))
+
+    def test_queryset_is_not_evaluated(self):
+        model = type("Order", (), {})
+        queryset = fake_type("django.db.models.query", "QuerySet", model=model)()
+        queryset._result_cache = None
+
+        self.assertEqual(self.safe_repr(queryset), "QuerySet<Order, unevaluated>")
+
+        queryset._result_cache = [1, 2]
+        self.assertEqual(self.safe_repr(queryset), "QuerySet<Order, 2 results>")
+
+    def test_ndarray(self):
+        array = fake_type("numpy", "ndarray", shape=(3, 4), dtype="float64")()
+
+        self.assertEqual(self.safe_repr(array), "ndarray shape=(3, 4) dtype=float64")
+
+    def test_dataframe(self):
+        frame = fake_type(
+            "pandas.core.frame", "DataFrame", shape=(10, 2), columns=["a", "b"]
+        )()
+
+        self.assertEqual(
+            self.safe_repr(frame), "DataFrame shape=(10, 2) columns=['a', 'b']"
+        )
+
+    def test_socket(self):
+        with socket.socket() as sock:
+            self.assertEqual(
+                self.safe_repr(sock),
+                "<socket fd=%d family=AF_INET type=SOCK_STREAM>" % sock.fileno(),
+            )
+
+
+if __name__ == "__main__":
+    unittest.main()
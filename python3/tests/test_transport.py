@@ -0,0 +1,74 @@
+import unittest
+
+from raygun4py import transport
+
+from tests.stub_server import StubRaygunServer
+
+
+class TestProxiesFromConfig(unittest.TestCase):
+    def test_none(self):
+        self.assertIsNone(transport.proxies_from_config(None))
+
+    def test_host_and_port(self):
+        self.assertEqual(
+            transport.proxies_from_config({"host": "proxy.local", "port": 3128}),
+            {"http": "http://proxy.local:3128", "https": "http://proxy.local:3128"},
+        )
+
+    def test_host_with_scheme(self):
+        proxies = transport.proxies_from_config(
+            {"host": "https://proxy.local", "port": 8443}
+        )
+        self.assertEqual(proxies["https"], "https://proxy.local:8443")
+
+    def test_url_string(self):
+        self.assertEqual(
+            transport.proxies_from_config("http://proxy.local:8080")["http"],
+            "http://proxy.local:8080",
+        )
+
+    def test_missing_host(self):
+        self.assertIsNone(transport.proxies_from_config({"port": 8080}))
+
+
+class TestHttpTransport(unittest.TestCase):
+    def post_twice(self, http_transport):
+        with StubRaygunServer() as server:
+            url = "http://%s/entries" % server.host
+            for _ in range(2):
+                response = http_transport.post(url, "{}", {}, 5)
+                self.assertEqual(response.status_code, 202)
+            return [request["client"] for request in server.requests]
+
+    def test_connection_is_reused(self):
+        http_transport = transport.HttpTransport()
+        self.addCleanup(http_transport.close)
+
+        first, second = self.post_twice(http_transport)
+
+        self.assertEqual(first, second)
+
+    def test_idle_session_is_evicted(self):
+        http_transport = transport.HttpTransport(idle_timeout=-1)
+        self.addCleanup(http_transport.close)
+
+        first, second = self.post_twice(http_transport)
+
+        self.assertNotEqual(first, second)
+
+    def test_close_discards_session(self):
+        http_transport = transport.HttpTransport()
+        session = http_transport._acquire()
+
+        http_transport.close()
+
+        self.assertIsNot(http_transport._acquire(), session)
+        http_transport.close()
+
+
+def main():
+    unittest.main()
+
+
+if __name__ == "__main__":
+    main()